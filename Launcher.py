@@ -12,6 +12,7 @@ import Tools.Config as tc
 import signal
 import ctypes
 import datetime
+import random
 from pathlib import Path
 import faulthandler
 
@@ -57,6 +58,7 @@ class Launcher:
     mqtt_client = None
     faultFile = None
     _logFile = None
+    _launch_time = None
     
 
     def __init__(self):
@@ -94,9 +96,10 @@ class Launcher:
         if self.pm is not None:
             self.pm.shutdown()
 
-        self.pm = pman.PluginManager(self._log, self.config)
+        self.pm = pman.PluginManager(self._log, self.config, launch_time=self._launch_time)
         self.config.pre_reload = self.pm.shutdown
         self.config.post_reload = self.pm_reload
+        self.config.plugins_changed = self.pm.reload_plugins
 
         threading.current_thread().name = "Main/MQTT"
 
@@ -122,8 +125,10 @@ class Launcher:
         except ConnectionRefusedError:
             self._log.info("Server hat die Verbindung nicht angenommen. Läuft die Server Anwendung?")
             self.reload_event.set()
-            self._log.info("Warte {} Sekunden und werde dann versuchen neu zu verbinden.".format(self.reconnect_time))
-            time.sleep(self.reconnect_time)
+            # Mit Jitter, sonst kommen nach einem Broker Neustart alle Nodes im selben Takt
+            wait = random.uniform(self.reconnect_time / 2, self.reconnect_time)
+            self._log.info("Warte {:.1f} Sekunden und werde dann versuchen neu zu verbinden.".format(wait))
+            time.sleep(wait)
             self.reconnect_time = self.reconnect_time * 2 if self.reconnect_time < 100 else 150
             self.reload = True
         except ConnectionResetError:
@@ -141,6 +146,7 @@ class Launcher:
         return False
 
     def launch(self):
+        self._launch_time = time.monotonic()
         prog_args = sys.argv[1:]
         t_args = prog_args.copy()
 
@@ -225,7 +231,7 @@ class Launcher:
                 pm.run_configurator(conf_all_mods)
             else:
                 pm.run_configurator()
-            self.config.save()
+            self.config.save(wait=True)
             i = input("Beenden= [N/y]")
             if i == "y" or i == "Y":
                 return
@@ -263,7 +269,7 @@ class Launcher:
             except: pass
         self._log.info("Config wird entladen...")
         try:
-            self.config.save()
+            self.config.save(wait=True)
             self.config.stop()
         except: self._log.exception("Fehler beim speichern der Datei!")
         self._log.info("Beende mich...")
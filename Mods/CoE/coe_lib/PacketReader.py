@@ -1,25 +1,62 @@
 import asyncio
 import logging
 from . import Message, UDP
+from Tools import Metrics
+
+class _CoeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, reader: "PacketReader") -> None:
+        self.reader = reader
+        self._packets = Metrics.counter("udp_packets_total", "Empfangene UDP Pakete", ["receiver"]).labels("coe")
+        self._errors = Metrics.counter("udp_errors_total", "UDP Pakete deren Verarbeitung fehlschlug", ["receiver"]).labels("coe")
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self._packets.inc()
+        try:
+            self.reader._on_message(data, addr)
+        except Exception:
+            self._errors.inc()
+            self.reader.log.exception("Message [{}] hat fehler verursacht.".format(data))
+
+    def error_received(self, exc: Exception) -> None:
+        self.reader.log.warning(f"CoE UDP Fehler: {exc}")
+
 
 class PacketReader:
-    udp: UDP.UdpServer
+    """
+    Ohne looper läuft ein eigener UdpServer Thread.
+    Mit looper wird der Socket über start_async() direkt in der asyncio Schleife gelesen.
+    """
+    udp: UDP.UdpServer | None
     queue: asyncio.Queue[Message.Message] | None
     looper: asyncio.AbstractEventLoop | None
 
-    def __init__(self, listen_addr: str, listen_port: int, logger: logging.Logger, looper) -> None:
+    def __init__(self, listen_addr: str, listen_port: int, logger: logging.Logger, looper, queue_size: int = 4) -> None:
         self.log = logger
-        self.udp = UDP.UdpServer(broad_addr=listen_addr, port=listen_port, logger=logger.getChild("UDP"))
-        self.udp.name = "TA CoE"
-        self.udp.on_message = self._on_message
         self.looper = looper
-        self.queue = None if looper is None else asyncio.Queue(4)
+        self.queue = None if looper is None else asyncio.Queue(queue_size)
+        self._addr = (listen_addr, listen_port)
+        self._transport: asyncio.DatagramTransport | None = None
+        self.udp = None
+        if looper is None:
+            self.udp = UDP.UdpServer(broad_addr=listen_addr, port=listen_port, logger=logger.getChild("UDP"))
+            self.udp.name = "TA CoE"
+            self.udp.on_message = self._on_message
     
     def start(self):
+        if self.udp is None:
+            raise RuntimeError("PacketReader mit looper muss mit start_async() gestartet werden.")
         self.udp.start()
 
+    async def start_async(self):
+        self._transport, _ = await self.looper.create_datagram_endpoint(lambda: _CoeProtocol(self), local_addr=self._addr)
+        self.log.info(f"Bound {self._addr[0]}:{self._addr[1]}")
+
     def stop(self):
-        self.udp.shutdown()
+        if self.udp is not None:
+            self.udp.shutdown()
+        if self._transport is not None:
+            self.looper.call_soon_threadsafe(self._transport.close)
+            self._transport = None
 
     def _on_message(self, raw: bytes, sender: tuple):
         m = Message.parseMessage(raw)
@@ -28,7 +65,11 @@ class PacketReader:
     
     def on_message(self, msg: Message.AnalogMessage | Message.DigitalMessage):
         try:
-            asyncio.run_coroutine_threadsafe(self.queue.put(msg), self.looper)
+            if self.udp is None:
+                # Läuft bereits im Schleifen Thread
+                self.queue.put_nowait(msg)
+            else:
+                asyncio.run_coroutine_threadsafe(self.queue.put(msg), self.looper)
         except asyncio.QueueFull:
             self.log.warning("CoE Message Queue full")
 
@@ -50,7 +91,7 @@ if __name__ == '__main__':
         
         logger.info("Start udp server...")
         u = PacketReader(listen_addr="0.0.0.0", listen_port=5441, logger=logger, looper=asyncio.get_running_loop())
-        u.start()
+        await u.start_async()
         while True:
             msg = await u.queue.get()
             logger.debug(f"Message from {msg.ip} is Digital {msg.isDigital()} or is Analog {msg.isAnalog()}")
@@ -60,4 +101,4 @@ if __name__ == '__main__':
         asyncio.run(main())
     except KeyboardInterrupt:
         if u is not None:
-            u.udp.shutdown()
\ No newline at end of file
+            u.stop()
\ No newline at end of file
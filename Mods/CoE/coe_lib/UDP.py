@@ -3,6 +3,7 @@ import threading
 import logging
 import sys
 import bitstring
+from Tools import Metrics
 
 class UdpServer(threading.Thread):
     def __init__(self, broad_addr="0.0.0.0", port=5441, logger=logging.getLogger("UdpServer")):
@@ -15,11 +16,14 @@ class UdpServer(threading.Thread):
         self._shutdown = False
         self.name = "UDP Listen"
         self.on_message = self.__on_message
+        self._packets = Metrics.counter("udp_packets_total", "Empfangene UDP Pakete", ["receiver"]).labels("coe")
+        self._errors = Metrics.counter("udp_errors_total", "UDP Pakete deren Verarbeitung fehlschlug", ["receiver"]).labels("coe")
 
     def run(self):
         while not self._shutdown:
             self.__logger.debug("Recv")
             data, address = self._sock.recvfrom(14)
+            self._packets.inc()
             self.__logger.debug(f"Packet from {address}")
             bitstring.ConstBitStream(bytes=data).pp()
             try:
@@ -30,6 +34,7 @@ class UdpServer(threading.Thread):
             except:
                 if self._shutdown:
                     return
+                self._errors.inc()
                 self.__logger.exception("Message [{}] hat fehler verursacht.".format(data))
 
     def __on_message(self, raw: bytes, sender: tuple):
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import datetime
 import json
 import logging
@@ -34,8 +35,8 @@ from Mods.CoE.Devices import CoeOutSwitch, CoeOutNumber
 from Mods.CoE.udp_sender import UDP_Sender
 from Mods.CoE import get_sensor_class_from_mt
 
-class TaCoePlugin(Tools.PluginManager.PluginInterface):
-    __slots__ = ("_udp", "_timer", "_from_cmi_analog", "_from_cmi_digital", "sensors", "_via_devices", "_switches", "_numbers", "_to_cmi_digital", "_to_cmi_analog", "_upd_senders", "_last_online", "_pluginManager", "_rtimer")
+class TaCoePlugin(Tools.PluginManager.AsyncPluginInterface):
+    __slots__ = ("_udp", "_timer", "_from_cmi_analog", "_from_cmi_digital", "sensors", "_via_devices", "_switches", "_numbers", "_to_cmi_digital", "_to_cmi_analog", "_upd_senders", "_last_online", "_pluginManager", "_rtimer", "_consumer")
 
     _udp: PacketReader | None
     _timer: schedule.Job
@@ -45,6 +46,7 @@ class TaCoePlugin(Tools.PluginManager.PluginInterface):
     _last_online: dict[str, datetime.datetime]
     _numbers: list[CoeOutNumber]
     _pluginManager: Tools.PluginManager.PluginManager | None
+    _consumer: asyncio.Task | None
 
     @staticmethod
     def get_device_online_topic(addr: str):
@@ -68,14 +70,18 @@ class TaCoePlugin(Tools.PluginManager.PluginInterface):
         self._numbers = []
         self.sensors: dict[str, Sensor.Sensor | BinarySensor.BinarySensor] = {}
         self._pluginManager = None
+        self._consumer = None
 
-        self._rtimer = rTimer.ResettableTimer(interval=120, function=lambda n: self.sendStates())
+        self._rtimer = rTimer.ResettableTimer(interval=120, function=lambda n: self._send_states())
 
     def set_pluginManager(self, pm: Tools.PluginManager.PluginManager):
         self._pluginManager = pm
 
-    def sendStates(self):
-        for sensor in self.sensors.values():
+    async def sendStates(self):
+        await self.run_blocking(self._send_states)
+
+    def _send_states(self):
+        for sensor in list(self.sensors.values()):
             sensor.resend()
         for sw in self._switches:
             sw.resend()
@@ -136,54 +142,67 @@ class TaCoePlugin(Tools.PluginManager.PluginInterface):
             sw.register()
             self._numbers.append(sw)
 
-    def register(self, wasConnected=False):
+    async def register(self, wasConnected=False):
         if self._udp is None:
-            self._udp = PacketReader(listen_addr="0.0.0.0", listen_port=5441, logger=self._logger, looper=None)
-            self._udp.on_message = self.on_coe_message
-            self._udp.start()
-
-            if self._config.get("CMIs", None) is None:
-                self._config["CMIs"] = {}
-            cmis: dict[str, dict] = self._config["CMIs"]
-            self._via_devices = {}
-
-            for cmi, cdata in cmis.items():
-                if cdata.get("CoE_version", 0) == 0:
-                    cdata["CoE_version"] = 1
-                CoE_version = cdata["CoE_version"]
-
-                reg = CanNodeReg(CoE_version=CoE_version)
-                self._to_cmi_digital[cmi] = DigitalChannels(reg)
-                self._to_cmi_analog[cmi] = AnalogChannels(reg, version=CoE_version)
-                self._upd_senders[f"{cmi}_D"] = UDP_Sender(self._to_cmi_digital[cmi], cmi, 5441, self._logger)
-                self._upd_senders[f"{cmi}_A"] = UDP_Sender(self._to_cmi_analog[cmi],  cmi, 5441, self._logger)
-
-                dev = autodisc.DeviceInfo()
-                dev.IDs.append(f"TACMIIP: {cmi}")
-                dev.mfr = "Technische Alternative RT GmbH, Amaliendorf"
-                dev.model = f"CMI CoE v{CoE_version}"
-                dev.name = f"CMI: {cmi}"
-                dev.via_device = autodisc.Topics.get_std_devInf().IDs[0]
-                self._via_devices[cmi] = dev
-                if not isinstance(cdata.get("switches", None), list):
-                    cdata["switches"] = []
-                self.register_switches(cdata, cmi, dev)
-                if not isinstance(cdata.get("analog", None), list):
-                    cdata["analog"] = []
-                self.register_analog_outs(cdata, cmi, dev)
-                
+            self._udp = PacketReader(listen_addr="0.0.0.0", listen_port=5441, logger=self._logger, looper=asyncio.get_running_loop(), queue_size=64)
+            await self._udp.start_async()
+            # Konfig schreiben und Discovery warten blockieren, nicht in der Schleife ausführen
+            await self.run_blocking(self._register_cmis)
+            self._consumer = asyncio.create_task(self._consume_messages())
 
         if self._config.get(f"{getConfigKey()}/deregister", False):
             pass
-    
-    def stop(self):
+
+    async def _consume_messages(self):
+        while True:
+            msg = await self._udp.queue.get()
+            try:
+                await self.run_blocking(self.on_coe_message, msg)
+            except Exception:
+                self._logger.exception("CoE Message konnte nicht verarbeitet werden.")
+
+    def _register_cmis(self):
+        if self._config.get("CMIs", None) is None:
+            self._config["CMIs"] = {}
+        cmis: dict[str, dict] = self._config["CMIs"]
+        self._via_devices = {}
+
+        for cmi, cdata in cmis.items():
+            if cdata.get("CoE_version", 0) == 0:
+                cdata["CoE_version"] = 1
+            CoE_version = cdata["CoE_version"]
+
+            reg = CanNodeReg(CoE_version=CoE_version)
+            self._to_cmi_digital[cmi] = DigitalChannels(reg)
+            self._to_cmi_analog[cmi] = AnalogChannels(reg, version=CoE_version)
+            self._upd_senders[f"{cmi}_D"] = UDP_Sender(self._to_cmi_digital[cmi], cmi, 5441, self._logger)
+            self._upd_senders[f"{cmi}_A"] = UDP_Sender(self._to_cmi_analog[cmi],  cmi, 5441, self._logger)
+
+            dev = autodisc.DeviceInfo()
+            dev.IDs.append(f"TACMIIP: {cmi}")
+            dev.mfr = "Technische Alternative RT GmbH, Amaliendorf"
+            dev.model = f"CMI CoE v{CoE_version}"
+            dev.name = f"CMI: {cmi}"
+            dev.via_device = autodisc.Topics.get_std_devInf().IDs[0]
+            self._via_devices[cmi] = dev
+            if not isinstance(cdata.get("switches", None), list):
+                cdata["switches"] = []
+            self.register_switches(cdata, cmi, dev)
+            if not isinstance(cdata.get("analog", None), list):
+                cdata["analog"] = []
+            self.register_analog_outs(cdata, cmi, dev)
+
+    async def stop(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
         if self._udp is not None:
             self._udp.stop()
         for sender in self._upd_senders.values():
             sender.stop()
 
-    def disconnected(self):
-        return super().disconnected()
+    async def disconnected(self):
+        pass
 
     def new_binary_sensor(self, addr: str, channel: DIGITAL_CHANNEL_TYPE) -> BinarySensor.BinarySensor:
         dev = autodisc.DeviceInfo()
@@ -290,13 +309,13 @@ class TaCoePlugin(Tools.PluginManager.PluginInterface):
         # !!!!!!!!!
         if self._pluginManager is None:
             return
-        for addr, tim in self._last_online.items():
+        for addr, tim in list(self._last_online.items()):
             online = "offline"
             if tim is None or tim < (datetime.datetime.now() - datetime.timedelta(minutes=10)):
                 online = "online"
             topic = TaCoePlugin.get_device_online_topic(addr)
             if isinstance(self._pluginManager._client, mclient.Client):
-                self._pluginManager._client.publish(topic, payload=online, retain=True)
+                self._pluginManager.publish(topic, payload=online, retain=True)
             else:
                 self._logger.error(f"self._pluginManager._client ({str(self._pluginManager._client)}) is no mqtt client, cannot publish {topic} with payload {online}")
 
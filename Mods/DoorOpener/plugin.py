@@ -5,6 +5,7 @@ import threading
 import RPi.GPIO as GPIO
 import Tools.Pin as p
 import Tools.Config as tc
+import Tools.PluginManager as pm
 import Tools.ThreadedMqttMessageHandler as thrMsg
 import Mods.DoorOpener.halleffect as hall
 import enum
@@ -37,6 +38,16 @@ class DoorOpener:
         self.relayPin = None
         self.halleffekt = None
         self._thr = None
+        self._pluginManager = None
+
+    def set_pluginManager(self, p: pm.PluginManager):
+        self._pluginManager = p
+
+    def _publish(self, topic: str, payload, retain=False):
+        # Ohne PluginManager direkt über den Client senden
+        if self._pluginManager is not None:
+            return self._pluginManager.publish(topic, payload, retain=retain)
+        return self.__mqtt.publish(topic, payload, qos=0, retain=retain)
 
     def register(self):
         def thr_reg():
@@ -82,10 +93,10 @@ class DoorOpener:
         elif ds == hall.DoorStateEnum.NO_POS_COMMAND_IGNORED:
             update_text = "Kommando ignoriert! Tor hat (noch) keine Position."
 
-        self.__mqtt.publish("secure/door/{}/extendet_state".format(self.__door_name), update_text, qos=0, retain=True)
+        self._publish("secure/door/{}/extendet_state".format(self.__door_name), update_text, retain=True)
 
     def open_pos_update(self, percent: int):
-        self.__mqtt.publish("secure/door/{}/state".format(self.__door_name), str(percent), qos=0, retain=True)
+        self._publish("secure/door/{}/state".format(self.__door_name), str(percent), retain=True)
 
     def do_your_thing(self, client, userdata, message: mclient.MQTTMessage):
         decoded = message.payload.decode()
@@ -185,8 +185,7 @@ class PiMotionMain(threading.Thread):
         motion_payload = self._motion_topic.get_config_payload(
             sensorName, "", unique_id=uid_motion, value_template="{{ value_json.motion }}", json_attributes=True)
         if self._motion_topic.config is not None:
-            self.__client.publish(self._motion_topic.config,
-                                  payload=motion_payload, qos=0, retain=True)
+            self._publish(self._motion_topic.config, motion_payload, retain=True)
 
         
         errName = "{} Kamera Fehler".format(sensorName)
@@ -203,7 +202,7 @@ class PiMotionMain(threading.Thread):
             json_attributes=True,
             unique_id="cam.main.error.{}".format(self._config._main.get_client_config().id)
         )
-        self.__client.publish(
+        self._publish(
             self._err_topics.state,
             json.dumps({
                 "err": 1,
@@ -230,6 +229,12 @@ class PiMotionMain(threading.Thread):
     def set_pluginManager(self, p: pm.PluginManager):
         self._pluginManager = p
 
+    def _publish(self, topic: str, payload, retain=False):
+        # Im Konstruktor gibt es noch keinen PluginManager
+        if self._pluginManager is not None:
+            return self._pluginManager.publish(topic, payload, retain=retain)
+        return self.__client.publish(topic, payload, retain=retain)
+
     def stop(self):
         self._doExit = True
         if self._record_factory:
@@ -244,8 +249,7 @@ class PiMotionMain(threading.Thread):
             self._rtsp_server.stopServer()
         if self._http_server is not None:
             self._http_server.stop()
-        self.__client.publish(self._motion_topic.ava_topic,
-                              "offline", retain=True)
+        self._publish(self._motion_topic.ava_topic, "offline", retain=True)
 
         if self._analyzer is not None:
             self._analyzer.stop_queue()
@@ -401,7 +405,7 @@ class PiMotionMain(threading.Thread):
                         if pps == 0:
                             self.was_errored = True
                             if self.__client is not None:
-                                self.__client.publish(
+                                self._publish(
                                     self._err_topics.state,
                                     json.dumps({
                                         "err": 1,
@@ -416,7 +420,7 @@ class PiMotionMain(threading.Thread):
 
                         elif self.was_errored:
                             if self.__client is not None:
-                                self.__client.publish(
+                                self._publish(
                                     self._err_topics.state,
                                     json.dumps({
                                         "err": 0,
@@ -598,7 +602,7 @@ class PiMotionMain(threading.Thread):
             if self.__client is None:
                 return
             self.__last_brightness = self._lastState.get("brightness", nan)
-            self.__client.publish(
+            self._publish(
                 self._brightness_topic.state,
                 json.dumps({
                     "brightness": self._lastState.get("brightness", nan),
@@ -610,14 +614,14 @@ class PiMotionMain(threading.Thread):
         if self.__client is None:
             return
         if changed is None:
-            self.__client.publish(self._motion_topic.state, json.dumps(self._lastState))
-            self.__client.publish(self._debug_topic.state, json.dumps(self._lastState))
+            self._publish(self._motion_topic.state, json.dumps(self._lastState))
+            self._publish(self._debug_topic.state, json.dumps(self._lastState))
             self.sendBrightness()
         elif changed:
-            self.__client.publish(self._motion_topic.state, json.dumps(self._lastState))
+            self._publish(self._motion_topic.state, json.dumps(self._lastState))
             self.sendBrightness()
         elif self._sendDebug:
-            self.__client.publish(self._debug_topic.state, json.dumps(self._lastState))
+            self._publish(self._debug_topic.state, json.dumps(self._lastState))
 
     def pil_magnitude_save_call(self, d, data: dict):
         if self._pilQueue is not None:
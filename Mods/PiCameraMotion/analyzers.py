@@ -72,6 +72,12 @@ class Analyzer(cama.PiAnalysisOutput):
         self._queue = queue.Queue(30)
         self.disableAnalyzing = False
         self.config = config
+        # Werden pro Frame gelesen, Pfade nur einmal auflösen
+        config.get("hottestBlock", False)
+        config.get("MotionDedector/enabled", True)
+        self._cfg_hottest_block = config.path("hottestBlock")
+        self._cfg_md_enabled = config.path("MotionDedector/enabled")
+        self._cfg_md_light_block = config.path("MotionDedector/lightDiffBlock")
         self._shed_task = schedule.every(2).seconds
         self._shed_task.do(self.laodZeroMap)
         self._analyzer_lock = threading.Lock()
@@ -192,7 +198,7 @@ class Analyzer(cama.PiAnalysisOutput):
             except:
                 self.logger.exception("Subtract failed")
 
-        if self.config.get("hottestBlock", False):
+        if self._cfg_hottest_block.get(False):
             hottestBlock = Mods.PiCameraMotion.analyze.hotblock.hotBlock(
                 a, self.rows, self.cols, self.blockMinNoise)
             try:
@@ -205,7 +211,7 @@ class Analyzer(cama.PiAnalysisOutput):
                 try:
                     self.motion_call(False, self.states, False)
                 except:pass
-        elif self.config.get("MotionDedector/enabled", True):
+        elif self._cfg_md_enabled.get(True):
             if self._motion is None and self.rows > 0 and self.cols > 0:
                 self._motion = Mods.PiCameraMotion.analyze.motion.MotionDedector(
                     rows = self.rows,
@@ -221,7 +227,8 @@ class Analyzer(cama.PiAnalysisOutput):
                         br = self.brightness()
                         ld = self.states.get("brightness", 0) - br
                         self.states["brightness"] = br
-                        if self.config.get("MotionDedector/lightDiffBlock", None) is not None and ld < self.config.get("MotionDedector/lightDiffBlock", None):
+                        light_block = self._cfg_md_light_block.get()
+                        if light_block is not None and ld < light_block:
                             self.logger.info("Bewegung blockiert. Grund: Helligkeit rapide gefallen.")
                         else:
                             self.motion_call(
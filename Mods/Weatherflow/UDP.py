@@ -8,6 +8,7 @@ except ImportError:
 import logging
 
 import Mods.Weatherflow.UpdateTypes as ut
+from Tools import Metrics
 
 import typing
 
@@ -23,11 +24,14 @@ class UdpServer(threading.Thread):
         self._shutdown = False
         self.name = "Weatherflow UDP Receiver"
         self.on_message: on_message_t = self.__on_message
+        self._packets = Metrics.counter("udp_packets_total", "Empfangene UDP Pakete", ["receiver"]).labels("weatherflow")
+        self._errors = Metrics.counter("udp_errors_total", "UDP Pakete deren Verarbeitung fehlschlug", ["receiver"]).labels("weatherflow")
 
     def run(self):
         super().run()
         while not self._shutdown:
             data, address = self._sock.recvfrom(2000)
+            self._packets.inc()
             text = data.decode('utf-8')
             try:
                 js = json.loads(text)
@@ -38,6 +42,7 @@ class UdpServer(threading.Thread):
             except:
                 if self._shutdown:
                     return
+                self._errors.inc()
                 self.__logger.exception("Message [{}] hat fehler verursacht.".format(text))
 
     def __on_message(self, msg: dict):
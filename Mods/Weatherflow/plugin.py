@@ -30,13 +30,13 @@ class WeatherflowPlugin:
     @staticmethod
     def reset_daily_rain(this):
         this._logger.debug("Setze Täglichen Regenzähler & Temperatur Stats zurück...")
-        this._config["Weatherflow/yesterday_daily_rain"] = this._config["Weatherflow/daily_rain"]
-        this._config["Weatherflow/daily_rain"] = 0
-        this._config["Weatherflow/temp_stats/lmin"] = this._config.get("Weatherflow/temp_stats/min", "n/A")
-        this._config["Weatherflow/temp_stats/lmax"] = this._config.get("Weatherflow/temp_stats/max", "n/A")
+        this._state["Weatherflow/yesterday_daily_rain"] = this._state.get("Weatherflow/daily_rain", 0)
+        this._state["Weatherflow/daily_rain"] = 0
+        this._state["Weatherflow/temp_stats/lmin"] = this._state.get("Weatherflow/temp_stats/min", "n/A")
+        this._state["Weatherflow/temp_stats/lmax"] = this._state.get("Weatherflow/temp_stats/max", "n/A")
 
-        this._config["Weatherflow/temp_stats/min"] = "RESET"
-        this._config["Weatherflow/temp_stats/max"] = "RESET"
+        this._state["Weatherflow/temp_stats/min"] = "RESET"
+        this._state["Weatherflow/temp_stats/max"] = "RESET"
 
     @staticmethod
     def get_device_online_topic(serial_number: str):
@@ -45,7 +45,7 @@ class WeatherflowPlugin:
     @staticmethod
     def reset_hourly_rain(this):
         this._logger.debug("Setze Stündlichen Regenzähler zurück...")
-        this._config["Weatherflow/hourly_rain"] = 0
+        this._state["Weatherflow/hourly_rain"] = 0
         delta = datetime.timedelta(hours=1)
         if this._lightning_counter["lastTime"] < datetime.datetime.now() - delta:
             this._logger.debug("Prüfe Blitzmelder")
@@ -65,6 +65,7 @@ class WeatherflowPlugin:
         self._online_states = {}
         self._pluginManager = None
         self._deviceUpdates = {}
+        self._state_topics: dict[tuple, str] = {}
         self.wasWindy = 0
 
         self._wind_filter = {
@@ -77,6 +78,10 @@ class WeatherflowPlugin:
         if self._config.get("Weatherflow/temp_diff", None) is None:
             self._config["Weatherflow/temp_diff"] = 0.2
 
+        self._state = self._config.state_store()
+        for key in ("daily_rain", "yesterday_daily_rain", "hourly_rain", "temp_stats"):
+            self._state.adopt(self._config, "Weatherflow/{}".format(key))
+
 
     def set_pluginManager(self, pm: PluginManager):
         self._pluginManager = pm
@@ -92,10 +97,10 @@ class WeatherflowPlugin:
         if self._config.get("Weatherflow/deregister", False):
             self._config["Weatherflow/deregister"] = False
             for sens in self._config.get("Weatherflow/reg_sensor", []):
-                self._pluginManager._client.publish(sens, "", retain=True)
+                self._pluginManager.publish(sens, "", retain=True)
             for ser in self._config.get("Weatherflow/serial_reg", []):
                 online_topic = WeatherflowPlugin.get_device_online_topic(ser)
-                self._pluginManager._client.publish(online_topic, "", retain=True)
+                self._pluginManager.publish(online_topic, "", retain=True)
             self._config["Weatherflow/reg_sensor"] = []
             self._config["Weatherflow/serial_reg"] = []
             self._config["Weatherflow/seen_devices"] = []
@@ -120,7 +125,7 @@ class WeatherflowPlugin:
         if self._pluginManager is None or self._pluginManager._client is None:
             return
         online_topic = WeatherflowPlugin.get_device_online_topic(serial)
-        self._pluginManager._client.publish(online_topic, "online", retain=True)
+        self._pluginManager.publish(online_topic, "online", retain=True)
         serial_reg = self._config.get("Weatherflow/serial_reg", [])
         if serial not in serial_reg:
             serial_reg.append(serial)
@@ -202,8 +207,8 @@ class WeatherflowPlugin:
                                 json_attributes=True, value_template="{{ value_json.today }}")
         self.register_new_sensor(serial_number, "Stündlicher Regen", "local_hour_rain_accumulation", "mm",
                                  autodisc.SensorDeviceClasses.GENERIC_SENSOR, deviceInfo)
-        self.update_sensor(serial_number, "local_day_rain_accumulation", self._config.get("Weatherflow/daily_rain", 0), autodisc.BinarySensorDeviceClasses.GENERIC_SENSOR)
-        self.update_sensor(serial_number, "local_hour_rain_accumulation", self._config.get("Weatherflow/hourly_rain", 0),
+        self.update_sensor(serial_number, "local_day_rain_accumulation", self._state.get("Weatherflow/daily_rain", 0), autodisc.BinarySensorDeviceClasses.GENERIC_SENSOR)
+        self.update_sensor(serial_number, "local_hour_rain_accumulation", self._state.get("Weatherflow/hourly_rain", 0),
                            autodisc.BinarySensorDeviceClasses.GENERIC_SENSOR)
 
         if self._config["Weatherflow/events"]:
@@ -229,17 +234,20 @@ class WeatherflowPlugin:
         payload = topic.get_config_payload(visible_name, messurement_value, online_topic, value_template=value_template, json_attributes=json_attributes, device=devInf, unique_id=uID)
         self._logger.info(
             "Neuen Sensor ({}) regestriert. Folgendes ist die Config Payload: {}".format(visible_name, payload))
-        self._pluginManager._client.publish(topic.config, payload, retain=True)
+        self._pluginManager.publish_discovery(topic.config, payload)
         self._logger.info("Neuen Sensor ({}) regestriert. Folgendes ist die Config Payload: {}".format(visible_name, payload))
         reg = self._config.get("Weatherflow/serial_reg", [])
         if topic.config not in reg:
             reg.append(topic.config)
 
     def update_sensor(self, serial_number, name, value, device_class: autodisc.DeviceClass):
-        topic = self._config.get_autodiscovery_topic(autodisc.Component.SENSOR, name, device_class, node_id=serial_number)
+        key = (serial_number, name, device_class)
+        state = self._state_topics.get(key, None)
+        if state is None:
+            state = self._state_topics[key] = self._config.get_autodiscovery_topic(autodisc.Component.SENSOR, name, device_class, node_id=serial_number).state
         if isinstance(value, dict):
             value = json.dumps(value)
-        self._pluginManager._client.publish(topic.state, value)
+        self._pluginManager.publish(state, value)
 
     def update_is_raining(self, serial, is_raining=False, is_hail=False):
         rain_json = {
@@ -379,22 +387,22 @@ class WeatherflowPlugin:
         if not self.set_lastseen_device(update.serial_number, update.report_intervall_minutes):
             self.register_new_air(update.serial_number, update)
 
-        if self._config.get("Weatherflow/temp_stats/min", "RESET") == "RESET":
-            self._config["Weatherflow/temp_stats/min"] = update.air_temperatur
-        elif self._config["Weatherflow/temp_stats/min"] > update.air_temperatur:
-            self._config["Weatherflow/temp_stats/min"] = update.air_temperatur
+        if self._state.get("Weatherflow/temp_stats/min", "RESET") == "RESET":
+            self._state["Weatherflow/temp_stats/min"] = update.air_temperatur
+        elif self._state["Weatherflow/temp_stats/min"] > update.air_temperatur:
+            self._state["Weatherflow/temp_stats/min"] = update.air_temperatur
 
-        if self._config.get("Weatherflow/temp_stats/max", "RESET") == "RESET":
-            self._config["Weatherflow/temp_stats/max"] = update.air_temperatur
-        elif self._config["Weatherflow/temp_stats/max"] < update.air_temperatur:
-            self._config["Weatherflow/temp_stats/max"] = update.air_temperatur
+        if self._state.get("Weatherflow/temp_stats/max", "RESET") == "RESET":
+            self._state["Weatherflow/temp_stats/max"] = update.air_temperatur
+        elif self._state["Weatherflow/temp_stats/max"] < update.air_temperatur:
+            self._state["Weatherflow/temp_stats/max"] = update.air_temperatur
 
 
-        temperature_json = {"Heute Min": self._config["Weatherflow/temp_stats/min"],
-                            "Heute Max": self._config["Weatherflow/temp_stats/max"],
+        temperature_json = {"Heute Min": self._state["Weatherflow/temp_stats/min"],
+                            "Heute Max": self._state["Weatherflow/temp_stats/max"],
                             "now": round(update.air_temperatur, 1),
-                            "Gestern Min": self._config.get("Weatherflow/temp_stats/lmin", "n/A"),
-                            "Gestern Max": self._config.get("Weatherflow/temp_stats/lmax", "n/A"),
+                            "Gestern Min": self._state.get("Weatherflow/temp_stats/lmin", "n/A"),
+                            "Gestern Max": self._state.get("Weatherflow/temp_stats/lmax", "n/A"),
                             }
 
         self.update_sensor(update.serial_number, "station_pressure", update.station_pressure, autodisc.SensorDeviceClasses.GENERIC_SENSOR)
@@ -465,8 +473,8 @@ class WeatherflowPlugin:
         if not self.set_lastseen_device(update.serial_number, update.report_interval_minutes):
             self.register_new_sky(update.serial_number, update)
 
-        self._config["Weatherflow/daily_rain"] += update.accumulated_rain
-        self._config["Weatherflow/hourly_rain"] += update.accumulated_rain
+        self._state["Weatherflow/daily_rain"] = self._state.get("Weatherflow/daily_rain", 0) + update.accumulated_rain
+        self._state["Weatherflow/hourly_rain"] = self._state.get("Weatherflow/hourly_rain", 0) + update.accumulated_rain
 
         self.update_sensor(update.serial_number, "lux", update.lux, autodisc.SensorDeviceClasses.ILLUMINANCE)
         self.update_sensor(update.serial_number, "uv_index", update.uv_index, autodisc.SensorDeviceClasses.GENERIC_SENSOR)
@@ -506,11 +514,11 @@ class WeatherflowPlugin:
             pass
         self.update_sensor(update.serial_number, "wind_direction", update.wind_direction, autodisc.SensorDeviceClasses.GENERIC_SENSOR)
         self.update_sensor(update.serial_number, "solar_radiation", update.solar_radiation, autodisc.SensorDeviceClasses.GENERIC_SENSOR)
-        self.update_sensor(update.serial_number, "local_hour_rain_accumulation", self._config["Weatherflow/hourly_rain"], autodisc.BinarySensorDeviceClasses.GENERIC_SENSOR)
+        self.update_sensor(update.serial_number, "local_hour_rain_accumulation", self._state["Weatherflow/hourly_rain"], autodisc.BinarySensorDeviceClasses.GENERIC_SENSOR)
         
         daily_rain_js = {
-            "today": round(self._config["Weatherflow/daily_rain"], 1),
-            "yesterday": round(self._config.get("Weatherflow/yesterday_daily_rain", 0), 1)
+            "today": round(self._state["Weatherflow/daily_rain"], 1),
+            "yesterday": round(self._state.get("Weatherflow/yesterday_daily_rain", 0), 1)
         }
         self.update_sensor(update.serial_number, "local_day_rain_accumulation", json.dumps(daily_rain_js), autodisc.SensorDeviceClasses.GENERIC_SENSOR)
         self.update_is_windy(update.serial_number, True, update.wind_avg, update.wind_direction)
@@ -631,12 +639,12 @@ class WeatherflowPlugin:
             if timespan.seconds > (self._online_states[serial]["intervall"] * 4) and self._online_states[serial]["wasOnline"]:
                 self._logger.info("Weatherflow Device {} ist jetzt offline".format(serial))
                 online_topic = WeatherflowPlugin.get_device_online_topic(serial)
-                self._pluginManager._client.publish(online_topic, "offline", retain=True)
+                self._pluginManager.publish(online_topic, "offline", retain=True)
                 self._online_states[serial]["wasOnline"] = False
             elif not self._online_states[serial]["wasOnline"]:
                 self._logger.info("Weatherflow Device {} ist jetzt online".format(serial))
                 online_topic = WeatherflowPlugin.get_device_online_topic(serial)
-                self._pluginManager._client.publish(online_topic, "online", retain=True)
+                self._pluginManager.publish(online_topic, "online", retain=True)
                 self._online_states[serial]["wasOnline"] = True
 
         if self._timer is not None:
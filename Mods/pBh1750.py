@@ -88,7 +88,7 @@ if not SKIP_CLASS_BUILDING:
                 self.topic = self._conf.get_autodiscovery_topic(conf.autodisc.Component.SENSOR, "Licht", conf.autodisc.SensorDeviceClasses.ILLUMINANCE)
                 payload = self.topic.get_config_payload("Licht", "lux", unique_id=unique_id)
                 if (self.topic.config is not None):
-                    self._pluginManager._client.publish(self.topic.config, payload=payload, qos=0, retain=True)
+                    self._pluginManager.publish_discovery(self.topic.config, payload)
 
             if self._conf["device_alt"]:
                 self._logger.info("Erzeuge Autodiscovery Config für Addresse 2")
@@ -96,7 +96,7 @@ if not SKIP_CLASS_BUILDING:
                 self.topic_alt = self._conf.get_autodiscovery_topic(conf.autodisc.Component.SENSOR, "Licht a", conf.autodisc.SensorDeviceClasses.ILLUMINANCE)
                 payload = self.topic_alt.get_config_payload("Licht", "lux", unique_id=unique_id)
                 if (self.topic_alt.config is not None):
-                    self._pluginManager._client.publish(self.topic_alt.config, payload=payload, qos=0, retain=True)
+                    self._pluginManager.publish_discovery(self.topic_alt.config, payload)
 
             self._job_inst.append(schedule.every().second.do(bh1750.send_update, self))
             self._job_inst.append(schedule.every(5).minutes.do(bh1750.update_threshhold, self))
@@ -104,7 +104,7 @@ if not SKIP_CLASS_BUILDING:
         def stop(self):
             for job in self._job_inst:
                 schedule.cancel_job(job)
-            self._pluginManager._client.publish(self.topic.ava_topic, "offline", retain=True)
+            self._pluginManager.publish(self.topic.ava_topic, "offline", retain=True)
 
         def update_threshhold(self):
             if self._conf["device"]:
@@ -149,13 +149,13 @@ if not SKIP_CLASS_BUILDING:
                     lux = round(lux, 1)
                     if bh1750.inbetween(lux, self._dev_last, self._threasholds[0]):
                         self._dev_last = lux
-                        self._pluginManager._client.publish(self.topic.state, lux)
+                        self._pluginManager.publish(self.topic.state, lux)
                         if self._device_offline:
-                            self._pluginManager._client.publish(self.topic.ava_topic, "online", retain=True)
+                            self._pluginManager.publish(self.topic.ava_topic, "online", retain=True)
                             self._device_offline = False
                             self.update_threshhold()
                 except OSError:
-                    self._pluginManager._client.publish(self.topic.ava_topic, "offline", retain=True)
+                    self._pluginManager.publish(self.topic.ava_topic, "offline", retain=True)
                     self._device_offline = True
                     self._logger.exception("Kann kein update senden!")
 
@@ -165,13 +165,13 @@ if not SKIP_CLASS_BUILDING:
                     lux = round(lux, 1)
                     if bh1750.inbetween(lux, self._dev_alt_last, self._threasholds[1]):
                         self._dev_alt_last = lux
-                        self._pluginManager._client.publish(self.topic_alt.state, lux)
+                        self._pluginManager.publish(self.topic_alt.state, lux)
                         if (self._devAlt_offline):
-                            self._pluginManager._client.publish(self.topic_alt.ava_topic, "online", retain=True)
+                            self._pluginManager.publish(self.topic_alt.ava_topic, "online", retain=True)
                             self._devAlt_offline = False
                             self.update_threshhold()
                 except OSError:
-                    self._pluginManager._client.publish(self.topic.ava_topic, "offline", retain=True)
+                    self._pluginManager.publish(self.topic.ava_topic, "offline", retain=True)
                     self._devAlt_offline = True
 
         def disconnected(self):
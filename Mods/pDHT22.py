@@ -70,22 +70,22 @@ if BUILD_CLASS:
                 path_lmin = "DHT/stat/{}/lmin".format(i)
                 path_lmax = "DHT/stat/{}/lmax".format(i)
 
-                if self._config[path_min] == "RESET":
+                if self._state[path_min] == "RESET":
                     continue
-                elif self._config[path_max] == "RESET":
+                elif self._state[path_max] == "RESET":
                     continue
 
-                current_min = self._config.get(path_min, "n/A")
-                current_max = self._config.get(path_max, "n/A")
+                current_min = self._state.get(path_min, "n/A")
+                current_max = self._state.get(path_max, "n/A")
 
                 self.__logger.debug("{} = {}".format(path_lmin, current_min))
-                self._config.sett(path_lmin, current_min)
+                self._state[path_lmin] = current_min
                 self.__logger.debug("{} = {}".format(path_lmax, current_max))
-                self._config.sett(path_lmax, current_max)
+                self._state[path_lmax] = current_max
 
                 self.__logger.debug("reset daily stats")
-                self._config[path_min] = "RESET"
-                self._config[path_max] = "RESET"
+                self._state[path_min] = "RESET"
+                self._state[path_max] = "RESET"
 
         def __init__(self, opts: conf.BasicConfig, logger: logging.Logger):
             self._config   = opts
@@ -98,6 +98,8 @@ if BUILD_CLASS:
                 devices = self._config["DHT"]
                 self._config["DHT"] = {}
                 self._config["DHT/dev"] = devices
+            self._state = self._config.state_store()
+            self._state.adopt(self._config, "DHT/stat")
 
             sensor_map = { '11': Adafruit_DHT.DHT11,
                     '22': Adafruit_DHT.DHT22,
@@ -175,8 +177,8 @@ if BUILD_CLASS:
                 path_lmin = "DHT/stat/{}/lmin".format(ii)
                 path_lmax = "DHT/stat/{}/lmax".format(ii)
 
-                cmin = self._config.get(path_min, "RESET")
-                cmax = self._config.get(path_max, "RESET")
+                cmin = self._state.get(path_min, "RESET")
+                cmax = self._state.get(path_max, "RESET")
 
                 if cmin == "RESET" or cmin == "n/A":
                     cmin = new_temp
@@ -187,23 +189,23 @@ if BUILD_CLASS:
                 elif cmax < new_temp:
                     cmax = new_temp
 
-                self._config[path_min] = cmin
-                self._config[path_max] = cmax
+                self._state[path_min] = cmin
+                self._state[path_max] = cmax
 
                 js = {
                     "now": new_temp,
                     "Heute höchster Wert": cmax,
                     "Heute tiefster Wert": cmin,
-                    "Gestern höchster Wert": self._config.get(path_lmax, "n/A"),
-                    "Gestern tiefster Wert": self._config.get(path_lmin, "n/A")
+                    "Gestern höchster Wert": self._state.get(path_lmax, "n/A"),
+                    "Gestern tiefster Wert": self._state.get(path_lmin, "n/A")
                 }
                 if new_temp != -1000 and self._prev_deg == -1000:
-                    self._pluginManager._client.publish(self._temp_topic.ava_topic, "online", retain=True)
+                    self._pluginManager.publish(self._temp_topic.ava_topic, "online", retain=True)
                     self._sensor_celsius(js, keypath="now")
                 elif new_temp != -1000:
                     self._sensor_celsius(js, keypath="now")
                 else:
-                    self._pluginManager._client.publish(self._temp_topic.ava_topic, "offline", retain=True)
+                    self._pluginManager.publish(self._temp_topic.ava_topic, "offline", retain=True)
                 self._prev_deg[0] = new_temp
 
         def sendHumidity(self, rel_hum, force):
@@ -217,8 +219,8 @@ if BUILD_CLASS:
                 path_lmin = "DHT/stat/{}/lmin".format(ii)
                 path_lmax = "DHT/stat/{}/lmax".format(ii)
 
-                cmin = self._config.get(path_min, "RESET")
-                cmax = self._config.get(path_max, "RESET")
+                cmin = self._state.get(path_min, "RESET")
+                cmax = self._state.get(path_max, "RESET")
 
                 if cmin == "RESET" or cmin == "n/A":
                     cmin = new_temp
@@ -229,23 +231,23 @@ if BUILD_CLASS:
                 elif cmax < new_temp:
                     cmax = new_temp
 
-                self._config[path_min] = cmin
-                self._config[path_max] = cmax
+                self._state[path_min] = cmin
+                self._state[path_max] = cmax
 
                 js = {
                     "now": new_temp,
                     "Heute höchster Wert": cmax,
                     "Heute tiefster Wert": cmin,
-                    "Gestern höchster Wert": self._config.get(path_lmax, "n/A"),
-                    "Gestern tiefster Wert": self._config.get(path_lmin, "n/A")
+                    "Gestern höchster Wert": self._state.get(path_lmax, "n/A"),
+                    "Gestern tiefster Wert": self._state.get(path_lmin, "n/A")
                 }
                 if new_temp != -1000 and self._prev_deg == -1000:
-                    self._pluginManager._client.publish(self._rh_topic.ava_topic, "online", retain=True)
+                    self._pluginManager.publish(self._rh_topic.ava_topic, "online", retain=True)
                     self._sensor_humidity(js, keypath="now")
                 elif new_temp != -1000:
                     self._sensor_humidity(js, keypath="now")
                 else:
-                    self._pluginManager._client.publish(self._rh_topic.ava_topic, "offline", retain=True)
+                    self._pluginManager.publish(self._rh_topic.ava_topic, "offline", retain=True)
                 self._prev_deg[1] = new_temp
 
 
@@ -81,7 +81,7 @@ class JsonPipe(threading.Thread, PluginManager.PluginInterface):
                         return
                     try:
                         d = json.loads(data)
-                        self._pluginManager._client.publish(d["t"], d["p"], d.get("r", False))
+                        self._pluginManager.publish(d["t"], d["p"], d.get("r", False))
                     except json.decoder.JSONDecodeError:
                         self.__logger.error("Json konnte nicht dekodiert werden.")
         os.remove(self._config.get("JsonPipe/Path", None))
@@ -90,6 +90,6 @@ class JsonPipe(threading.Thread, PluginManager.PluginInterface):
     def sendStates(self):
         try:
             d = json.loads(self._lastData)
-            self._pluginManager._client.publish(d["t"], d["p"], d.get("r", False))
+            self._pluginManager.publish(d["t"], d["p"], d.get("r", False))
         except json.decoder.JSONDecodeError:
             self.__logger.error("Json konnte nicht dekodiert werden.")
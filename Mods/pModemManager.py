@@ -280,13 +280,12 @@ if DEPENDENCIES_LOADED:
                 self.__logger.info("Werde AutodiscoveryTopic senden mit der Payload: {}".format(
                     self._raw_topic.get_config_payload("{}r".format(self._config.get("ModemManager/name", "ModemManager")), "dBm", unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True))
                     )
-                self._pluginManager._client.publish(
+                self._pluginManager.publish_discovery(
                     self._raw_topic.config,
                     self._raw_topic.get_config_payload(
                         "{}r".format(self._config.get("ModemManager/name", "ModemManager")),
                         "dBm",
-                        unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True),
-                    retain=True
+                        unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True)
                 )
         
         def register_named(self, id):
@@ -304,13 +303,12 @@ if DEPENDENCIES_LOADED:
                 self.__logger.info("Werde AutodiscoveryTopic senden mit der Payload: {}".format(
                     self._named_topic.get_config_payload("{}n".format(self._config.get("ModemManager/name", "ModemManager")), "", unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True))
                     )
-                self._pluginManager._client.publish(
+                self._pluginManager.publish_discovery(
                     self._named_topic.config,
                     self._named_topic.get_config_payload(
                         "{}n".format(self._config.get("ModemManager/name", "ModemManager")),
                         "",
-                        unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True),
-                    retain=True
+                        unique_id=unique_id, value_template="{{ value_json.RSSI }}", json_attributes=True)
                 )
         
         def register_quality(self, id):
@@ -328,13 +326,12 @@ if DEPENDENCIES_LOADED:
                 self.__logger.info("Werde AutodiscoveryTopic senden mit der Payload: {}".format(
                     self._quality_topic.get_config_payload("{}q".format(self._config.get("ModemManager/name", "ModemManager")), "%", unique_id=unique_id, value_template="{{ value_json.precentage }}", json_attributes=True))
                     )
-                self._pluginManager._client.publish(
+                self._pluginManager.publish_discovery(
                     self._quality_topic.config,
                     self._quality_topic.get_config_payload(
                         "{}q".format(self._config.get("ModemManager/name", "ModemManager")),
                         "%",
-                        unique_id=unique_id, value_template="{{ value_json.precentage }}", json_attributes=True),
-                    retain=True
+                        unique_id=unique_id, value_template="{{ value_json.precentage }}", json_attributes=True)
                 )
 
         def new_signal(self, id: str, signal: dict, signal_raw: dict, state: dict):
@@ -347,11 +344,11 @@ if DEPENDENCIES_LOADED:
             raw_new = json.dumps(signal_raw)
 
             if new_quality != self._state_last:
-                self._pluginManager._client.publish(self._quality_topic.state, new_quality)
+                self._pluginManager.publish(self._quality_topic.state, new_quality)
             if new_named != self._named_last:
-                self._pluginManager._client.publish(self._named_topic.state, new_named)
+                self._pluginManager.publish(self._named_topic.state, new_named)
             if raw_new != self._raw_last:
-                self._pluginManager._client.publish(self._raw_topic.state, raw_new)
+                self._pluginManager.publish(self._raw_topic.state, raw_new)
 
             self._state_last = new_quality
             self._named_last = new_named
@@ -3,6 +3,7 @@ import paho.mqtt.client as mclient
 from Tools import Config, Autodiscovery, ConsoleInputTools
 import logging
 import time
+import functools
 import schedule
 from Tools import PluginManager
 
@@ -131,46 +132,43 @@ if DEPENDENCIES_LOADED:
                 uid = "switch.rPiGPIO-{}.{}".format(Autodiscovery.Topics.get_std_devInf().pi_serial, name.replace(" ", "_"))
                 self.__logger.debug("Pushe Config")
                 if topic.config is not None:
-                    self._pluginManager._client.publish(topic.config, topic.get_config_payload(name, meas_val, None, unique_id=uid), retain=True)
+                    self._pluginManager.publish_discovery(topic.config, topic.get_config_payload(name, meas_val, None, unique_id=uid))
                 self.__logger.debug("SUB")
                 self._pluginManager._client.subscribe(topic.command)
                 time.sleep(2)
                 self.__logger.debug("Bin switch. Regestriere msqtt callback unter {}".format(topic.command))
-                self._pluginManager._client.message_callback_add(topic.command, self.on_message)
+                self._pluginManager.message_callback_add(topic.command, functools.partial(self.on_message, d))
                 self._registered_callback_topics.append(topic.command)
 
             else:
                 self.__logger.debug("Bin kein switch. Brauche kein callback.")
                 uid = "binary_sensor.rPiGPIO-{}.{}".format(Autodiscovery.Topics.get_std_devInf().pi_serial,  name.replace(" ", "_"))
                 if topic.config is not None:
-                    self._pluginManager._client.publish(topic.config, topic.get_config_payload(name, meas_val, None, unique_id=uid), retain=True)
+                    self._pluginManager.publish_discovery(topic.config, topic.get_config_payload(name, meas_val, None, unique_id=uid))
                 pin.set_detect(self.send_updates, Pin.PinEventEdge.BOTH)
             self.send_updates()
 
-        def on_message(self, client, userdata, message: mclient.MQTTMessage):
-            self.__logger.debug("on_message( {},{} )".format(message.topic, message.payload.decode('utf-8')))
-            for d in self._pins:
-                if d["t"].command == message.topic:
-                    if message.payload.decode('utf-8') == "ON" and d["isPulse"]:
-                        d["p"].pulse()
-                    elif message.payload.decode('utf-8') == "ON":
-                        self.__logger.debug("Einschalten")
-                        d["p"].turnOn()
-                    elif message.payload.decode('utf-8') == "OFF":
-                        self.__logger.debug("Ausschalten")
-                        d["p"].turnOff()
-                    elif message.payload.decode('utf-8') == "PULSE":
-                        d["p"].pulse()
-                    self.send_updates()
-                    return
-            self.__logger.warning("Habe keinen Pin für message gefunden :(")
+        def on_message(self, d: dict, client, userdata, message: mclient.MQTTMessage):
+            msg = message.payload.decode('utf-8')
+            self.__logger.debug("on_message( {},{} )".format(message.topic, msg))
+            if msg == "ON" and d["isPulse"]:
+                d["p"].pulse()
+            elif msg == "ON":
+                self.__logger.debug("Einschalten")
+                d["p"].turnOn()
+            elif msg == "OFF":
+                self.__logger.debug("Ausschalten")
+                d["p"].turnOff()
+            elif msg == "PULSE":
+                d["p"].pulse()
+            self.send_updates()
 
         def sendStates(self):
             self.send_updates()
 
         def stop(self):
             for reg in self._registered_callback_topics:
-                self._pluginManager._client.message_callback_remove(reg)
+                self._pluginManager.message_callback_remove(reg)
 
         def disconnected(self):
             return super().disconnected()
@@ -186,4 +184,4 @@ if DEPENDENCIES_LOADED:
             for d in self._pins:
                 pin = d["p"]
                 topic = d["t"]
-                self._pluginManager._client.publish(topic.state, self.convert_input_to_string(pin.input()))
\ No newline at end of file
+                self._pluginManager.publish(topic.state, self.convert_input_to_string(pin.input()))
\ No newline at end of file
@@ -15,6 +15,7 @@ from Tools.Devices.Filters.DeltaFilter import DeltaFilter
 from Tools.Devices.Filters.TooHighFilter import TooHighFilter
 
 from Tools import PluginManager
+from Tools import Scheduler
 
 class PluginLoader(PluginManager.PluginLoader):
     @staticmethod
@@ -47,22 +48,22 @@ class OneWireTemp(PluginManager.PluginInterface):
             path_lmin = "w1t/stat/{}/lmin".format(i)
             path_lmax = "w1t/stat/{}/lmax".format(i)
 
-            if self._config[path_min] == "RESET":
+            if self._state[path_min] == "RESET":
                 continue
-            elif self._config[path_max] == "RESET":
+            elif self._state[path_max] == "RESET":
                 continue
 
-            current_min = self._config.get(path_min, "n/A")
-            current_max = self._config.get(path_max, "n/A")
+            current_min = self._state.get(path_min, "n/A")
+            current_max = self._state.get(path_max, "n/A")
 
             self.__logger.debug("{} = {}".format(path_lmin, current_min))
-            self._config.sett(path_lmin, current_min)
+            self._state[path_lmin] = current_min
             self.__logger.debug("{} = {}".format(path_lmax, current_max))
-            self._config.sett(path_lmax, current_max)
+            self._state[path_lmax] = current_max
 
             self.__logger.debug("reset daily stats")
-            self._config[path_min] = "RESET"
-            self._config[path_max] = "RESET"
+            self._state[path_min] = "RESET"
+            self._state[path_max] = "RESET"
 
     def __init__(self, opts: conf.BasicConfig, logger: logging.Logger):
         self.__logger = logger.getChild("w1Temp")
@@ -75,6 +76,8 @@ class OneWireTemp(PluginManager.PluginInterface):
             opts["w1t"] = {}
             opts["w1t/dev"] = devices
         self._config = conf.PluginConfig(opts, "w1t")
+        self._state = self._config.state_store()
+        self._state.adopt(self._config, "w1t/stat")
         self._build_paths()
 
     def _build_paths(self):
@@ -93,6 +96,7 @@ class OneWireTemp(PluginManager.PluginInterface):
                 "p": path,
                 "f": f
             }
+            d["s"] = {k: self._state.path("w1t/stat/{}/{}".format(d["i"], k)) for k in ("min", "max", "lmin", "lmax", "last")}
             self._paths.append(d)
             self.__logger.info("Temperaturfühler {} mit der ID {} wird veröffentlicht.".format(d["n"], d["i"]))
             self.__logger.info("Der Pfad ist \"{}\"".format(d["p"]))
@@ -122,6 +126,7 @@ class OneWireTemp(PluginManager.PluginInterface):
 
         self._job = schedule.every(60).seconds
         self._job.do( lambda: self.send_update() )
+        Scheduler.set_policy(self._job, Scheduler.OverrunPolicy.SKIP)
         self.send_update()
 
 
@@ -188,20 +193,14 @@ class OneWireTemp(PluginManager.PluginInterface):
 
                 if new_temp != self._prev_deg[i] or force:
 
-                    ii = d["i"]
+                    stat = d["s"]
 
-                    path_min = "w1t/stat/{}/min".format(ii)
-                    path_max = "w1t/stat/{}/max".format(ii)
-                    path_lmin = "w1t/stat/{}/lmin".format(ii)
-                    path_lmax = "w1t/stat/{}/lmax".format(ii)
-                    path_sanity = "w1t/stat/{}/last".format(ii)
-
-                    cmin = self._config.get(path_min, "RESET")
-                    cmax = self._config.get(path_max, "RESET")
-                    last = self._config.get(path_sanity, 0.1)
+                    cmin = stat["min"].get("RESET")
+                    cmax = stat["max"].get("RESET")
+                    last = stat["last"].get(0.1)
                     if last == 0.000:
                         last= 0.0001
-                    self._config[path_sanity] = new_temp
+                    stat["last"].set(new_temp)
 
                     percentage_cahnged = 100 / last * new_temp
                     if percentage_cahnged < 70 or percentage_cahnged > 140:
@@ -218,15 +217,15 @@ class OneWireTemp(PluginManager.PluginInterface):
                         elif cmax < new_temp and not math.isnan(new_temp):
                             cmax = new_temp
 
-                        self._config[path_min] = cmin
-                        self._config[path_max] = cmax
+                        stat["min"].set(cmin)
+                        stat["max"].set(cmax)
 
                     js = {
                             "now": new_temp,
                             "Heute höchster Wert": cmax,
                             "Heute tiefster Wert": cmin,
-                            "Gestern höchster Wert": self._config.get(path_lmax, "n/A"),
-                            "Gestern tiefster Wert": self._config.get(path_lmin, "n/A")
+                            "Gestern höchster Wert": stat["lmax"].get("n/A"),
+                            "Gestern tiefster Wert": stat["lmin"].get("n/A")
                         }
 
                     if math.isnan(new_temp):
@@ -6,6 +6,7 @@ import json
 
 import paho.mqtt.client as mclient
 import schedule
+from Tools import Scheduler
 
 from Tools.Config import BasicConfig, PluginConfig 
 from Tools.Devices.HVAC import HvacDevice, HVAC_Callbacks, HVAC_MODE
@@ -139,6 +140,7 @@ if DEPENDENCIES_LOADED:
             self._hvac = device
             self._shedule_task = schedule.every(self._config.get("check_secs", 5.0)).seconds
             self._shedule_task.do(self.task)
+            Scheduler.set_policy(self._shedule_task, Scheduler.OverrunPolicy.SKIP)
             self.call_set_mode(HVAC_MODE(self._config.get("mode", HVAC_MODE.AUTO.value)))
 
         def task(self):
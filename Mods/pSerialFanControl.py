@@ -83,7 +83,7 @@ try:
                     Autodiscovery.DeviceClass
                 )
                 fan_speed.register_light(
-                    self._pluginManager._client,
+                    self._pluginManager,
                     "SerialFan Speed",
                     brightness_scale=100,
                     unique_id="fan.speed.pct.{}".format(self._config._main.get_client_config().id)
@@ -97,7 +97,7 @@ try:
                     Autodiscovery.SensorDeviceClasses.GENERIC_SENSOR
                 )
                 rpm.register(
-                    self._pluginManager._client,
+                    self._pluginManager,
                     "SerialFan RPM",
                     "RPM",
                     None,
@@ -113,7 +113,7 @@ try:
                     Autodiscovery.BinarySensorDeviceClasses.PROBLEM
                 )
                 self._err_topics.register(
-                    self._pluginManager._client,
+                    self._pluginManager,
                     "SerialFan Error",
                     "",
                     value_template="{{value_json.err}}",
@@ -133,17 +133,17 @@ try:
                 self._serial_thr.start()
 
             self._pluginManager._client.subscribe(self._speed_topics.command)
-            self._pluginManager._client.message_callback_add(self._speed_topics.command, self.on_message)
+            self._pluginManager.message_callback_add(self._speed_topics.command, self.on_message)
             self._registered_callback_topics.append(self._speed_topics.command)
 
             self._pluginManager._client.subscribe(self._speed_topics.brightness_cmd)
-            self._pluginManager._client.message_callback_add(self._speed_topics.brightness_cmd, self.on_message)
+            self._pluginManager.message_callback_add(self._speed_topics.brightness_cmd, self.on_message)
             self._registered_callback_topics.append(self._speed_topics.brightness_cmd)
             js = json.dumps({
                         "err":  0,
                         "Grund": "OK"
             })
-            self._pluginManager._client.publish(self._err_topics.state, js)
+            self._pluginManager.publish(self._err_topics.state, js)
             self._last_err = self._err
 
             self.sendStates()
@@ -210,7 +210,7 @@ try:
             self._serial.close()
             self._serial_thr.join()
             for reg in self._registered_callback_topics:
-                self._pluginManager._client.message_callback_remove(reg)
+                self._pluginManager.message_callback_remove(reg)
 
         @staticmethod
         def convert_input_to_string(to_convert: int) -> str:
@@ -223,18 +223,18 @@ try:
             if self._last_pct != self._pct:
                 self._last_pct = self._pct
                 #self.__logger.debug("Sende Pct")
-                self._pluginManager._client.publish(
+                self._pluginManager.publish(
                     self._speed_topics.state,
                     "ON" if self._pct > 10 else "OFF"
                 )
-                self._pluginManager._client.publish(
+                self._pluginManager.publish(
                     self._speed_topics.brightness_state,
                     self._pct
                 )
             if self._last_rpm != self._rpm:
                 self._last_rpm = self._rpm
                 #self.__logger.debug("Sende RPM")
-                self._pluginManager._client.publish(
+                self._pluginManager.publish(
                     self._rpm_topics.state,
                     self._rpm
                 )
@@ -244,7 +244,7 @@ try:
                         "Grund": "OK" if self._err is None else self._err
                 })
                 self.__logger.debug("Sende Error: {}".format(js))
-                self._pluginManager._client.publish(self._err_topics.state, js)
+                self._pluginManager.publish(self._err_topics.state, js)
                 self._last_err = self._err
 
 except ImportError as ie:
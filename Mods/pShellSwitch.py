@@ -6,6 +6,7 @@ import json
 import Tools.Config as conf
 import logging
 import subprocess
+import functools
 
 from Tools import PluginManager
 
@@ -34,7 +35,6 @@ class ShellSwitch(PluginManager.PluginInterface):
         self._config = conf.PluginConfig(opts, "ShellSwitch")
         self.__logger = logger.getChild("ShellSwitch")
         self._registered_callback_topics = []
-        self._name_topic_map = {}
         self._state_name_map = {}
 
     def disconnected(self):
@@ -76,29 +76,24 @@ class ShellSwitch(PluginManager.PluginInterface):
             self.__logger.error("ShellSwitch Rückgabewert der Shell ist nicht 0. Ausgabe der Shell: {}".format(e.output))
             switch["wasOn"] = not on if switch.get("onOff", True) else False
             state_js["state"] = state_js["state"] if switch.get("onOff", True) else "OFF"
-        self._pluginManager._client.publish(self._state_name_map[name], json.dumps(state_js))
-
-    def handle_switch(self, client, userdata, message: mclient.MQTTMessage):
-        for topics in self._name_topic_map.keys():
-            if message.topic == topics:
-                self.__logger.debug("message.topic ({}) == topics({})".format(message.topic, topics))
-                msg = message.payload.decode('utf-8')
-                if msg == "ON":
-                    self.__logger.debug("Schalte {} aufgrund der Payload {} an.".format(self._name_topic_map[topics], msg))
-                    self.exec_switch(self._name_topic_map[topics], True)
-                elif msg == "OFF":
-                    self.exec_switch(self._name_topic_map[topics], False)
-                    self.__logger.debug("Schalte {} aufgrund der Payload {} aus.".format(self._name_topic_map[topics], msg))
-                else:
-                    self.__logger.error("Payload ({}) ist nicht richtig!".format(msg))
-            else:
-                self.__logger.debug("message.topic ({}) != topics({})".format(message.topic, topics))
+        self._pluginManager.publish(self._state_name_map[name], json.dumps(state_js))
+
+    def handle_switch(self, name: str, client, userdata, message: mclient.MQTTMessage):
+        msg = message.payload.decode('utf-8')
+        if msg == "ON":
+            self.__logger.debug("Schalte {} aufgrund der Payload {} an.".format(name, msg))
+            self.exec_switch(name, True)
+        elif msg == "OFF":
+            self.exec_switch(name, False)
+            self.__logger.debug("Schalte {} aufgrund der Payload {} aus.".format(name, msg))
+        else:
+            self.__logger.error("Payload ({}) ist nicht richtig!".format(msg))
 
     def register(self, wasConnected=False):
         self._config.get("reg_config_topics", [])
         if self._config.get("dereg", False):
             for command_topic in self._config.get("reg_config_topics", []):
-                self._pluginManager._client.publish(command_topic, "", retain=False)
+                self._pluginManager.publish(command_topic, "", retain=False)
             self._config["reg_config_topics"] = []
             self._config["dereg"] = False
 
@@ -109,13 +104,12 @@ class ShellSwitch(PluginManager.PluginInterface):
             topics = self._config.get_autodiscovery_topic(conf.autodisc.Component.SWITCH, name, conf.autodisc.SensorDeviceClasses.GENERIC_SENSOR)
             conf_payload = topics.get_config_payload(friendly_name, "", None, value_template="{{ value_json.state }}", json_attributes=["on", "off", "error_code"], unique_id=uid)
             self.__logger.debug("Veröffentliche Config Payload {} in Topic {}".format(topics.config, conf_payload))
-            self._pluginManager._client.publish(topics.config, conf_payload, retain=True)
+            self._pluginManager.publish_discovery(topics.config, conf_payload)
             self._pluginManager._client.subscribe(topics.command)
-            self._pluginManager._client.message_callback_add(topics.command, self.handle_switch)
+            self._pluginManager.message_callback_add(topics.command, functools.partial(self.handle_switch, name))
             if topics.config not in self._config["reg_config_topics"]:
                 self._config["reg_config_topics"].append(topics.config)
             self._registered_callback_topics.append(topics.command)
-            self._name_topic_map[topics.command] = name
             self._state_name_map[name] = topics.state
             self.exec_switch(name, False, True)
             if not self._config["entrys"][name].get("onOff", True):
@@ -128,7 +122,7 @@ class ShellSwitch(PluginManager.PluginInterface):
             self.exec_switch(name, False, False)
 
         for reg in self._registered_callback_topics:
-            self._pluginManager._client.message_callback_remove(reg)
+            self._pluginManager.message_callback_remove(reg)
 
     def sendStates(self):
         for name in self._config.get("entrys", {}).keys():
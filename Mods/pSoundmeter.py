@@ -81,10 +81,9 @@ try:
             topics = self._config.get_autodiscovery_topic(ty, name, ety)
             if topics.config is not None:
                 self.__logger.info("Werde AutodiscoveryTopic senden mit der Payload: {}".format(topics.get_config_payload(name, mv, unique_id=unique_id, value_template=vt, json_attributes=True)))
-                self._pluginManager._client.publish(
+                self._pluginManager.publish_discovery(
                     topics.config,
-                    topics.get_config_payload(name, mv, unique_id=unique_id, value_template=vt, json_attributes=True),
-                    retain=True
+                    topics.get_config_payload(name, mv, unique_id=unique_id, value_template=vt, json_attributes=True)
                 )
             self._topic = topics
 
@@ -175,7 +174,7 @@ try:
                 "pRMS": self._lastRMS
             }
             if self._pluginManager is not None and self._pluginManager._client is not None:
-                self._pluginManager._client.publish(self._topic.state, json.dumps(js))
+                self._pluginManager.publish(self._topic.state, json.dumps(js))
             self._wasTriggered = triggered
 
         def set_pluginManager(self, pm):
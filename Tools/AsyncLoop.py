@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+class AsyncLoop:
+    """
+    Eine asyncio Schleife in einem eigenen Thread, die sich alle Plugins teilen.
+    Die Schleife wird erst beim ersten Gebrauch gestartet.
+    Alle Methoden außer run() dürfen aus jedem Thread aufgerufen werden.
+    """
+
+    def __init__(self, logger: logging.Logger, name: str = "asyncio"):
+        self._log = logger.getChild("Async")
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.start()
+
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def in_loop(self) -> bool:
+        """True wenn der aktuelle Thread der Schleifen Thread ist."""
+        return self._thread is not None and self._thread is threading.current_thread()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            loop.set_exception_handler(self._exception_handler)
+            running = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(loop, running), name=self._name, daemon=True)
+            self._thread.start()
+            running.wait()
+            self._loop = loop
+            return loop
+
+    def _run(self, loop: asyncio.AbstractEventLoop, running: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(running.set)
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                tasks = asyncio.all_tasks(loop)
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+        self._log.debug("Asyncio Schleife beendet.")
+
+    def _exception_handler(self, loop: asyncio.AbstractEventLoop, context: dict) -> None:
+        self._log.error(f"Unbehandelter Fehler in der asyncio Schleife: {context.get('message', '')}", exc_info=context.get("exception", None))
+
+    def call_soon(self, func: Callable[..., Any], *args: Any) -> None:
+        """func im Schleifen Thread ausführen, z.B. um einer asyncio.Queue etwas hinzuzufügen."""
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Coroutine auf der Schleife starten ohne auf das Ergebnis zu warten."""
+        if not asyncio.iscoroutine(coro):
+            coro = self._wrap(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: float | None = None) -> T:
+        """Coroutine auf der Schleife ausführen und im aufrufenden Thread auf das Ergebnis warten."""
+        if self.in_loop():
+            raise RuntimeError("run() aus dem asyncio Thread würde die Schleife blockieren, await verwenden!")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    @staticmethod
+    async def _wrap(awaitable: Awaitable[T]) -> T:
+        return await awaitable
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
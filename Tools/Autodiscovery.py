@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import enum
+import re
 from typing import Union, Self
 try:
     import json
@@ -177,6 +178,18 @@ class Topics:
             self.xy_cmd = None
             self.xy_state = None
 
+    def copy(self) -> "Topics":
+        t = Topics.__new__(Topics)
+        t.__dict__.update(self.__dict__)
+        return t
+
+    def _publish_config(self, mqtt_client, config: str) -> None:
+        # Mit dem PluginManager über die Publish Pipeline, unveränderte Configs werden nicht erneut gesendet
+        if hasattr(mqtt_client, "publish_discovery"):
+            mqtt_client.publish_discovery(self.config, config)
+        else:
+            mqtt_client.publish(self.config, config, 0, True)
+
     def register(self, mqtt_client:mclient.Client, name: str, measurement_unit: str, ava_topic=None, value_template=None, json_attributes=False, device=None, unique_id=None, icon=None, asDict=False):
         config = self.get_config_payload(
             name=name,
@@ -189,7 +202,7 @@ class Topics:
             icon=icon,
             asDict=asDict
         )
-        mqtt_client.publish(self.config, config, 0, True)
+        self._publish_config(mqtt_client, config)
     
     def register_light(self, mqtt_client:mclient.Client, name:str, unique_id=None, device=None, brightness_scale=0, color_temp=False, effect_list=[], hs=False, json_attributes=False, min_mireds=None, max_mireds=None,max_white_value=0,rgb=False,xy=False, on_command_type=LightOnCommandType.LAST):
         config = self.get_light_config_payload(
@@ -205,7 +218,7 @@ class Topics:
             max_white_value=max_white_value,
             rgb=rgb, xy=xy,on_command_type=on_command_type
         )
-        mqtt_client.publish(self.config, config, 0, True)
+        self._publish_config(mqtt_client, config)
 
     # Wenn unique_id gesetzt ist wird die globale device info verwendet, ist device gesetzt wird diese device info genommen
     def get_config_payload(self, name: str, measurement_unit: str, ava_topic=None, value_template=None, json_attributes=False, device=None, unique_id=None, icon=None, asDict=False, append_data=None, keep_light_attribs=False) -> str:
@@ -360,15 +373,16 @@ class Topics:
         )
 
 
+_SAFENAME = re.compile(r'[\W_]+')
+
 def getTopics(discoveryPrefix: str, comp: Component, devicedID: str, entitiyID: str, device_class: DeviceClass) -> Topics:
 
     if comp == Component.SENSOR and isinstance(device_class, BinarySensorDeviceClasses):
         print("getTopics: BinarySensorDeviceClasses angegeben, Component ist aber Sensor, Sensor wird zu BinarySensor abgeändert.")
         comp = Component.BINARY_SENROR
 
-    
-    import re
-    safename = re.sub('[\W_]+', '', entitiyID) 
+
+    safename = _SAFENAME.sub('', entitiyID)
 
     if discoveryPrefix is not None:
         mainPath = "{0}/{1}/{2}/{3}/".format(discoveryPrefix, str(comp.value), devicedID, safename).replace(" ", "_").replace("-","_")
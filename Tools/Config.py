@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
 from abc import abstractmethod
+import dataclasses
 from numbers import Number
+import atexit
+import copy
+import os
 import pathlib
 import os.path as osp
+import shutil
+import threading
+import weakref
 from pathlib import Path
 import logging
 import Tools.Autodiscovery as autodisc
@@ -39,10 +46,122 @@ ValidDictReal = dict[ValidItems, ValidList | ValidDict]
 
 T = TypeVar("T")
 
+# Rückgabe von ConfigPath._resolve wenn eine Zwischenebene fehlt
+_MISSING = object()
+
+class ConfigPath:
+    """
+    Vorbereiteter Zugriff auf einen Schlüssel wie "PLUGINS/w1t/diff/28-0001".
+    Der Pfad wird nur einmal zerlegt und das dict das den Wert enthält gemerkt,
+    danach kostet get() nur noch ein dict.get() und eine Prüfung pro Ebene, ob die
+    gemerkten dicts noch eingehängt sind. Plugins ersetzen Abschnitte auch direkt
+    (config["devices"][id] = {...}), ohne dass der DictBrowser davon erfährt.
+    Pfade durch Listen werden nicht gemerkt und laufen über den DictBrowser.
+    """
+    __slots__ = ("_browser", "_key", "_parents", "_leaf", "_chain", "_generation")
+
+    def __init__(self, browser: "DictBrowser", key: str):
+        self._browser = browser
+        self._key = key
+        path = key.split("/")
+        self._parents = path[:-1]
+        self._leaf = path[-1]
+        # Alle dicts von der Wurzel bis zum Elternteil von _leaf
+        self._chain: tuple[dict, ...] | None = None
+        self._generation = -1
+
+    def _cached(self) -> dict | None:
+        chain = self._chain
+        if chain is None or self._generation != self._browser.generation or chain[0] is not self._browser._dict:
+            return None
+        for i, p in enumerate(self._parents):
+            if chain[i].get(p, None) is not chain[i + 1]:
+                return None
+        return chain[-1]
+
+    def _resolve(self, create: bool = False) -> dict | None:
+        """@return Elternteil von _leaf, _MISSING wenn eine Zwischenebene fehlt und create False ist,
+        None wenn der Pfad durch etwas anderes als dicts führt."""
+        d = self._cached()
+        if d is not None:
+            return d
+        browser = self._browser
+        d = browser._dict
+        chain = [d]
+        for p in self._parents:
+            if not isinstance(d, dict):
+                return None
+            n = d.get(p, None)
+            if n is None:
+                if not create:
+                    return _MISSING
+                n = d[p] = {}
+            d = n
+            chain.append(d)
+        if not isinstance(d, dict):
+            return None
+        self._chain = tuple(chain)
+        self._generation = browser.generation
+        return d
+
+    @overload
+    def get(self, default: T) -> T:
+        pass
+    @overload
+    def get(self, default: None = None) -> object:
+        pass
+    def get(self, default=None) -> object:
+        parent = self._resolve(create=default is not None)
+        if parent is _MISSING:
+            return None
+        if parent is None:
+            return self._browser._walk_get(self._key, default)
+        value = parent.get(self._leaf, None)
+        if value is None and default is not None:
+            self.set(default)
+            return parent.get(self._leaf, None)
+        return value
+
+    def set(self, value) -> None:
+        parent = self._resolve(create=value is not None)
+        if parent is _MISSING:
+            return
+        if parent is None:
+            self._browser._walk_set(self._key, value)
+            return
+        old = parent.get(self._leaf, None)
+        if value is None:
+            parent.pop(self._leaf, None)
+        else:
+            parent[self._leaf] = value
+        if isinstance(old, (dict, list)) or isinstance(value, (dict, list)):
+            self._browser.invalidate()
+
 class DictBrowser:
+    # Obergrenze für gemerkte Pfade, Schlüssel mit IDs drin sollen nicht endlos wachsen
+    MAX_PATHS = 4096
+
     def __init__(self, backing_dict: dict, logger: logging.Logger = None) -> None:
         self._dict = backing_dict
+        self._paths: dict[str, ConfigPath] = {}
+        self.generation = 0
         #self._log = logger if logger is not None else logging.getLogger("Launch.DictBrowser")
+
+    def invalidate(self) -> None:
+        """Gemerkte Eltern dicts aller ConfigPath verwerfen, z.B. nach dem Ersetzen von Abschnitten."""
+        self.generation += 1
+
+    def reset(self, backing_dict: dict) -> None:
+        self._dict = backing_dict
+        self.invalidate()
+
+    def path(self, key: str) -> ConfigPath:
+        p = self._paths.get(key, None)
+        if p is None:
+            if len(self._paths) >= self.MAX_PATHS:
+                self._paths.clear()
+            p = self._paths[key] = ConfigPath(self, key)
+        return p
     
     @overload
     def get(self, key: str, default: T) -> T:
@@ -51,15 +170,24 @@ class DictBrowser:
     def get(self, key: str, default: None) -> None:
         pass
     def get(self, key: str, default=None) -> object:
-        t = self[key] # pyright: ignore[reportAssignmentType]
+        return self.path(key).get(default)
+
+    def _walk_get(self, key: str, default=None) -> object:
+        t = self._walk_getitem(key)
         if t is None and default is not None:
-            self[key] = default
-        return self[key] # pyright: ignore[reportReturnType]
+            self._walk_set(key, default)
+        return self._walk_getitem(key)
 
     def sett(self, key: str, value):
         self[key] = value
 
     def __getitem__(self, item: str) -> ValidItems | ValidDictReal | ValidList:
+        return self.path(item).get()
+
+    def __setitem__(self, key: str, value):
+        self.path(key).set(value)
+
+    def _walk_getitem(self, item: str) -> ValidItems | ValidDictReal | ValidList:
         path = item.split("/")
         d: Union[dict, list] = self._dict
         i = 0
@@ -86,7 +214,8 @@ class DictBrowser:
                 return d
             i += 1
 
-    def __setitem__(self, key: str, value):
+    def _walk_set(self, key: str, value):
+        self.invalidate()
         path = key.split("/")
         d: Union[dict, list] = self._dict
         i = 0
@@ -121,6 +250,7 @@ class DictBrowser:
             i += 1
 
     def __delitem__(self, key:str):
+        self.invalidate()
         path = key.split("/")
         d: Union[dict, list] = self._dict
         i = 0
@@ -136,8 +266,7 @@ class DictBrowser:
                 if d.get(path[i], None) is None:
                     return
                 del d[path[i]]
-            elif i > len(path):
-                del d
+                return
             i += 1
     
     def listDeep(self, d=None, prepand="/") -> list:
@@ -154,28 +283,57 @@ class DictBrowser:
                 ls.append("{}/{}".format(prepand, key), value)
         return ls
 
+def plugin_changes(old: dict, new: dict) -> dict[str, str] | None:
+    """Vergleicht zwei Konfigurationen pro PLUGINS/<key>.
+    @return key -> "added", "removed" oder "changed". None wenn sich außerhalb von PLUGINS etwas geändert hat."""
+    for key in set(old.keys()) | set(new.keys()):
+        if key != "PLUGINS" and old.get(key, None) != new.get(key, None):
+            return None
+    old_plugins = old.get("PLUGINS", None) or {}
+    new_plugins = new.get("PLUGINS", None) or {}
+    changes: dict[str, str] = {}
+    for key in set(old_plugins.keys()) | set(new_plugins.keys()):
+        if key not in new_plugins:
+            changes[key] = "removed"
+        elif key not in old_plugins:
+            changes[key] = "added"
+        elif old_plugins[key] != new_plugins[key]:
+            changes[key] = "changed"
+    return changes
+
 class NoClientConfigured(Exception):
     def __init__(self):
         super(NoClientConfigured, self).__init__("Client ist nicht konfiguriert! Bitte Konfiguration abändern.")
 
+@dataclasses.dataclass(frozen=True)
 class ClientConfig:
-    def __init__(self, host: str, port: int, client_id: str, clean_session: bool, ca: str, cert: str, key:str, username: str, password: str, dpre: str):
-        self.host = host
-        self.port = port
-        self.client_id = client_id
-        self.clean_session = clean_session
-        self.ca = ca
-        self.cert = cert
-        self.key = key
-        self.username = username
-        self.password = password
-        self.discorvery_prefix = dpre
-        self.id = client_id if client_id != "" else username
-        self.isOnlineTopic = "online/{}".format(self.id)
-
+    """Wird pro Laden der Konfiguration einmal erstellt und von get_client_config() wiederverwendet, daher unveränderlich."""
+    host: str
+    port: int
+    client_id: str
+    clean_session: bool
+    ca: str
+    cert: str
+    key: str
+    username: str
+    password: str
+    discorvery_prefix: str
+    protocol: int | str = 4
+    session_expiry: int = 0
+    id: str = dataclasses.field(init=False)
+    isOnlineTopic: str = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        ident = self.client_id if self.client_id != "" else self.username
+        object.__setattr__(self, "id", ident)
+        object.__setattr__(self, "isOnlineTopic", "online/{}".format(ident))
+        object.__setattr__(self, "protocol", 5 if str(self.protocol).lower().lstrip("v") in ("5", "5.0") else 4)
+        object.__setattr__(self, "session_expiry", int(self.session_expiry or 0))
+
+    def is_v5(self) -> bool:
+        return self.protocol == 5
 
     def is_secure(self) -> bool:
-        print("is_secure(): ca: {}, cert: {}, key: {}, port: {}".format(self.ca, self.cert, self.key, self.port))
         return self.ca is not None and self.cert is not None and self.key is not None and self.port != 1883
 
     def broken_security(self) -> bool:
@@ -194,7 +352,7 @@ class AbstractConfig:
         pass
 
     @abstractmethod
-    def save(self, delayed=False) -> None:
+    def save(self, delayed=False, wait=False) -> None:
         pass
 
     @abstractmethod
@@ -225,14 +383,287 @@ class AbstractConfig:
     def markFileAsDirty(self):
         pass
 
+    @abstractmethod
+    def item_path(self, key: str) -> ConfigPath:
+        pass
+
+    @abstractmethod
+    def state_store(self) -> "StateStore":
+        pass
+
+def _atomic_write(path: Path, data: str) -> None:
+    """Schreibt über eine temporäre Datei und os.replace, die Konfig existiert zu jedem Zeitpunkt vollständig.
+    Die alte Version bleibt als .cbackup erhalten."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if path.exists():
+        backup = path.with_suffix(".cbackup")
+        backup_tmp = backup.with_name(backup.name + ".tmp")
+        try:
+            backup_tmp.unlink(missing_ok=True)
+            # Hardlink statt kopieren, zeigt nach dem replace weiter auf die alte Version
+            os.link(path, backup_tmp)
+        except OSError:
+            shutil.copy2(path, backup_tmp)
+        os.replace(backup_tmp, backup)
+    os.replace(tmp, path)
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Windows kann Verzeichnisse nicht öffnen
+        pass
+
+
+class _ConfigWriter:
+    """
+    Ein Thread der für alle Konfigurationsdateien das Schreiben übernimmt, damit save()
+    nicht im MQTT oder Scheduler Thread auf die SD Karte wartet. Mehrfache Anforderungen
+    für die selbe Datei werden zusammengefasst.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: dict[int, "BasicConfig"] = {}
+        self._busy: "BasicConfig | None" = None
+        self._thread: threading.Thread | None = None
+
+    def submit(self, config: "BasicConfig") -> None:
+        with self._cond:
+            self._pending[id(config)] = config
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _done(self, config: "BasicConfig | None") -> bool:
+        if config is None:
+            return len(self._pending) == 0 and self._busy is None
+        return id(config) not in self._pending and self._busy is not config
+
+    def flush(self, config: "BasicConfig | None" = None, timeout: float = 10) -> bool:
+        """Wartet bis config (oder alle) geschrieben wurde. @return False bei Timeout"""
+        if self._thread is threading.current_thread():
+            return self._done(config)
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done(config), timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) > 0)
+                config = self._pending.pop(next(iter(self._pending)))
+                self._busy = config
+            try:
+                config._write()
+            except Exception:
+                config._logger.exception("Konfiguration konnte nicht gespeichert werden!")
+            finally:
+                with self._cond:
+                    self._busy = None
+                    self._cond.notify_all()
+
+
+_WRITER = _ConfigWriter()
+atexit.register(_WRITER.flush)
+
+
+class StatePath:
+    """Gebundener Schlüssel eines StateStore, gleiche Verwendung wie ConfigPath."""
+    __slots__ = ("_store", "_key")
+
+    def __init__(self, store: "StateStore", key: str):
+        self._store = store
+        self._key = key
+
+    def get(self, default=None) -> object:
+        return self._store.get(self._key, default)
+
+    def set(self, value) -> None:
+        self._store[self._key] = value
+
+
+class StateStore:
+    """
+    Laufzeitwerte (Zähler, Tages min/max usw.) die sich ständig ändern und nicht in die
+    von Hand bearbeitete Konfiguration gehören. Gelesen wird nur aus dem Speicher.
+    Änderungen werden gesammelt und alle flush_interval Sekunden als Zeilen an <name>.state.log
+    angehängt, nach compact_after Zeilen wird alles nach <name>.state.json geschrieben und das Log geleert.
+    Schlüssel sind flache Strings wie "w1t/stat/28-0001/min", Werte müssen JSON sein.
+    """
+
+    def __init__(self, path: Path, logger: logging.Logger, flush_interval: float = 60, compact_after: int = 500):
+        self._path = path
+        self._log_path = path.with_suffix(".log")
+        self._logger = logger.getChild("StateStore")
+        self._flush_interval = max(0.0, float(flush_interval))
+        self._compact_after = max(1, int(compact_after))
+        self._lock = threading.Lock()
+        self._data: dict[str, object] = {}
+        self._buffer: list[str] = []
+        self._log_lines = 0
+        self._timer: threading.Timer | None = None
+        self._load()
+        atexit.register(self.stop)
+
+    def _load(self) -> None:
+        try:
+            with self._path.open("r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            self._logger.error(f"{self._path} ist beschädigt, starte nur mit dem Log.")
+        try:
+            with self._log_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Letzte Zeile beim Absturz nur halb geschrieben
+                        continue
+                    if entry.get("d", False):
+                        self._data.pop(entry["k"], None)
+                    else:
+                        self._data[entry["k"]] = entry["v"]
+                    self._log_lines += 1
+        except FileNotFoundError:
+            pass
+        self._logger.debug(f"{len(self._data)} Werte geladen, {self._log_lines} aus dem Log.")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    @overload
+    def get(self, key: str, default: T) -> T:
+        pass
+    @overload
+    def get(self, key: str, default: None = None) -> object:
+        pass
+    def get(self, key: str, default=None) -> object:
+        """Anders als BasicConfig.get wird default nicht gespeichert."""
+        return self._data.get(key, default)
+
+    def __getitem__(self, key: str):
+        return self._data.get(key, None)
+
+    def __setitem__(self, key: str, value) -> None:
+        with self._lock:
+            if key in self._data and self._data[key] == value:
+                return
+            self._data[key] = value
+            self._buffer.append(json.dumps({"k": key, "v": value}))
+            self._arm()
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return
+            self._buffer.append(json.dumps({"k": key, "d": 1}))
+            self._arm()
+
+    def path(self, key: str) -> StatePath:
+        return StatePath(self, key)
+
+    def adopt(self, config: "AbstractConfig", key: str) -> None:
+        """Übernimmt einen Abschnitt aus der Konfiguration (alte Versionen haben die Statistiken dort)
+        und entfernt ihn dort. Verschachtelte dicts werden zu Schlüsseln mit / aufgelöst."""
+        value = config[key]
+        if value is None or value == {}:
+            return
+        def flatten(prefix: str, v):
+            if isinstance(v, dict):
+                for k, sub in v.items():
+                    yield from flatten(f"{prefix}/{k}", sub)
+            else:
+                yield prefix, v
+        moved = 0
+        for k, v in flatten(key, value):
+            if k not in self._data:
+                self[k] = v
+                moved += 1
+        del config[key]
+        config.markFileAsDirty()
+        self._logger.info(f"{moved} Werte von {key} aus der Konfiguration übernommen.")
+
+    def _arm(self) -> None:
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self._flush_interval, self._submit)
+        self._timer.name = "StateStore"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _submit(self) -> None:
+        with self._lock:
+            self._timer = None
+        _WRITER.submit(self)
+
+    def flush(self, timeout: float = 10) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        _WRITER.submit(self)
+        return _WRITER.flush(self, timeout)
+
+    def stop(self) -> None:
+        if not self.flush():
+            self._logger.warning("Laufzeitwerte wurden nicht rechtzeitig gespeichert!")
+
+    def _write(self) -> None:
+        with self._lock:
+            lines = self._buffer
+            self._buffer = []
+            snapshot = None
+            if len(lines) > 0 and self._log_lines + len(lines) >= self._compact_after:
+                snapshot = json.dumps(self._data, indent=1)
+        if len(lines) == 0:
+            return
+        try:
+            if snapshot is not None:
+                _atomic_write(self._path, snapshot)
+                # Erst nach dem Snapshot leeren, ein Absturz dazwischen spielt das Log nur nochmal ab
+                with self._log_path.open("w", encoding="utf-8") as f:
+                    os.fsync(f.fileno())
+                self._log_lines = 0
+                self._logger.debug(f"Laufzeitwerte nach {self._path} komprimiert.")
+                return
+            with self._log_path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._log_lines += len(lines)
+        except BaseException:
+            with self._lock:
+                self._buffer[:0] = lines
+            raise
+
+
 class BasicConfig(AbstractConfig):
     _is_in_saving = False
+    # (st_mtime_ns, st_size) der zuletzt selbst geschriebenen Datei
+    _written: tuple[int, int] | None = None
+    _state: StateStore | None = None
+    # Inhalt der Datei beim letzten Laden oder eigenen Speichern, ohne Defaults aus get()
+    _on_disk: dict | None = None
     _dict_browser: DictBrowser = None
+    _client_config: ClientConfig | None = None
+    # Obergrenze für gemerkte Topics, dann wird der Cache geleert
+    MAX_TOPICS = 4096
 
     def __init__(self, pfad: Path, logger: logging.Logger, do_load=False, filesystem_listen=True):
         self._conf_path = pfad.expanduser()
         self._logger = logger.getChild("BasicConfig")
         self._config = {}
+        self._topics: dict[tuple, autodisc.Topics] = {}
+        self._state_lock = threading.Lock()
         if do_load: self.load(fileNotFoundOK=True)
         if filesystem_listen and FILEWATCHING:
             self._register_watchdog()
@@ -274,36 +705,74 @@ class BasicConfig(AbstractConfig):
 
         if self._config.get("PLUGINS", None) is None:
             self._config["PLUGINS"] = {}
+        self._on_disk = copy.deepcopy(self._config)
         
-        self._dict_browser = DictBrowser(self._config, self._logger.getChild("DictBrowser"))
+        self._client_config = None
+        self._topics = {}
+        if self._dict_browser is None:
+            self._dict_browser = DictBrowser(self._config, self._logger.getChild("DictBrowser"))
+        else:
+            # Gleiches Objekt behalten, damit ConfigPath aus PluginConfig gültig bleiben
+            self._dict_browser.reset(self._config)
         
 
     def am_i_saving(self) -> bool:
         return self._is_in_saving
 
-    def save(self, delayed=False) -> None:
+    def save(self, delayed=False, wait=False) -> None:
+        """Geschrieben wird im ConfigWriter Thread, mit wait=True wird darauf gewartet."""
         if delayed:
             self.autoSave.reset()
             return
         if self.autoSave is not None:
             self.autoSave.cancel()
+        if not self.file_is_dirty:
+            return
+        _WRITER.submit(self)
+        if wait and not _WRITER.flush(self):
+            self._logger.warning("Konfiguration wurde nicht rechtzeitig gespeichert!")
+
+    def flush(self, timeout: float = 10) -> bool:
+        return _WRITER.flush(self, timeout)
+
+    def _write(self) -> None:
         if not self.file_is_dirty:
             return
         self._is_in_saving = True
-        self._logger.debug("[1/3] Erstelle Backup der alten Konfig...")
-        if self._conf_path.exists():
-            try:
-                self._conf_path.with_suffix(".cbackup").unlink()
-            except FileNotFoundError:
-                pass
-            self._conf_path.rename(self._conf_path.with_suffix(".cbackup"))
-        self._logger.debug("[2/3] Öffne Konfigurationsdatei zum speichern " + str(self._conf_path.absolute()))
-        with self._conf_path.open("w") as json_file:
-            json.dump(self._config, json_file, indent=2)
-            self._logger.info("[3/3] Gespeichert...")
-            self.file_is_dirty = False
-        time.sleep(2)
-        self._is_in_saving = False
+        # Vor dem Serialisieren zurücksetzen, spätere Änderungen lösen ein weiteres Speichern aus
+        self.file_is_dirty = False
+        try:
+            data = None
+            for _ in range(3):
+                try:
+                    data = json.dumps(self._config, indent=2)
+                    break
+                except RuntimeError:
+                    # dict wurde während dem Serialisieren von einem anderen Thread verändert
+                    continue
+            if data is None:
+                raise RuntimeError("Konfiguration ändert sich zu schnell")
+            self._logger.debug("[1/2] Schreibe Konfigurationsdatei " + str(self._conf_path.absolute()))
+            _atomic_write(self._conf_path, data)
+            st = os.stat(self._conf_path)
+            self._written = (st.st_mtime_ns, st.st_size)
+            self._on_disk = json.loads(data)
+            self._logger.info("[2/2] Gespeichert...")
+        except BaseException:
+            self.file_is_dirty = True
+            raise
+        finally:
+            self._is_in_saving = False
+
+    def is_own_write(self) -> bool:
+        """True wenn die Datei noch genau die ist, die zuletzt von hier geschrieben wurde."""
+        if self._written is None:
+            return False
+        try:
+            st = os.stat(self._conf_path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == self._written
 
     def pre_reload(self):
         pass
@@ -311,10 +780,18 @@ class BasicConfig(AbstractConfig):
     def post_reload(self):
         pass
 
+    def plugins_changed(self, changes: dict[str, str]) -> bool:
+        """Wird beim Neuladen aufgerufen wenn sich nur Abschnitte unter PLUGINS geändert haben.
+        @return True wenn die betroffenen Plugins neu gestartet wurden, sonst wird alles neu geladen."""
+        return False
+
     def _register_watchdog(self) -> None:
         pass
 
     def get_client_config(self) -> ClientConfig:
+        cc = self._client_config
+        if cc is not None:
+            return cc
 
         if self._config.get("CLIENT", None) is None:
             self._config["CLIENT"] = {}
@@ -337,10 +814,12 @@ class BasicConfig(AbstractConfig):
         import platform
         plat = platform.system()
 
-        return ClientConfig(client_config["host"], client_config["port"],
+        self._client_config = ClientConfig(client_config["host"], client_config["port"],
                             client_config["client_id"].format(os=plat), client_config["clean_session"], client_config["CA"],
                             client_config["CERT"], client_config["KEY"],
-                            client_config["USER"], client_config["PW"], client_config["autodiscovery"])
+                            client_config["USER"], client_config["PW"], client_config["autodiscovery"],
+                            client_config.get("protocol", "3.1.1"), client_config.get("session_expiry", 0))
+        return self._client_config
 
     def get_all_plugin_names(self) -> set:
         plugins_config = self._config.get("PLUGINS", None)
@@ -353,6 +832,18 @@ class BasicConfig(AbstractConfig):
         return self.get_client_config().discorvery_prefix
 
     def get_autodiscovery_topic(self, component: autodisc.Component, entitiy_id: str, dev_class: autodisc.DeviceClass, node_id=None, ownOfflineTopic=False, subnode_id=None) -> autodisc.Topics:
+        key = (component, entitiy_id, dev_class, node_id, ownOfflineTopic, subnode_id)
+        cached = self._topics.get(key, None)
+        if cached is not None:
+            # Aufrufer dürfen ihre Topics verändern, daher eine Kopie
+            return cached.copy()
+        topics = self._build_autodiscovery_topic(component, entitiy_id, dev_class, node_id, ownOfflineTopic, subnode_id)
+        if len(self._topics) >= self.MAX_TOPICS:
+            self._topics.clear()
+        self._topics[key] = topics.copy()
+        return topics
+
+    def _build_autodiscovery_topic(self, component: autodisc.Component, entitiy_id: str, dev_class: autodisc.DeviceClass, node_id=None, ownOfflineTopic=False, subnode_id=None) -> autodisc.Topics:
         cc = self.get_client_config()
         topics = None
         if node_id is None:
@@ -388,7 +879,23 @@ class BasicConfig(AbstractConfig):
         return self._conf_path.parent.joinpath(f"{name}.config")
 
     def stop(self):
-        pass
+        self.flush()
+        if self._state is not None:
+            self._state.stop()
+
+    def state_store(self) -> StateStore:
+        """Gemeinsamer StateStore neben der Konfigurationsdatei für Laufzeitwerte der Plugins."""
+        if self._state is not None:
+            return self._state
+        # Plugins werden parallel erzeugt, es darf nur einen StateStore pro Datei geben
+        with self._state_lock:
+            if self._state is None:
+                self._state = StateStore(
+                    self._conf_path.with_name(self._conf_path.stem + ".state.json"), self._logger,
+                    flush_interval=self._dict_browser.get("PluginManager/state/flush_interval", 60),
+                    compact_after=self._dict_browser.get("PluginManager/state/compact_after", 500)
+                )
+        return self._state
     
     @overload
     def get(self, key: str, default: T) -> T:
@@ -399,6 +906,14 @@ class BasicConfig(AbstractConfig):
     def get(self, key: str, default=None) -> object:
         return self._dict_browser.get(key, default)
 
+    def path(self, key: str) -> ConfigPath:
+        """Vorbereiteter Zugriff wie get(key), für Schleifen die den selben Wert oft lesen."""
+        return self._dict_browser.path(key)
+
+    def item_path(self, key: str) -> ConfigPath:
+        """Vorbereiteter Zugriff wie self[key], also unter PLUGINS/."""
+        return self._dict_browser.path("PLUGINS/{}".format(key))
+
     def sett(self, key: str, value):
         key = "PLUGINS/{}".format(key)
         self._dict_browser[key] = value
@@ -424,11 +939,133 @@ class BasicConfig(AbstractConfig):
 
 
 if FILEWATCHING:
-    class FileWatchingConfig(watchevents.FileSystemEventHandler, BasicConfig):
+    class _Dispatch(watchevents.FileSystemEventHandler):
+        def __init__(self, observer: "_ConfigObserver"):
+            self._observer = observer
+
+        def on_any_event(self, event: watchevents.FileSystemEvent):
+            self._observer._event(event)
+
+
+    class _ConfigObserver:
+        """
+        Ein Observer für alle FileWatchingConfig im Prozess. Jedes Verzeichnis wird nur einmal
+        beobachtet, Events werden über den aufgelösten Pfad per dict an die Konfigs verteilt.
+        Mehrere Events für die selbe Datei innerhalb von DEBOUNCE Sekunden lösen nur ein Neuladen aus.
+        """
+        DEBOUNCE = 0.5
+
+        def __init__(self):
+            self._cond = threading.Condition()
+            self._configs: dict[str, weakref.WeakSet] = {}
+            self._dirs: dict[str, tuple[object, int]] = {}
+            self._pending: dict[str, tuple[float, bool]] = {}
+            self._handler = _Dispatch(self)
+            self._observer: Observer | None = None
+            self._thread: threading.Thread | None = None
+
+        def watch(self, config: "FileWatchingConfig") -> None:
+            path = osp.realpath(config._conf_path)
+            directory = osp.dirname(path)
+            with self._cond:
+                if self._observer is None:
+                    self._observer = Observer()
+                    self._observer.name = "ConfigWatchdog"
+                    self._observer.start()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="ConfigReload", daemon=True)
+                    self._thread.start()
+                watch, count = self._dirs.get(directory, (None, 0))
+                if watch is None:
+                    watch = self._observer.schedule(self._handler, directory, recursive=False)
+                self._dirs[directory] = (watch, count + 1)
+                self._configs.setdefault(path, weakref.WeakSet()).add(config)
+            config._watch_key = path
+
+        def unwatch(self, config: "FileWatchingConfig") -> None:
+            path = config._watch_key
+            if path is None:
+                return
+            config._watch_key = None
+            directory = osp.dirname(path)
+            with self._cond:
+                configs = self._configs.get(path, None)
+                if configs is not None:
+                    configs.discard(config)
+                    if len(configs) == 0:
+                        del self._configs[path]
+                        self._pending.pop(path, None)
+                watch, count = self._dirs.get(directory, (None, 0))
+                if count > 1:
+                    self._dirs[directory] = (watch, count - 1)
+                    return
+                self._dirs.pop(directory, None)
+                if watch is not None and self._observer is not None:
+                    try:
+                        self._observer.unschedule(watch)
+                    except (KeyError, OSError):
+                        pass
+
+        def _event(self, event: watchevents.FileSystemEvent) -> None:
+            if event.is_directory or event.event_type not in ("modified", "moved", "created"):
+                return
+            moved = event.event_type == "moved"
+            paths = (event.src_path, event.dest_path) if moved else (event.src_path,)
+            with self._cond:
+                for p in paths:
+                    if p not in self._configs:
+                        continue
+                    # Nach rename/replace darf die Datei kurz fehlen
+                    missing_ok = moved or self._pending.get(p, (0.0, False))[1]
+                    self._pending[p] = (time.monotonic() + self.DEBOUNCE, missing_ok)
+                    self._cond.notify()
+
+        def _run(self) -> None:
+            while True:
+                with self._cond:
+                    while len(self._pending) == 0:
+                        self._cond.wait()
+                    now = time.monotonic()
+                    first = min(deadline for deadline, _ in self._pending.values())
+                    if first > now:
+                        self._cond.wait(first - now)
+                        continue
+                    due = [(p, ok) for p, (deadline, ok) in self._pending.items() if deadline <= now]
+                    reloads = []
+                    for p, ok in due:
+                        del self._pending[p]
+                        reloads.extend((c, ok) for c in list(self._configs.get(p, ())))
+                for config, missing_ok in reloads:
+                    try:
+                        config.load(reload=True, fileNotFoundOK=missing_ok)
+                    except Exception:
+                        config._logger.exception("Neuladen der Konfiguration fehlgeschlagen!")
+
+
+    _OBSERVER = _ConfigObserver()
+
+
+    class FileWatchingConfig(BasicConfig):
+        _watch_key: str | None = None
+
         def load(self, reload=False, fileNotFoundOK=True):
             if self._is_in_saving:
                 return
             if reload:
+                if self.is_own_write():
+                    # Event vom eigenen Speichern
+                    return
+                try:
+                    with self._conf_path.open("r") as json_file:
+                        new_config = json.load(json_file)
+                except FileNotFoundError:
+                    new_config = None
+                except ValueError:
+                    # Datei wird wahrscheinlich gerade geschrieben, das nächste Event kommt
+                    self._logger.warning("Konfiguration ist kein gültiges JSON, wird nicht neu geladen.")
+                    return
+                if new_config is not None and self._reload_plugins(new_config):
+                    return
                 self._logger.info("Konfiguration wird neu geladen. Wurde verändert.")
                 self.pre_reload()
                 super().load(fileNotFoundOK=fileNotFoundOK)
@@ -436,52 +1073,52 @@ if FILEWATCHING:
             else:
                 super().load(fileNotFoundOK=fileNotFoundOK)
 
-        def on_modified(self, event: watchevents.DirModifiedEvent):
-            try:
-                if self._conf_path.samefile(event.src_path):
-                    self.load(reload=True, fileNotFoundOK=False)
-            except: pass
-
-        def on_moved(self, event: watchevents.DirMovedEvent):
-            try:
-                if self._conf_path.samefile(event.src_path):
-                    self.load(reload=True, fileNotFoundOK=True)
-            except: pass
-
-        def __init__(self, pfad: pathlib.Path, logger: logging.Logger, do_load=False, filesystem_listen=True):
-            super().__init__(pfad, logger, do_load, filesystem_listen)
-            self._observer = None
+        def _reload_plugins(self, new_config: dict) -> bool:
+            # Mit der Datei vergleichen, nicht mit dem Speicher: der enthält Defaults und ungespeicherte Änderungen
+            changes = plugin_changes(self._on_disk if self._on_disk is not None else self._config, new_config)
+            if changes is None:
+                return False
+            if len(changes) == 0:
+                self._logger.debug("Konfiguration unverändert.")
+                return True
+            self._logger.info(f"Nur Plugins geändert: {changes}")
+            # Nur die geänderten Abschnitte ersetzen, unveränderte Plugins behalten ihre dicts
+            plugins = self._config.setdefault("PLUGINS", {})
+            for key, change in changes.items():
+                if change == "removed":
+                    del plugins[key]
+                else:
+                    plugins[key] = new_config["PLUGINS"][key]
+            self._on_disk = copy.deepcopy(new_config)
+            self._dict_browser.invalidate()
+            return self.plugins_changed(changes)
 
         def __del__(self):
             self.stop()
 
         def stop(self):
-            try:
-                self._observer.stop()
-                print("Observer killed")
-            except:
-                pass
+            BasicConfig.stop(self)
+            _OBSERVER.unwatch(self)
             
         def _register_watchdog(self):
             try:
-                self._observer = Observer()
-                self._observer.name = "ConfigWatchdog"
-                self._observer.schedule(self, str(self._conf_path.parent), recursive=False)
-                self._observer.start()
+                _OBSERVER.watch(self)
             except OSError:
-                pass
+                self._logger.warning("Dateiwächter konnte nicht eingerichtet werden.")
 
 class PluginConfig(AbstractConfig):
 
     def __init__(self, config: AbstractConfig, plugin_name:str):
         self._main  = config
         self._pname = plugin_name
+        self._paths: dict[str, ConfigPath] = {}
         self.get_autodiscovery_topic = self._main.get_autodiscovery_topic
         self.getIndependendFile      = self._main.getIndependendFile
         self.getIndependendPath      = self._main.getIndependendPath
+        self.state_store             = self._main.state_store
 
-    def save(self):
-        self._main.save()
+    def save(self, delayed=False, wait=False):
+        self._main.save(delayed, wait)
 
     @overload
     def get(self, key: str, default: T) -> T:
@@ -490,10 +1127,24 @@ class PluginConfig(AbstractConfig):
     def get(self, key: str, default: None) -> None:
         pass
     def get(self, key: str, default=None) -> object:
-        t = self[key]
+        p = self.path(key)
+        t = p.get()
         if t is None and default is not None:
             self[key] = default
-        return self[key]
+            return p.get()
+        return t
+
+    def path(self, key: str) -> ConfigPath:
+        """Vorbereiteter Zugriff auf PLUGINS/<plugin>/key, in Schleifen einmal holen und get()/set() verwenden."""
+        p = self._paths.get(key, None)
+        if p is None:
+            if len(self._paths) >= DictBrowser.MAX_PATHS:
+                self._paths.clear()
+            p = self._paths[key] = self._main.item_path("{}/{}".format(self._pname, key))
+        return p
+
+    def item_path(self, key: str) -> ConfigPath:
+        return self.path(key)
     
     def getExact(self, key, default: T) -> T:
         data = self.get(key=key, default=default)
@@ -515,16 +1166,14 @@ class PluginConfig(AbstractConfig):
         return default
 
     def sett(self, key: str, value):
-        key = "{}/{}".format(self._pname, key)
-        self._main[key] = value
+        self[key] = value
 
     def __getitem__(self, item: str):
-        key = "{}/{}".format(self._pname, item)
-        return self._main[key]
+        return self.path(item).get()
 
     def __setitem__(self, key: str, value):
-        key = "{}/{}".format(self._pname, key)
-        self._main[key] = value
+        self.path(key).set(value)
+        self.markFileAsDirty()
 
     def __delitem__(self, key:str):
         key = "{}/{}".format(self._pname, key)
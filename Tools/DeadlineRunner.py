@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+
+@dataclasses.dataclass(slots=True)
+class DeadlineReport:
+    results: dict[str, Any] = dataclasses.field(default_factory=dict)
+    errors: dict[str, BaseException] = dataclasses.field(default_factory=dict)
+    durations: dict[str, float] = dataclasses.field(default_factory=dict)
+    overdue: list[str] = dataclasses.field(default_factory=list)
+
+
+class DeadlineRunner:
+    """
+    Führt benannte Jobs parallel auf maximal max_workers Threads aus.
+    Jeder Job hat ab seinem Start ein eigenes Zeitbudget. Läuft es ab, wird nicht mehr
+    auf ihn gewartet und sein Platz für den nächsten Job freigegeben.
+    Beendet sich ein überfälliger Job doch noch, wird late_callback(name, result, exc) aufgerufen.
+    """
+
+    def __init__(self, logger: logging.Logger, name: str, max_workers: int = 4, deadline: float = 30.0):
+        self._log = logger.getChild(name)
+        self._name = name
+        self._max_workers = max(1, int(max_workers))
+        self._deadline = float(deadline)
+
+    def run(self, jobs: dict[str, Callable[[], Any]], deadlines: dict[str, float] | None = None,
+            late_callback: Callable[[str, Any, BaseException | None], None] | None = None) -> DeadlineReport:
+        deadlines = deadlines if deadlines is not None else {}
+        report = DeadlineReport()
+        cond = threading.Condition()
+        pending = list(jobs.items())
+        running: dict[str, float] = {}
+        finished: set[str] = set()
+        abandoned: set[str] = set()
+
+        def bootstrap(name: str, func: Callable[[], Any], started: float):
+            result, exc = None, None
+            try:
+                result = func()
+            except BaseException as e:
+                exc = e
+            with cond:
+                duration = time.monotonic() - started
+                if name in abandoned:
+                    self._log.warning(f"{name} ist nach {duration:.1f}s doch noch fertig geworden.")
+                    report.durations[name] = duration
+                else:
+                    report.durations[name] = duration
+                    if exc is not None:
+                        report.errors[name] = exc
+                    else:
+                        report.results[name] = result
+                    finished.add(name)
+                    cond.notify_all()
+            if name in abandoned and late_callback is not None:
+                try:
+                    late_callback(name, result, exc)
+                except Exception:
+                    self._log.exception(f"late_callback für {name} fehlgeschlagen!")
+
+        with cond:
+            while pending or running:
+                while pending and len(running) < self._max_workers:
+                    name, func = pending.pop(0)
+                    started = time.monotonic()
+                    running[name] = started
+                    t = threading.Thread(target=bootstrap, args=(name, func, started), name=f"{self._name}-{name}", daemon=True)
+                    t.start()
+
+                now = time.monotonic()
+                wait_for = None
+                for name, started in list(running.items()):
+                    if name in finished:
+                        del running[name]
+                        continue
+                    budget = deadlines.get(name, self._deadline)
+                    left = started + budget - now
+                    if left <= 0:
+                        self._log.warning(f"{name} hat sein Zeitbudget von {budget}s überschritten. Warte nicht mehr.")
+                        abandoned.add(name)
+                        report.overdue.append(name)
+                        del running[name]
+                        continue
+                    wait_for = left if wait_for is None else min(wait_for, left)
+
+                if pending and len(running) < self._max_workers:
+                    continue
+                if running:
+                    cond.wait(wait_for)
+        return report
@@ -60,7 +60,7 @@ class BinarySensor:
             unique_id=uid,
             icon=self._icon
         )
-        client.publish(self._topics.config, zeroc, retain=True)
+        pm.publish_discovery(self._topics.config, zeroc)
         client.subscribe(self._topics.command)
 
     def turn(self, state=None) -> mclient.MQTTMessageInfo:
@@ -72,7 +72,7 @@ class BinarySensor:
             self._log.error("Cant send state update without MQTT Connection!")
             raise ValueError("Cant send state update without MQTT Connection!")
         self._state = json.dumps(state) if isinstance(state, dict) else state
-        return client.publish(self._topics.state, payload=self._state.encode('utf-8'))
+        return pm.publish(self._topics.state, payload=self._state.encode('utf-8'))
 
     def turnOn(self, json=None):
         if json is not None and self._jsattrib:
@@ -112,7 +112,7 @@ class BinarySensor:
         if client is None:
             self._log.error("Cant register without MQTT Connection!")
             raise ValueError("Cant register without MQTT Connection!")
-        return client.publish(self._topics.state, payload=self._state)
+        return pm.publish(self._topics.state, payload=self._state)
 
     def reset(self):
         pass
\ No newline at end of file
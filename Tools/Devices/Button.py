@@ -33,7 +33,7 @@ class Button:
     
     def __del__(self):
         if self._pm is not None and self._pm._client is not None:
-            self._pm._client.message_callback_remove(self._topics.command)
+            self._pm.message_callback_remove(self._topics.command)
 
     def _callback(self, message):
         raise NotImplementedError
@@ -55,9 +55,9 @@ class Button:
             unique_id=uid,
             icon=self._icon
         )
-        self._pm._client.publish(self._topics.config, zeroc, retain=True)
+        self._pm.publish_discovery(self._topics.config, zeroc)
         self._pm._client.subscribe(self._topics.command)
-        self._pm._client.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message))
+        self._pm.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message))
         self._pm.addOfflineHandler(self.offline)
 
 
@@ -65,7 +65,7 @@ class Button:
         self.is_online = False
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
-                return self._pm._client.publish(self._topics.ava_topic, payload="offline", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="offline", retain=True)
         except:
             self._log.exception("offline(): ")
             return None
@@ -73,7 +73,7 @@ class Button:
         self.is_online = True
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
-                return self._pm._client.publish(self._topics.ava_topic, payload="online", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="online", retain=True)
         except:
             self._log.exception("online(): ")
             return None
\ No newline at end of file
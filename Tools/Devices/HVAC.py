@@ -133,14 +133,14 @@ class HvacDevice:
         cmd = self._topics.command + "/pwr"
         bcp["power_command_topic"] = cmd
         self._pm._client.subscribe(cmd)
-        self._pm._client.message_callback_add(cmd, 
+        self._pm.message_callback_add(cmd, 
             lambda client,userdata,message: self._callbacks.call_set_power(on=message.decode('utf-8') == "ON") )
         self._mqtt_callbacks.append(cmd)
 
     def __registerCurrentTemperature(self, bcp: dict):
         state = self._topics.state + "/temp_now"
         bcp["current_temperature_topic"] = state
-        self.curTemp = lambda t: self._pm._client.publish(state, t)
+        self.curTemp = lambda t: self._pm.publish(state, t)
     
     def __registerTargetTemperature(self, bcp: dict):
         state = self._topics.state + "/target"
@@ -4,6 +4,7 @@ import Tools.Autodiscovery as autodisc
 import logging
 import json
 from  Tools.PluginManager import PluginManager
+from Tools.PublishPipeline import Priority
 from Tools.ResettableTimer import ResettableTimer
 import enum
 from typing import Any
@@ -110,9 +111,9 @@ class Light:
         if self._topics.config not in lights_list:
             lights_list.append(self._topics.config)
 
-        self._pm._client.publish(self._topics.config, payload=payload, retain=True)
+        self._pm.publish_discovery(self._topics.config, payload)
         self._pm._client.subscribe(self._topics.command)
-        self._pm._client.message_callback_add(self._topics.command, self.__call_bootstrap__)
+        self._pm.message_callback_add(self._topics.command, self.__call_bootstrap__)
 
         #Frage Callback nach aktuellen status
         if self._callback is not None:
@@ -131,7 +132,7 @@ class Light:
         if not was_online:
             self.online()
         if self._state != self._last_state and self.is_online:
-            self._pm._client.publish( self._topics.state, payload=json.dumps(self._state) )
+            self._pm.publish( self._topics.state, payload=json.dumps(self._state), priority=Priority.STATE )
             self._last_state = self._state.copy()
             self._sendDelay.cancel()
         if not self.is_online:
@@ -190,7 +191,7 @@ class Light:
         self.is_online = False
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
-                return self._pm._client.publish(self._topics.ava_topic, payload="offline", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="offline", retain=True)
         except:
             self._log.exception("offline(): ")
             return None
@@ -198,7 +199,7 @@ class Light:
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
                 self.is_online = True
-                return self._pm._client.publish(self._topics.ava_topic, payload="online", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="online", retain=True)
         except:
             self._log.exception("online(): ")
             return None
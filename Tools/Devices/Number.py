@@ -4,6 +4,7 @@ import Tools.Autodiscovery as autodisc
 import logging
 import json
 from  Tools.PluginManager import PluginManager
+from Tools.PublishPipeline import Priority
 import enum
 
 class Number:
@@ -37,7 +38,7 @@ class Number:
 
     def __del__(self):
         if self._pm is not None and self._pm._client is not None:
-            self._pm._client.message_callback_remove(self._topics.command)
+            self._pm.message_callback_remove(self._topics.command)
 
     def _callback(self, message, state_requested=False):
         raise NotImplementedError
@@ -68,9 +69,9 @@ class Number:
                 "max": self.max
             }
         )
-        self._pm._client.publish(self._topics.config, zeroc, retain=True)
+        self._pm.publish_discovery(self._topics.config, zeroc)
         self._pm._client.subscribe(self._topics.command)
-        self._pm._client.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message, state_requested=False))
+        self._pm.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message, state_requested=False))
 
         #Frage Callback nach aktuellen status
         self._callback(state_requested=True, message=None)
@@ -91,7 +92,7 @@ class Number:
         self._log.debug(f"number \n{self._topics.state =} \n{payload =}")
         self._last_val = state
         try:
-            return self._pm._client.publish(self._topics.state, payload=payload,qos=qos)
+            return self._pm.publish(self._topics.state, payload=payload,qos=qos, priority=Priority.STATE)
         except:
             self._log.exception(f"Error while sending {payload = }!")
 
@@ -102,7 +103,7 @@ class Number:
         self.is_online = False
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
-                return self._pm._client.publish(self._topics.ava_topic, payload="offline", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="offline", retain=True)
         except:
             self._log.exception("offline(): ")
             return None
@@ -110,7 +111,7 @@ class Number:
         try:
             if self._pm._client is not None and self._topics.ava_topic is not None:
                 self.is_online = True
-                return self._pm._client.publish(self._topics.ava_topic, payload="online", retain=True)
+                return self._pm.publish(self._topics.ava_topic, payload="online", retain=True)
         except:
             self._log.exception("online(): ")
             return None
\ No newline at end of file
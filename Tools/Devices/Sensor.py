@@ -13,8 +13,13 @@ import json
 import weakref
 
 from Tools.Config import DictBrowser
+from Tools import Metrics
+
+_STATE_RESULTS = Metrics.counter("sensor_state_total", "Aufrufe von Sensor.state nach Ergebnis", ["result"])
+_STATE_SENT = _STATE_RESULTS.labels("sent")
+_STATE_UNCHANGED = _STATE_RESULTS.labels("unchanged")
+_STATE_FILTERED = _STATE_RESULTS.labels("filtered")
 
-from time import sleep
 
 class Sensor:
     _mainState = None
@@ -75,7 +80,7 @@ class Sensor:
             unique_id=uid,
             icon=self._icon
         )
-        pm._client.publish(self._topics.config, zeroc, retain=True)
+        pm.publish_discovery(self._topics.config, zeroc)
         self._log.debug("Publish configuration: {}".format(zeroc))
         pm._client.subscribe(self._topics.command)
         if self._has_offline:
@@ -106,8 +111,10 @@ class Sensor:
                 new_state = self._callFilters(new_state)
                 browse[keypath] = new_state 
             except SilentDontSend:
+                _STATE_FILTERED.inc()
                 return None
             except DontSend:
+                _STATE_FILTERED.inc()
                 self._log.exception("Filtering failed!")
                 return None
         if isinstance(state, dict):
@@ -116,8 +123,10 @@ class Sensor:
             try:
                 state = self._callFilters(state)
             except SilentDontSend:
+                _STATE_FILTERED.inc()
                 return None
             except DontSend:
+                _STATE_FILTERED.inc()
                 self._log.exception("Filtering failed!")
                 return None
         if state is None:
@@ -128,13 +137,14 @@ class Sensor:
             self._log.debug("new payload == old payload ignoring...")
             self._ignored_counter = (self._ignored_counter + 1) if self._ignored_counter > -1 else self._ignored_counter
             if self._ignored_counter < 20:
+                _STATE_UNCHANGED.inc()
                 return None
             self._ignored_counter = 0
         self._playload = payload
         if self._is_offline:
             self._log.debug("Was offline, become online")
+            # Die PublishPipeline sendet AVAILABILITY vor dem Status, kein Warten nötig
             self.online()
-            sleep(1)
         self._log.debug(f"Sending on {self._topics.state} payload {payload}")
 
         pm = self._pm()
@@ -146,7 +156,8 @@ class Sensor:
             return
         
         try:
-            return pm._client.publish(self._topics.state, payload=payload)
+            _STATE_SENT.inc()
+            return pm.publish(self._topics.state, payload=payload)
         except:
             self._log.exception(f"Konnte {payload = } nicht versenden!")
 
@@ -158,7 +169,9 @@ class Sensor:
         if pm._client is None:
             self._log.error("Tried to register() while MQTT is disconnected!")
             return
-        return pm._client.publish(self._topics.state, payload=self._playload)
+        if self._is_offline and self._playload is not None:
+            self.online()
+        return pm.publish(self._topics.state, payload=self._playload)
     
     def offline(self):
         self._is_offline = True
@@ -173,7 +186,7 @@ class Sensor:
         
         try:
             if self._topics.ava_topic is not None:
-                return pm._client.publish(self._topics.ava_topic, payload="offline", retain=True)
+                return pm.publish(self._topics.ava_topic, payload="offline", retain=True)
         except Exception as e:
             self._log.exception("Markieren des Sensors als offline fehlgeschlagen!")
         return None
@@ -189,7 +202,7 @@ class Sensor:
         self._is_offline = False
         try:
             if self._topics.ava_topic is not None:
-                return pm._client.publish(self._topics.ava_topic, payload="online", retain=True)
+                return pm.publish(self._topics.ava_topic, payload="online", retain=True)
         except Exception as e:
             self._log.exception("Markieren des Sensors als online fehlgeschlagen!")
         return None
@@ -4,6 +4,7 @@ import Tools.Autodiscovery as autodisc
 import logging
 import json
 from  Tools.PluginManager import PluginManager
+from Tools.PublishPipeline import Priority
 import enum
 import weakref
 
@@ -36,7 +37,7 @@ class Switch:
     def __del__(self):
         pm = self._pm()
         if pm is not None and pm._client is not None:
-            pm._client.message_callback_remove(self._topics.command)
+            pm.message_callback_remove(self._topics.command)
 
     def _callback(self, message, state_requested=False):
         raise NotImplementedError
@@ -66,9 +67,9 @@ class Switch:
             unique_id=uid,
             icon=self._icon
         )
-        pm._client.publish(self._topics.config, zeroc, retain=True)
+        pm.publish_discovery(self._topics.config, zeroc)
         pm._client.subscribe(self._topics.command)
-        pm._client.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message, state_requested=False))
+        pm.message_callback_add(self._topics.command, lambda client,userdata,message: self._callback(message=message, state_requested=False))
 
         #Frage Callback nach aktuellen status
         self._callback(state_requested=True, message=None)
@@ -104,7 +105,7 @@ class Switch:
             self._log.error("Called register() when no MQTT connection is done!")
             return
         self._log.debug(f"Switch \n{self._topics.state =} \n{payload =}")
-        return pm._client.publish(self._topics.state, payload=payload,qos=qos)
+        return pm.publish(self._topics.state, payload=payload,qos=qos, priority=Priority.STATE)
 
     def turnOn(self, json=None, qos=0):
         if json is not None and not self._jsattrib:
@@ -138,7 +139,7 @@ class Switch:
             return
         try:
             if pm._client is not None and self._topics.ava_topic is not None:
-                return pm._client.publish(self._topics.ava_topic, payload="offline", retain=True)
+                return pm.publish(self._topics.ava_topic, payload="offline", retain=True)
         except:
             self._log.exception("offline(): ")
             return None
@@ -153,7 +154,7 @@ class Switch:
         self.is_online = True
         try:
             if pm._client is not None and self._topics.ava_topic is not None:
-                return pm._client.publish(self._topics.ava_topic, payload="online", retain=True)
+                return pm.publish(self._topics.ava_topic, payload="online", retain=True)
         except:
             self._log.exception("online(): ")
             return None
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+import re
+from typing import TYPE_CHECKING
+
+import schedule
+
+import Tools.Autodiscovery as autodisc
+from Tools import Metrics
+from Tools.PublishPipeline import Priority
+
+if TYPE_CHECKING:
+    from Tools.PluginManager import PluginManager
+
+
+class DiagnosticSensors:
+    """
+    Veröffentlicht ausgewählte Metriken als Home Assistant Sensoren mit
+    entity_category diagnostic am Gerät des Nodes.
+    Counter werden als Summe über alle Labels gesendet, Histogramme als Mittelwert.
+    """
+
+    def __init__(self, pm: "PluginManager", logger: logging.Logger, names: list[str], interval: int = 60,
+                 registry: Metrics.Registry = Metrics.REGISTRY):
+        self._pm = pm
+        self._log = logger.getChild("Diagnostics")
+        self._names = list(names)
+        self._interval = max(5, int(interval))
+        self._registry = registry
+        self._topics: dict[str, autodisc.Topics] = {}
+        self._job: schedule.Job | None = None
+
+    def register(self) -> None:
+        for name in self._names:
+            metric = self._registry.get(name)
+            if metric is None:
+                self._log.warning(f"Metrik {name} existiert nicht, Sensor wird übersprungen.")
+                continue
+            safename = re.sub(r'[\W]+', '_', name)
+            topics = self._pm.config.get_autodiscovery_topic(autodisc.Component.SENSOR, f"diag_{safename}", autodisc.SensorDeviceClasses.GENERIC_SENSOR)
+            unit = "s" if name.endswith("_seconds") else ""
+            payload = topics.get_config_payload(
+                name, unit, unique_id=f"sensor.MqttScripts{self._pm._client_name}.diag.{safename}",
+                icon="mdi:chart-line", append_data={"entity_category": "diagnostic", "state_class": "measurement"}
+            )
+            self._pm.publish_discovery(topics.config, payload)
+            self._topics[name] = topics
+        if self._job is None:
+            self._job = schedule.every(self._interval).seconds.do(self.send)
+        self.send()
+
+    def send(self) -> None:
+        for name, topics in self._topics.items():
+            metric = self._registry.get(name)
+            if metric is None:
+                continue
+            value = metric.total()
+            if math.isnan(value):
+                continue
+            self._pm.publish(topics.state, payload=f"{value:.6g}", priority=Priority.TELEMETRY)
+
+    def stop(self) -> None:
+        if self._job is not None:
+            schedule.cancel_job(self._job)
+            self._job = None
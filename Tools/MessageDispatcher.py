@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import paho.mqtt.client as mclient
+
+from Tools import Metrics
+
+MessageCallback = Callable[[mclient.Client, Any, mclient.MQTTMessage], None]
+
+_WAIT = Metrics.histogram("mqtt_handler_wait_seconds", "Zeit zwischen Empfang und Start des Handlers")
+_RUN = Metrics.histogram("mqtt_handler_seconds", "Laufzeit der MQTT Handler")
+_ERRORS = Metrics.counter("mqtt_handler_errors_total", "Fehlgeschlagene MQTT Handler", ["handler"])
+
+
+@dataclasses.dataclass(slots=True)
+class HandlerStats:
+    calls: int = 0
+    errors: int = 0
+    last_wait: float = 0.0
+    max_wait: float = 0.0
+    last_run: float = 0.0
+    max_run: float = 0.0
+    total_run: float = 0.0
+
+
+class MessageDispatcher:
+    """
+    Führt MQTT Callbacks auf einem Thread Pool statt im paho Netzwerk Thread aus.
+    Nachrichten für das gleiche Topic werden in Reihenfolge nacheinander abgearbeitet,
+    verschiedene Topics laufen parallel.
+    """
+    # Nach so vielen Nachrichten eines Topics wird der Worker für andere Topics freigegeben
+    BATCH = 8
+
+    def __init__(self, logger: logging.Logger, workers: int = 4):
+        self._log = logger.getChild("Dispatcher")
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="mqtt-handler")
+        self._lock = threading.Lock()
+        self._queues: dict[str, collections.deque] = {}
+        self._active: set[str] = set()
+        self._stats: dict[str, HandlerStats] = {}
+        self._closed = False
+
+    @staticmethod
+    def _name(callback: Callable) -> str:
+        while isinstance(callback, functools.partial):
+            callback = callback.func
+        return getattr(callback, "__qualname__", None) or repr(callback)
+
+    def wrap(self, callback: MessageCallback) -> MessageCallback:
+        """Callback für message_callback_add, der im Pool statt im Netzwerk Thread läuft."""
+        name = self._name(callback)
+
+        def dispatch(client: mclient.Client, userdata: Any, message: mclient.MQTTMessage) -> None:
+            self.submit(message.topic, name, lambda: callback(client, userdata, message))
+        dispatch.__qualname__ = f"dispatch[{name}]"
+        return dispatch
+
+    def submit(self, key: str, name: str, func: Callable[[], Any]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            queue = self._queues.setdefault(key, collections.deque())
+            queue.append((time.monotonic(), name, func))
+            if key in self._active:
+                return
+            self._active.add(key)
+            # Unter dem Lock, damit shutdown() den Pool nicht dazwischen schließt
+            self._pool.submit(self._drain, key)
+
+    def _drain(self, key: str) -> None:
+        for _ in range(self.BATCH):
+            with self._lock:
+                queue = self._queues.get(key, None)
+                if queue is None or len(queue) == 0:
+                    self._active.discard(key)
+                    self._queues.pop(key, None)
+                    return
+                queued, name, func = queue.popleft()
+            start = time.monotonic()
+            failed = False
+            try:
+                func()
+            except Exception:
+                failed = True
+                self._log.exception(f"Handler {name} für {key} ist fehlgeschlagen!")
+            self._record(name, start - queued, time.monotonic() - start, failed)
+        with self._lock:
+            if self._closed:
+                self._active.discard(key)
+                return
+            self._pool.submit(self._drain, key)
+
+    def _record(self, name: str, wait: float, run: float, failed: bool) -> None:
+        _WAIT.observe(wait)
+        _RUN.observe(run)
+        if failed:
+            _ERRORS.labels(name).inc()
+        with self._lock:
+            st = self._stats.setdefault(name, HandlerStats())
+            st.calls += 1
+            st.errors += 1 if failed else 0
+            st.last_wait = wait
+            st.max_wait = max(st.max_wait, wait)
+            st.last_run = run
+            st.max_run = max(st.max_run, run)
+            st.total_run += run
+
+    def stats(self) -> dict[str, dict]:
+        """Wartezeit in der Queue und Laufzeit pro Handler in Sekunden."""
+        with self._lock:
+            return {name: dataclasses.asdict(st) for name, st in self._stats.items()}
+
+    def backlog(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._queues.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
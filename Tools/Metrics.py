@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+import bisect
+import http.server
+import logging
+import math
+import threading
+from typing import Callable, Iterable
+
+# Standard Buckets für Laufzeiten in Sekunden
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Child:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+
+class CounterChild(_Child):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class GaugeChild(_Child):
+    __slots__ = ("_func",)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._func: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, func: Callable[[], float]) -> None:
+        """Wert erst beim Auslesen ermitteln, z.B. Queue Längen."""
+        self._func = func
+
+    def get(self) -> float:
+        if self._func is not None:
+            try:
+                return float(self._func())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if len(self.label_names) == 0:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError()
+
+    def labels(self, *values: str):
+        """Kind für eine Label Kombination. Im Hot Path das Ergebnis merken statt jedes Mal zu suchen."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key, None)
+        if child is not None:
+            return child
+        if len(key) != len(self.label_names):
+            raise ValueError(f"{self.name} erwartet Labels {self.label_names}")
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def _label_str(self, key: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if len(parts) > 0 else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: tuple[str, ...], child) -> list[str]:
+        return [f"{self.name}{self._label_str(key)} {_fmt(child.value)}"]
+
+    def total(self) -> float:
+        """Summe über alle Label Kombinationen."""
+        return sum(self._value(c) for c in list(self._children.values()))
+
+    def _value(self, child) -> float:
+        return child.value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+    def set_function(self, func: Callable[[], float]) -> None:
+        self._default.set_function(func)
+
+    def _render_child(self, key: tuple[str, ...], child: GaugeChild) -> list[str]:
+        return [f"{self.name}{self._label_str(key)} {_fmt(child.get())}"]
+
+    def _value(self, child: GaugeChild) -> float:
+        return child.get()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = (), buckets: Iterable[float] = TIME_BUCKETS):
+        self._bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, doc, labels)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self._bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, key: tuple[str, ...], child: HistogramChild) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (math.inf,), child.counts):
+            cumulative += count
+            le = 'le="' + _fmt(bound) + '"'
+            lines.append(f"{self.name}_bucket{self._label_str(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_fmt(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {child.count}")
+        return lines
+
+    def _value(self, child: HistogramChild) -> float:
+        # Für eine einzelne Zahl (HA Sensor) der Mittelwert
+        return child.sum / child.count if child.count > 0 else 0.0
+
+    def total(self) -> float:
+        children = list(self._children.values())
+        count = sum(c.count for c in children)
+        return sum(c.sum for c in children) / count if count > 0 else 0.0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+
+    def _get(self, cls: type, name: str, doc: str, labels: Iterable[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name, None)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, doc, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metrik {name} ist bereits als {metric.kind} registriert.")
+            return metric
+
+    def counter(self, name: str, doc: str, labels: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, doc, labels)
+
+    def gauge(self, name: str, doc: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._get(Gauge, name, doc, labels)
+
+    def histogram(self, name: str, doc: str, labels: Iterable[str] = (), buckets: Iterable[float] = TIME_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, doc, labels, buckets=buckets)
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name, None)
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self._metrics.keys())
+
+    def render(self) -> str:
+        """Prometheus Text Format 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", logger: logging.Logger | None = None,
+                      registry: Registry = REGISTRY) -> http.server.ThreadingHTTPServer:
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    server = http.server.ThreadingHTTPServer((addr, int(port)), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    if logger is not None:
+        logger.info(f"Metriken unter http://{addr}:{server.server_address[1]}/metrics")
+    return server
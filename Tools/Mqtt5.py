@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+import logging
+import threading
+from typing import Any
+
+import paho.mqtt.client as mclient
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from Tools.PublishPipeline import Priority
+
+
+def connect_properties(session_expiry: int) -> Properties | None:
+    """CONNECT Properties, mit SessionExpiryInterval kann der Broker die Session nach einer Trennung behalten."""
+    if session_expiry <= 0:
+        return None
+    props = Properties(PacketTypes.CONNECT)
+    props.SessionExpiryInterval = int(session_expiry)
+    return props
+
+
+@dataclasses.dataclass(slots=True)
+class AliasStats:
+    alias_max: int = 0
+    aliases: int = 0
+    aliased: int = 0
+    bytes_saved: int = 0
+    expiring: int = 0
+
+
+class V5Publisher:
+    """
+    Sender für die PublishPipeline bei MQTT v5.
+    Topics die mindestens alias_after mal gesendet wurden bekommen einen Topic Alias,
+    danach wird nur noch die Nummer übertragen. Aliase gelten pro Verbindung und werden
+    bei jedem CONNACK zurückgesetzt. Nur QoS 0, weil paho QoS>0 Nachrichten nach einem
+    Reconnect mit dem alten (dann ungültigen) Alias wiederholen würde.
+    Pro Priority kann eine MessageExpiryInterval gesetzt werden.
+    """
+
+    def __init__(self, logger: logging.Logger, expiry: dict[Priority, int] | None = None, alias_after: int = 2):
+        self._log = logger.getChild("MQTTv5")
+        self._expiry = {p: int(s) for p, s in (expiry or {}).items() if int(s) > 0}
+        self._alias_after = max(1, int(alias_after))
+        self._lock = threading.Lock()
+        self._alias_max = 0
+        self._aliases: dict[str, int] = {}
+        self._announced: set[str] = set()
+        self._seen: dict[str, int] = {}
+        self._stats = AliasStats()
+        self._sock: Any = None
+
+    def connected(self, client: mclient.Client, properties: Any) -> None:
+        """Bei jedem CONNACK aufrufen."""
+        alias_max = getattr(properties, "TopicAliasMaximum", 0) if properties is not None else 0
+        with self._lock:
+            # Bis zum on_connect kann paho schon verbunden melden, Aliase gelten nur für diesen Socket
+            self._sock = client.socket()
+            self._alias_max = int(alias_max or 0)
+            self._aliases.clear()
+            self._announced.clear()
+            self._stats.alias_max = self._alias_max
+            self._stats.aliases = 0
+        self._log.debug(f"Broker erlaubt {self._alias_max} Topic Aliase.")
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dataclasses.asdict(self._stats)
+
+    def _alias_for(self, topic: str) -> tuple[int | None, bool]:
+        """@return Alias und ob das Topic schon mit diesem Alias übertragen wurde."""
+        alias = self._aliases.get(topic, None)
+        if alias is not None:
+            return alias, topic in self._announced
+        seen = self._seen.get(topic, 0) + 1
+        self._seen[topic] = seen
+        if seen < self._alias_after or len(self._aliases) >= self._alias_max:
+            return None, False
+        alias = len(self._aliases) + 1
+        self._aliases[topic] = alias
+        self._stats.aliases = len(self._aliases)
+        return alias, False
+
+    def publish(self, client: mclient.Client, topic: str, payload: Any, qos: int, retain: bool, priority: Priority) -> mclient.MQTTMessageInfo:
+        props = None
+        send_topic = topic
+        expiry = self._expiry.get(priority, 0)
+        with self._lock:
+            use_alias = qos == 0 and self._sock is not None and client.socket() is self._sock
+            alias, announced = self._alias_for(topic) if use_alias else (None, False)
+            if expiry > 0 or alias is not None:
+                props = Properties(PacketTypes.PUBLISH)
+            if expiry > 0:
+                props.MessageExpiryInterval = expiry
+                self._stats.expiring += 1
+            if alias is not None:
+                props.TopicAlias = alias
+                if announced:
+                    send_topic = ""
+                    self._stats.aliased += 1
+                    self._stats.bytes_saved += len(topic.encode("utf-8"))
+                else:
+                    self._announced.add(topic)
+            # Unter dem Lock, damit die erste Nachricht mit Topic vor den Alias Nachrichten gesendet wird
+            return client.publish(send_topic, payload=payload, qos=qos, retain=retain, properties=props)
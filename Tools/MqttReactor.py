@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import dataclasses
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Any
+
+import paho.mqtt.client as mclient
+
+from Tools.AsyncLoop import AsyncLoop
+
+
+@dataclasses.dataclass(slots=True)
+class ReactorStats:
+    connects: int = 0
+    connect_failures: int = 0
+    reads: int = 0
+    writes: int = 0
+    # Zeit zwischen "paho hat etwas zu senden" und "alles ist im Socket"
+    last_write_latency: float = 0.0
+    max_write_latency: float = 0.0
+
+
+class MqttReactor:
+    """
+    Betreibt den paho Socket in der gemeinsamen asyncio Schleife statt in pahos eigenem
+    loop_start() Thread. Lesen und Schreiben passiert über add_reader/add_writer,
+    loop_misc() (Keepalive) läuft über call_later.
+    Publishes aus anderen Threads melden über on_socket_register_write, dass etwas zu
+    senden ist; geschrieben wird dann im Schleifen Thread.
+    Bei unerwartetem Verbindungsverlust wird mit Backoff und Jitter neu verbunden,
+    bis stop() aufgerufen wurde.
+    """
+
+    def __init__(self, logger: logging.Logger, aio: AsyncLoop, reconnect_min: float = 1.0, reconnect_max: float = 120.0,
+                 misc_interval: float = 1.0):
+        self._log = logger.getChild("Reactor")
+        self._aio = aio
+        self._reconnect_min = max(0.1, float(reconnect_min))
+        self._reconnect_max = max(self._reconnect_min, float(reconnect_max))
+        self._misc_interval = max(0.1, float(misc_interval))
+        self._client: mclient.Client | None = None
+        self._sock: socket.socket | None = None
+        self._misc_handle: asyncio.TimerHandle | None = None
+        self._write_since: float | None = None
+        self._stopping = False
+        self._done = threading.Event()
+        self._exc: BaseException | None = None
+        self._stats = ReactorStats()
+
+    def stats(self) -> dict[str, Any]:
+        return dataclasses.asdict(self._stats)
+
+    def run(self, client: mclient.Client) -> BaseException | None:
+        """Verbindet client und blockiert bis stop() aufgerufen wurde oder ein nicht behebbarer Fehler auftritt."""
+        self._client = client
+        self._stopping = False
+        self._exc = None
+        self._done.clear()
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        self._aio.submit(self._connect(0))
+        self._done.wait()
+        return self._exc
+
+    def stop(self, timeout: float = 5) -> None:
+        """Nicht mehr neu verbinden. Vor client.disconnect() aufrufen, damit das DISCONNECT noch gesendet wird."""
+        self._stopping = True
+        self._aio.loop.call_soon_threadsafe(self._stop_in_loop, timeout)
+
+    def _stop_in_loop(self, timeout: float) -> None:
+        if self._sock is None:
+            self._done.set()
+            return
+        # Falls der Broker die Verbindung nicht schließt
+        self._aio.loop.call_later(timeout, self._force_close, self._sock)
+
+    async def _connect(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self._stopping:
+                    break
+            try:
+                await loop.run_in_executor(None, self._client.reconnect)
+                self._stats.connects += 1
+                self._schedule_misc()
+                if self._stopping:
+                    # stop() kam während des Verbindens
+                    self._client.disconnect()
+                return
+            except OSError as e:
+                self._stats.connect_failures += 1
+                delay = min(self._reconnect_max, max(self._reconnect_min, delay * 2))
+                delay = random.uniform(delay / 2, delay)
+                self._log.warning(f"Verbindung fehlgeschlagen ({e}), neuer Versuch in {delay:.1f}s")
+            except Exception as e:
+                self._log.exception("Verbindung nicht möglich!")
+                self._exc = e
+                break
+        self._done.set()
+
+    def _schedule_misc(self) -> None:
+        self._misc_handle = self._aio.loop.call_later(self._misc_interval, self._misc)
+
+    def _misc(self) -> None:
+        self._misc_handle = None
+        if self._client is None or self._sock is None:
+            return
+        self._client.loop_misc()
+        if self._sock is not None:
+            self._schedule_misc()
+
+    def _read(self) -> None:
+        self._stats.reads += 1
+        self._client.loop_read()
+        # TLS kann bereits entschlüsselte Daten puffern, die select() nicht meldet
+        while self._sock is not None and getattr(self._sock, "pending", lambda: 0)() > 0:
+            self._client.loop_read()
+
+    def _write(self) -> None:
+        self._stats.writes += 1
+        self._client.loop_write()
+
+    def _on_socket_open(self, client: mclient.Client, userdata: Any, sock: socket.socket) -> None:
+        self._aio.loop.call_soon_threadsafe(self._opened, sock)
+
+    def _opened(self, sock: socket.socket) -> None:
+        if sock.fileno() == -1:
+            return
+        self._sock = sock
+        self._aio.loop.add_reader(sock, self._read)
+
+    def _on_socket_close(self, client: mclient.Client, userdata: Any, sock: socket.socket) -> None:
+        self._aio.loop.call_soon_threadsafe(self._closed, sock)
+
+    def _closed(self, sock: socket.socket) -> None:
+        loop = self._aio.loop
+        # Der Socket ist evtl. schon geschlossen, dann kennt der Selector nur noch das Objekt
+        for remove in (loop.remove_reader, loop.remove_writer):
+            try:
+                remove(sock)
+            except (ValueError, OSError):
+                pass
+        if sock is not self._sock and self._sock is not None:
+            return
+        self._sock = None
+        self._write_since = None
+        if self._misc_handle is not None:
+            self._misc_handle.cancel()
+            self._misc_handle = None
+        if self._stopping:
+            self._done.set()
+            return
+        self._log.info("Verbindung verloren, verbinde neu...")
+        loop.create_task(self._connect(self._reconnect_min))
+
+    def _force_close(self, sock: socket.socket) -> None:
+        if sock is not self._sock:
+            return
+        self._log.warning("Broker hat die Verbindung nicht geschlossen, schließe selbst.")
+        try:
+            sock.close()
+        except OSError:
+            pass
+        self._closed(sock)
+
+    def _on_socket_register_write(self, client: mclient.Client, userdata: Any, sock: socket.socket) -> None:
+        self._aio.loop.call_soon_threadsafe(self._want_write, sock)
+
+    def _want_write(self, sock: socket.socket) -> None:
+        if sock.fileno() == -1 or sock is not self._sock:
+            return
+        if self._write_since is None:
+            self._write_since = time.monotonic()
+        self._aio.loop.add_writer(sock, self._write)
+
+    def _on_socket_unregister_write(self, client: mclient.Client, userdata: Any, sock: socket.socket) -> None:
+        self._aio.loop.call_soon_threadsafe(self._written, sock)
+
+    def _written(self, sock: socket.socket) -> None:
+        try:
+            self._aio.loop.remove_writer(sock)
+        except (ValueError, OSError):
+            pass
+        if self._write_since is not None:
+            latency = time.monotonic() - self._write_since
+            self._write_since = None
+            self._stats.last_write_latency = latency
+            self._stats.max_write_latency = max(self._stats.max_write_latency, latency)
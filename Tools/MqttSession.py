@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import random
+import ssl
+import threading
+from pathlib import Path
+from typing import Any
+
+import paho.mqtt.client as mclient
+
+
+class Backoff:
+    """Exponentielles Warten mit Jitter, damit nach einem Broker Neustart nicht alle Nodes gleichzeitig kommen."""
+
+    def __init__(self, minimum: float = 1.0, maximum: float = 120.0):
+        self._min = max(0.1, float(minimum))
+        self._max = max(self._min, float(maximum))
+        self._attempt = 0
+
+    def reset(self) -> None:
+        self._attempt = 0
+
+    def next(self) -> float:
+        base = min(self._max, self._min * (2 ** self._attempt))
+        self._attempt = min(self._attempt + 1, 32)
+        return random.uniform(base / 2, base)
+
+
+def session_present(flags: Any) -> bool:
+    """flags aus on_connect, je nach paho Callback Version dict oder ConnectFlags."""
+    if isinstance(flags, dict):
+        return bool(flags.get("session present", 0))
+    return bool(getattr(flags, "session_present", False))
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    paho baut bei jedem reconnect() einen neuen TLS Socket aus dem selben Kontext,
+    gibt aber die alte Session nicht mit. Dieser Kontext merkt sich die Session der
+    letzten Verbindung und bietet sie beim nächsten Handshake an (spart Zertifikatsprüfung
+    und einen Round Trip).
+    """
+    last_session: ssl.SSLSession | None = None
+    resumed: int = 0
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        session = self.last_session
+        if session is not None and "session" not in kwargs and kwargs.get("server_side", False) is False:
+            try:
+                return super().wrap_socket(sock, *args, session=session, **kwargs)
+            except ValueError:
+                self.last_session = None
+        return super().wrap_socket(sock, *args, **kwargs)
+
+    def remember(self, sock: Any) -> None:
+        """Nach dem CONNACK aufrufen, bei TLS 1.3 kommt das Session Ticket erst nach dem Handshake."""
+        if not isinstance(sock, ssl.SSLSocket):
+            return
+        if sock.session_reused:
+            self.resumed += 1
+        if sock.session is not None:
+            self.last_session = sock.session
+
+
+def tls_context(ca: str, cert: str, key: str) -> ResumingSSLContext:
+    # Entspricht Client.tls_set(ca_certs, certfile, keyfile, tls_version=PROTOCOL_TLS)
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(ca)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+class SubscriptionStore:
+    """
+    Merkt sich alle Abonnements in einer Datei. Hat der Broker die Session noch
+    (session present), werden erneute subscribe() Aufrufe der Plugins nicht gesendet.
+    Ohne Session werden alle gemerkten Topics in einem einzigen SUBSCRIBE nachgeholt.
+    """
+
+    def __init__(self, path: Path, logger: logging.Logger):
+        self._path = path
+        self._log = logger.getChild("Subscriptions")
+        self._lock = threading.Lock()
+        self._topics: dict[str, int] = {}
+        self._active = False
+        self._dirty = False
+        self.skipped = 0
+        try:
+            self._topics = {str(t): int(q) for t, q in json.loads(path.read_text(encoding="utf-8")).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError):
+            self._log.warning(f"{path} konnte nicht gelesen werden, starte ohne Abonnements.")
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def connected(self, client: "SessionClient", present: bool) -> None:
+        """Aus on_connect, bevor die Plugins regestriert werden."""
+        with self._lock:
+            self._active = False
+            topics = list(self._topics.items())
+        if not present and len(topics) > 0:
+            self._log.info(f"Broker hat keine Session, abonniere {len(topics)} Topics neu.")
+            mclient.Client.subscribe(client, topics)
+        elif present:
+            self._log.info(f"Session übernommen, {len(topics)} Abonnements bestehen noch.")
+        with self._lock:
+            self._active = True
+
+    def disconnected(self) -> None:
+        with self._lock:
+            self._active = False
+
+    def needs_subscribe(self, topic: str, qos: int) -> bool:
+        with self._lock:
+            if self._active and self._topics.get(topic, None) == qos:
+                self.skipped += 1
+                return False
+            if self._topics.get(topic, None) != qos:
+                self._topics[topic] = qos
+                self._dirty = True
+            return True
+
+    def forget(self, topic: str) -> None:
+        with self._lock:
+            if self._topics.pop(topic, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._topics, indent=1)
+            self._dirty = False
+        try:
+            self._path.write_text(data, encoding="utf-8")
+        except OSError:
+            self._log.exception("Abonnements konnten nicht gespeichert werden!")
+
+
+class SessionClient(mclient.Client):
+    """paho Client der subscribe() über einen SubscriptionStore filtert."""
+
+    subscriptions: SubscriptionStore | None = None
+
+    def subscribe(self, topic: Any, qos: int = 0, options: Any = None, properties: Any = None) -> tuple[Any, int | None]:
+        store = self.subscriptions
+        if store is not None and isinstance(topic, str) and options is None and properties is None:
+            if not store.needs_subscribe(topic, qos):
+                return mclient.MQTT_ERR_SUCCESS, None
+        return super().subscribe(topic, qos, options, properties)
+
+    def unsubscribe(self, topic: Any, properties: Any = None) -> tuple[Any, int | None]:
+        store = self.subscriptions
+        if store is not None:
+            for t in ([topic] if isinstance(topic, str) else topic):
+                store.forget(t)
+        return super().unsubscribe(topic, properties)
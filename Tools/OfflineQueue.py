@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+@dataclasses.dataclass(slots=True)
+class StoredMessage:
+    id: int
+    ts: float
+    topic: str
+    payload: bytes | None
+    qos: int
+    retain: bool
+
+
+@dataclasses.dataclass(slots=True)
+class OfflineQueueStats:
+    stored: int = 0
+    replayed: int = 0
+    evicted: int = 0
+
+
+def _to_blob(payload: Any) -> bytes | None:
+    if payload is None:
+        return None
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return str(payload).encode("utf-8")
+
+
+class OfflineQueue:
+    """
+    Nachrichten die während einer Verbindungstrennung gesendet werden sollten, landen
+    in einer SQLite Datenbank (WAL) und werden nach dem Verbinden der Reihe nach
+    nachgesendet. Wird max_bytes überschritten, fliegen die ältesten Nachrichten raus.
+    """
+
+    def __init__(self, path: Path, logger: logging.Logger, max_bytes: int = 50 * 1024 * 1024):
+        self._log = logger.getChild("OfflineQueue")
+        self._max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, topic TEXT NOT NULL, "
+            "payload BLOB, qos INTEGER NOT NULL, retain INTEGER NOT NULL, size INTEGER NOT NULL)"
+        )
+        count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM queue").fetchone()
+        self._count = count
+        self._bytes = size
+        self._stats = OfflineQueueStats()
+        if count > 0:
+            self._log.info(f"{count} Nachrichten ({size} Bytes) vom letzten Lauf warten auf das Nachsenden.")
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            st = dataclasses.asdict(self._stats)
+            st["depth"] = self._count
+            st["bytes"] = self._bytes
+            return st
+
+    def append(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        blob = _to_blob(payload)
+        size = len(topic) + (len(blob) if blob is not None else 0)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO queue (ts, topic, payload, qos, retain, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), topic, blob, int(qos), 1 if retain else 0, size)
+            )
+            self._count += 1
+            self._bytes += size
+            self._stats.stored += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        if self._max_bytes <= 0 or self._bytes <= self._max_bytes:
+            return
+        # Auf 90% kürzen, damit nicht bei jeder neuen Nachricht gelöscht werden muss
+        target = self._max_bytes * 0.9
+        evicted = 0
+        while self._bytes > target and self._count > 0:
+            rows = self._db.execute("SELECT id, size FROM queue ORDER BY id LIMIT 256").fetchall()
+            last_id = None
+            for row_id, size in rows:
+                if self._bytes <= target:
+                    break
+                last_id = row_id
+                self._bytes -= size
+                self._count -= 1
+                evicted += 1
+            if last_id is None:
+                break
+            self._db.execute("DELETE FROM queue WHERE id <= ?", (last_id,))
+        self._stats.evicted += evicted
+        self._log.warning(f"Offline Queue voll, {evicted} älteste Nachrichten verworfen.")
+
+    def peek(self, limit: int = 100) -> list[StoredMessage]:
+        """Älteste Nachrichten, ohne sie zu entfernen."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, ts, topic, payload, qos, retain FROM queue ORDER BY id LIMIT ?", (int(limit),)
+            ).fetchall()
+        return [StoredMessage(r[0], r[1], r[2], r[3], r[4], bool(r[5])) for r in rows]
+
+    def ack(self, last_id: int) -> None:
+        """Alle Nachrichten bis einschließlich last_id wurden nachgesendet."""
+        with self._lock:
+            count, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM queue WHERE id <= ?", (last_id,)
+            ).fetchone()
+            self._db.execute("DELETE FROM queue WHERE id <= ?", (last_id,))
+            self._count -= count
+            self._bytes -= size
+            self._stats.replayed += count
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                self._log.exception("Checkpoint fehlgeschlagen")
+            self._db.close()
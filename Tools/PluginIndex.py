@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import ast
+import logging
+from pathlib import Path
+
+import Tools.Config as tc
+
+MANIFEST_NAME = "plugin_manifest"
+# Marker für Dateien ohne PluginLoader Klasse
+NO_PLUGIN = ""
+# Version 1 hat fehlgeschlagene Imports als NO_PLUGIN gespeichert
+VERSION = 2
+
+
+class _Unresolvable(Exception):
+    pass
+
+
+class PluginIndex:
+    """
+    Ordnet Plugindateien ihrem Konfig Schlüssel zu ohne die Module auszuführen.
+    Der Schlüssel wird aus dem AST von PluginLoader.getConfigKey() gelesen und
+    zusammen mit den mtimes aller dafür gelesenen Dateien im Manifest gespeichert.
+    """
+
+    def __init__(self, config: tc.BasicConfig, logger: logging.Logger, root: Path):
+        self._log = logger.getChild("PluginIndex")
+        self._root = root
+        self._manifest = None
+        self._files: dict = {}
+        self._dirty = False
+        try:
+            self._manifest = config.getIndependendFile(MANIFEST_NAME, no_watchdog=True, do_load=True)[0]
+            if self._manifest.get("VERSION", 1) != VERSION:
+                self._manifest.get("FILES", {}).clear()
+                self._manifest.path("VERSION").set(VERSION)
+                self._dirty = True
+            self._files = self._manifest.get("FILES", {})
+        except Exception:
+            self._log.exception("Manifest konnte nicht geladen werden. Scanne alles neu.")
+            self._files = {}
+
+    @staticmethod
+    def _mtime(path: Path) -> float | None:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _is_fresh(self, entry: dict) -> bool:
+        deps = entry.get("deps", None)
+        if not isinstance(deps, dict) or len(deps) == 0:
+            return False
+        for dep, mtime in deps.items():
+            if self._mtime(Path(dep)) != mtime:
+                return False
+        return True
+
+    def lookup(self, path: Path) -> str | None:
+        """
+        Liefert den Konfig Schlüssel der Datei, NO_PLUGIN wenn sie keinen PluginLoader enthält
+        oder None wenn der Schlüssel nur durch Importieren ermittelt werden kann.
+        """
+        path = Path(path)
+        entry = self._files.get(str(path), None)
+        if isinstance(entry, dict) and self._is_fresh(entry):
+            return entry.get("key", None)
+
+        deps: set[Path] = {path}
+        try:
+            key = self._scan(path, deps)
+        except _Unresolvable:
+            self._log.debug(f"{path}: Schlüssel nicht statisch ermittelbar.")
+            key = None
+        except (OSError, SyntaxError, ValueError, RecursionError):
+            self._log.debug(f"{path}: Statischer Scan fehlgeschlagen.", exc_info=True)
+            key = None
+        self._store(path, key, deps)
+        return key
+
+    def remember(self, path: Path, key: str | None) -> None:
+        """Nach einem Import den tatsächlichen Schlüssel für die Datei speichern."""
+        self._store(Path(path), key if key is not None else NO_PLUGIN, {Path(path)})
+
+    def _store(self, path: Path, key: str | None, deps: set[Path]) -> None:
+        entry = {
+            "key": key,
+            "deps": {str(d): self._mtime(d) for d in deps}
+        }
+        if self._files.get(str(path), None) != entry:
+            self._files[str(path)] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        if self._manifest is None or not self._dirty:
+            return
+        try:
+            self._manifest.get("FILES", {}).update(self._files)
+            self._manifest.file_is_dirty = True
+            self._manifest.save()
+            self._dirty = False
+        except Exception:
+            self._log.exception("Manifest konnte nicht gespeichert werden.")
+
+    # --- Statischer Scan ---------------------------------------------------
+
+    def _parse(self, path: Path, deps: set[Path]) -> ast.Module:
+        deps.add(path)
+        return ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+
+    def _module_path(self, current: Path, module: str | None, level: int) -> Path:
+        if level > 0:
+            base = current.parent
+            for _ in range(level - 1):
+                base = base.parent
+        else:
+            base = self._root
+        parts = module.split(".") if module else []
+        candidate = base.joinpath(*parts)
+        if candidate.with_suffix(".py").is_file():
+            return candidate.with_suffix(".py")
+        if candidate.joinpath("__init__.py").is_file():
+            return candidate.joinpath("__init__.py")
+        raise _Unresolvable()
+
+    def _scan(self, path: Path, deps: set[Path]) -> str:
+        tree = self._parse(path, deps)
+        loader = next((n for n in tree.body if isinstance(n, ast.ClassDef) and n.name == "PluginLoader"), None)
+        if loader is None:
+            return NO_PLUGIN
+        func = next((n for n in loader.body if isinstance(n, ast.FunctionDef) and n.name == "getConfigKey"), None)
+        if func is None:
+            raise _Unresolvable()
+        return self._resolve_return(func, tree, path, deps)
+
+    def _resolve_return(self, func: ast.FunctionDef, tree: ast.Module, path: Path, deps: set[Path]) -> str:
+        if len(func.body) == 0 or not isinstance(func.body[-1], ast.Return) or func.body[-1].value is None:
+            raise _Unresolvable()
+        return self._resolve(func.body[-1].value, tree, path, deps)
+
+    def _resolve(self, expr: ast.expr, tree: ast.Module, path: Path, deps: set[Path]) -> str:
+        if isinstance(expr, ast.Constant) and isinstance(expr.value, str):
+            return expr.value
+        if isinstance(expr, ast.Name):
+            return self._resolve_name(expr.id, tree, path, deps, want_function=False)
+        if isinstance(expr, ast.Call) and isinstance(expr.func, ast.Name) and not expr.args and not expr.keywords:
+            return self._resolve_name(expr.func.id, tree, path, deps, want_function=True)
+        raise _Unresolvable()
+
+    def _resolve_name(self, name: str, tree: ast.Module, path: Path, deps: set[Path], want_function: bool) -> str:
+        for node in reversed(tree.body):
+            if want_function and isinstance(node, ast.FunctionDef) and node.name == name:
+                return self._resolve_return(node, tree, path, deps)
+            if not want_function and isinstance(node, ast.Assign) and \
+                    any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+                return self._resolve(node.value, tree, path, deps)
+            if not want_function and isinstance(node, ast.AnnAssign) and \
+                    isinstance(node.target, ast.Name) and node.target.id == name and node.value is not None:
+                return self._resolve(node.value, tree, path, deps)
+            if isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if (alias.asname or alias.name) == name:
+                        other = self._module_path(path, node.module, node.level)
+                        other_tree = self._parse(other, deps)
+                        return self._resolve_name(alias.name, other_tree, other, deps, want_function)
+        raise _Unresolvable()
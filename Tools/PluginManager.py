@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import contextlib
+import inspect
 import logging
 from pathlib import Path
+import signal
 
 import threading
 import time
@@ -28,10 +32,29 @@ except ImportError as ie:
 
 import Tools.Config as tc
 from Tools import PropagetingThread
+from Tools import Scheduler
+from Tools.DeadlineRunner import DeadlineRunner, DeadlineReport
+from Tools.TimingReport import TimingReport
+from Tools.PublishPipeline import PublishPipeline, PublishHandle, Priority, ClassLimit, DropPolicy, classify
+from Tools.MessageDispatcher import MessageDispatcher
+from Tools.TopicRouter import TopicRouter
+from Tools.AsyncLoop import AsyncLoop
+from Tools.MqttReactor import MqttReactor
+from Tools.OfflineQueue import OfflineQueue
+from Tools.ResendPacer import ResendPacer
+from Tools import Mqtt5
+from Tools import MqttSession
+from Tools import Metrics
 
 import dataclasses
 from abc import ABC, abstractmethod
 
+Scheduler.install()
+
+_PUBLISHED = Metrics.counter("mqtt_publish_total", "Über PluginManager.publish gesendete Nachrichten", ["class"])
+_PUBLISHED_BY_CLASS = {p: _PUBLISHED.labels(p.name.lower()) for p in Priority}
+_PLUGIN_ERRORS = Metrics.counter("plugin_errors_total", "Fehler in Plugin Methoden", ["plugin", "phase"])
+
 @dataclasses.dataclass(slots=True)
 class PluginInterface(ABC):
     _config: tc.BasicConfig | tc.PluginConfig
@@ -61,6 +84,36 @@ class PluginInterface(ABC):
     def disconnected(self) -> None: pass
 
 
+@dataclasses.dataclass(slots=True)
+class AsyncPluginInterface(PluginInterface):
+    """
+    Plugin dessen Methoden Coroutinen sind. Sie laufen auf der gemeinsamen asyncio
+    Schleife des PluginManagers statt in eigenen Threads, der PluginManager wartet
+    auf das Ergebnis. Blockierender Code gehört in run_blocking().
+    """
+
+    @abstractmethod
+    async def register(self, wasConnected: bool = False) -> None: pass
+
+    @abstractmethod
+    async def stop(self) -> None: pass
+
+    @abstractmethod
+    async def sendStates(self) -> None: pass
+
+    async def disconnected(self) -> None: pass
+
+    def submit(self, coro: Any) -> Any:
+        """Coroutine aus einem beliebigen Thread auf der Schleife starten."""
+        if self._pluginManager is None:
+            raise RuntimeError("Kein PluginManager gesetzt.")
+        return self._pluginManager.aio.submit(coro)
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Blockierende Funktion im Thread Pool der Schleife ausführen."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
 @dataclasses.dataclass(slots=True)
 class PluginLoader(ABC):
     @staticmethod
@@ -99,56 +152,38 @@ class ConfiguratorInterface(ABC):
 class PluginManager:
     # MQTT Topics und Konstanten
     MQTT_BROADCAST_TOPIC = "broadcast/updateAll"
+    MQTT_REDISCOVER_TOPIC = "broadcast/republishDiscovery"
     MQTT_HASS_STATUS_TOPIC = "homeassistant/status"
     MQTT_OFFLINE_MESSAGE = "offline"
     MQTT_ONLINE_MESSAGE = "online"
     SCHEDULER_THREAD_NAME = "scheduler"
     MQTT_THREAD_NAME = "mqttConnected"
     
-    def run_scheduler_continuously(self, interval: int = 1) -> tuple[threading.Event, threading.Thread]:
-        """Continuously run, while executing pending jobs at each elapsed
-        time interval.
+    def run_scheduler_continuously(self) -> tuple[threading.Event, threading.Thread]:
+        """Startet den HeapScheduler Thread. Er schläft bis zum nächsten fälligen Job
+        und wird geweckt wenn Jobs über schedule.every(...).do(...) dazukommen oder
+        entfernt werden.
         @return cease_continuous_run: threading.Event which can be set to
         cease continuous run.
-        Please note that it is *intended behavior that run_continuously()
-        does not run missed jobs*. For example, if you've registered a job
-        that should run every minute and you set a continuous run interval
-        of one hour then your job won't be run 60 times at each interval but
-        only once.
         """
-        cease_continuous_run = threading.Event()
-
-        class ScheduleThread(threading.Thread):
-            @classmethod
-            def run(cls):
-                self.logger.debug("ScheduleThread run()")
-                nextRun = None
-                while not cease_continuous_run.is_set():
-                    try:
-                        newNextRun = schedule.next_run()
-                        if newNextRun != nextRun:
-                            #self.logger.info("Der nächste SchedulerThread Job läuft um {}".format(newNextRun))
-                            nextRun = newNextRun
-                        schedule.run_pending()
-                        time.sleep(interval)
-                    except:
-                        self.logger.exception("Fehler im SchedulerThread")
-                self.logger.debug("ScheduleThread exit()")
-                schedule.clear()
-
-        continuous_thread = ScheduleThread()
-        continuous_thread.name = "scheduler"
-        continuous_thread.start()
+        cease_continuous_run, continuous_thread = Scheduler.start(
+            self.logger,
+            name=self.SCHEDULER_THREAD_NAME,
+            workers=self.config.get("Scheduler/workers", 4)
+        )
         self.logger.debug("ScheduleThread gestartet...")
         return (cease_continuous_run, continuous_thread)
 
-    def __init__(self, logger: logging.Logger, config: tc.BasicConfig):
+    def __init__(self, logger: logging.Logger, config: tc.BasicConfig, launch_time: float | None = None):
         self.logger = logger.getChild("PM")
         self.logger.setLevel(logging.NOTSET)
         self.config = config
+        self.timing = TimingReport(self.logger, launch_time)
         # Klassenvariablen als Instanzvariablen initialisieren
         self.needed_list: list[PluginLoader] = []
         self.configured_list: dict[str, PluginInterface] = {}
+        # Verspätete Plugins werden aus DeadlineRunner Threads eingetragen
+        self._plugins_lock = threading.RLock()
         self.is_connected = False
         self.scheduler_event = None
         self._connected_callback_thread: PropagetingThread.PropagatingThread | None = None
@@ -158,15 +193,337 @@ class PluginManager:
         self.shed_thread = None
         self._discovery_topics = self.config.getIndependendFile("discovery_topics", no_watchdog=True, do_load=True)[0]
         self.discovery_topics = tc.PluginConfig(self._discovery_topics, "Registry")
-        self._offline_handlers: list[weakref.WeakMethod[Callable[[], None | MQTTMessageInfo]]] = []
+        self._discovery_hashes: dict[str, str] = self._discovery_topics.get("Hashes", {})
+        self._discovery_lock = threading.Lock()
+        # (Plugin Key oder None, Handler)
+        self._offline_handlers: list[tuple[str | None, weakref.WeakMethod[Callable[[], None | MQTTMessageInfo]]]] = []
         self._offline_handlers_lock = threading.Lock()
+        # Routen die Plugins beim Konfigurieren und Regestrieren angelegt haben
+        self._plugin_routes: dict[str, set[str]] = {}
         self._mqttEvent = threading.Event()
         self._mqttShutdown = threading.Event()
+        self.deadline_reports: dict[str, DeadlineReport] = {}
+        self._publisher = PublishPipeline(
+            self.logger,
+            lambda: self._client,
+            interval=self.config.get("PluginManager/publish/interval", 0.05),
+            limits=self._publish_limits()
+        )
+        self._publisher.start()
+        self.dispatcher = MessageDispatcher(self.logger, workers=self.config.get("PluginManager/handler_workers", 4))
+        self.router = TopicRouter(self.logger)
+        self.aio = AsyncLoop(self.logger)
+        self._offline_queue: OfflineQueue | None = None
+        self._replay_thread: threading.Thread | None = None
+        # Live Werte die während des Nachsendens kamen, werden danach erneut gesendet
+        self._replay_live: dict[str, tuple[Any, int, bool, Priority | None]] | None = None
+        self._replay_lock = threading.Lock()
+        if self.config.get("PluginManager/offline_queue/enabled", False):
+            self._offline_queue = OfflineQueue(
+                self.config.getIndependendPath("offline_queue").with_suffix(".sqlite"),
+                self.logger,
+                max_bytes=int(self.config.get("PluginManager/offline_queue/max_mb", 50) * 1024 * 1024)
+            )
+        self._v5: Mqtt5.V5Publisher | None = None
+        self._reactor: MqttReactor | None = None
+        if self.config.get("PluginManager/mqtt/external_loop", False):
+            self._reactor = MqttReactor(
+                self.logger,
+                self.aio,
+                reconnect_min=self.config.get("PluginManager/mqtt/reconnect_min", 1),
+                reconnect_max=self.config.get("PluginManager/mqtt/reconnect_max", 120)
+            )
+        # Client, TLS Session und Broker Session über Reconnects hinweg behalten
+        self._fast_reconnect = self.config.get("PluginManager/mqtt/fast_reconnect", False)
+        self._backoff = MqttSession.Backoff(
+            self.config.get("PluginManager/mqtt/reconnect_min", 1),
+            self.config.get("PluginManager/mqtt/reconnect_max", 120)
+        ) if self._fast_reconnect else None
+        self._subscriptions = MqttSession.SubscriptionStore(
+            self.config.getIndependendPath("subscriptions").with_suffix(".json"), self.logger
+        ) if self._fast_reconnect else None
+        self._diagnostics = None
+        self._metrics_server = None
+        self._setup_metrics()
+        self._profiler = None
+        self._setup_profiler()
+        self._resend = ResendPacer(
+            self.logger,
+            lambda: [key for key, _ in self._plugins()],
+            self._send_plugin_states,
+            _PUBLISHED.total,
+            jitter=self.config.get("PluginManager/resend/jitter", 10),
+            budget=self.config.get("PluginManager/resend/budget", 20),
+            window=self.config.get("PluginManager/resend/window", 30)
+        )
+        self._resources = None
+        if self.config.get("PluginManager/resources/enabled", False):
+            from Tools.ResourceMonitor import ResourceMonitor
+            self._resources = ResourceMonitor(
+                self, self.logger,
+                interval=self.config.get("PluginManager/resources/interval", 120),
+                tracemalloc_frames=self.config.get("PluginManager/resources/tracemalloc_frames", 0)
+            )
+            self._resources.start()
+
+    def _setup_metrics(self) -> None:
+        Metrics.gauge("mqtt_connected", "1 wenn mit dem Broker verbunden").set_function(lambda: 1 if self.is_connected else 0)
+        Metrics.gauge("mqtt_publish_pending", "Nachrichten in der PublishPipeline").set_function(self._publisher.pending)
+        Metrics.gauge("mqtt_paho_queue", "Pakete in pahos Sende Queue").set_function(
+            lambda: len(getattr(self._client, "_out_packet", ())) if self._client is not None else 0
+        )
+        Metrics.gauge("mqtt_handler_backlog", "Nachrichten die auf einen Handler warten").set_function(self.dispatcher.backlog)
+        if self._offline_queue is not None:
+            Metrics.gauge("offline_queue_depth", "Nachrichten in der Offline Queue").set_function(lambda: len(self._offline_queue) if self._offline_queue is not None else 0)
+        port = self.config.get("PluginManager/metrics/http_port", 0)
+        if port:
+            try:
+                self._metrics_server = Metrics.start_http_server(port, self.config.get("PluginManager/metrics/http_addr", "127.0.0.1"), self.logger)
+            except OSError:
+                self.logger.exception(f"Metrik Server auf Port {port} konnte nicht gestartet werden!")
+
+    def _setup_profiler(self) -> None:
+        if not self.config.get("PluginManager/profiler/enabled", True):
+            return
+        from Tools.Profiler import SamplingProfiler
+        # Immer aktiv, mit wenigen Samples pro Sekunde fällt der Aufwand nicht auf
+        hz = max(1.0, float(self.config.get("PluginManager/profiler/hz", 5)))
+        self._profiler = SamplingProfiler(self.logger, interval=1 / hz, skip_idle=self.config.get("PluginManager/profiler/skip_idle", True))
+        self._profiler.start(self.config.getIndependendPath("profile").parent)
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self._profiler.request_dump("SIGUSR1"))
+
+    def profile_command(self, client: MqttClient, userdata: Any, message: Any) -> None:
+        """diagnostics/<id>/profile: "reset" verwirft die bisherigen Samples, sonst wird das Profil
+        in das Konfigurationsverzeichnis geschrieben und auf .../profile/folded gesendet."""
+        if self._profiler is None:
+            return
+        if message.payload.decode("utf-8").strip().lower() == "reset":
+            self._profiler.dump(reset=True)
+            self.logger.info("Profil zurückgesetzt.")
+            return
+        path = self.config.getIndependendPath("profile").parent / time.strftime("profile-%Y%m%d-%H%M%S.folded")
+        try:
+            self._profiler.write(path)
+        except OSError:
+            self.logger.exception("Profil konnte nicht geschrieben werden!")
+            path = None
+        # Als STATE, damit das Profil nicht von Telemetrie verdrängt wird
+        handle = self.publish(f"{self._profile_topic()}/folded", self._profiler.dump(), 0, False, priority=Priority.STATE)
+        try:
+            handle.wait_for_publish(5)
+        except ValueError:
+            self.logger.warning(f"Profil zu groß für den Sendepuffer, nicht gesendet. Datei: {path}")
+        except TimeoutError:
+            self.logger.debug("Profil noch nicht gesendet.")
+
+    def _profile_topic(self) -> str:
+        return "diagnostics/{}/profile".format(self.config.get_client_config().id)
+
+    def resource_stats(self) -> dict[str, Any] | None:
+        """Letzte Messung des ResourceMonitor (CPU pro Thread, RSS, Speicher pro Plugin)."""
+        return self._resources.last() if self._resources is not None else None
+
+    def profiler_stats(self) -> dict[str, float] | None:
+        return self._profiler.stats() if self._profiler is not None else None
+
+    def message_callback_add(self, topic: str, callback: Callable[[MqttClient, Any, Any], None]) -> None:
+        """Wie Client.message_callback_add, aber über den TopicRouter.
+        callback läuft im Dispatcher Pool statt im paho Netzwerk Thread.
+        Die Route bleibt auch über einen neuen MQTT Client hinweg bestehen."""
+        self.router.add(topic, self.dispatcher.wrap(callback))
+        key = Scheduler.current_owner.get()
+        if key is not None:
+            self._plugin_routes.setdefault(key, set()).add(topic)
+
+    def message_callback_remove(self, topic: str) -> None:
+        self.router.remove(topic)
+
+    def _publish_limits(self) -> dict[Priority, ClassLimit]:
+        limits: dict[Priority, ClassLimit] = {}
+        for name, conf in dict(self.config.get("PluginManager/publish/limits", {})).items():
+            try:
+                limits[Priority[name.upper()]] = ClassLimit(int(conf["max_bytes"]), DropPolicy(conf["policy"]))
+            except (KeyError, ValueError, TypeError):
+                self.logger.warning(f"Ungültiges Publish Limit für {name}: {conf}")
+        return limits
+
+    def publish(self, topic: str, payload: Any = None, qos: int = 0, retain: bool = False, priority: Priority | None = None) -> PublishHandle:
+        """Nachricht über die Publish Pipeline senden. Noch nicht gesendete Werte für topic werden ersetzt.
+        Ohne priority wird die Klasse aus topic, payload und retain geraten."""
+        if retain and topic in self._discovery_hashes:
+            # Jemand anderes schreibt auf ein Discovery Topic (z.B. löschen mit ""), Hash ist ungültig
+            with self._discovery_lock:
+                self._discovery_hashes.pop(topic, None)
+                self._discovery_topics.markFileAsDirty()
+        prio = priority if priority is not None else classify(topic, payload, retain)
+        self._resend.throttle()
+        _PUBLISHED_BY_CLASS[prio].inc()
+        queue = self._offline_queue
+        if queue is not None:
+            if prio in (Priority.STATE, Priority.TELEMETRY):
+                if not self.is_connected:
+                    handle = PublishHandle(topic)
+                    try:
+                        queue.append(topic, payload, qos, retain)
+                        handle._store()
+                    except Exception:
+                        self.logger.exception(f"Konnte {topic} nicht in der Offline Queue speichern!")
+                        handle._drop()
+                    return handle
+                with self._replay_lock:
+                    if self._replay_live is not None:
+                        self._replay_live[topic] = (payload, qos, retain, priority)
+        return self._publisher.publish(topic, payload=payload, qos=qos, retain=retain, priority=priority)
+
+    def _capture_live(self) -> None:
+        """Vor is_connected = True aufrufen. Werte die register_mods() und _send_all_states() senden
+        sind neuer als die gespeicherten und werden nach dem Nachsenden noch einmal gesendet."""
+        if self._offline_queue is None or len(self._offline_queue) == 0:
+            return
+        with self._replay_lock:
+            if self._replay_live is None:
+                self._replay_live = {}
+
+    def _start_replay(self) -> None:
+        if self._offline_queue is None or len(self._offline_queue) == 0:
+            return
+        if self._replay_thread is not None and self._replay_thread.is_alive():
+            return
+        with self._replay_lock:
+            if self._replay_live is None:
+                self._replay_live = {}
+        self._replay_thread = threading.Thread(target=self._replay, name="offline-replay", daemon=True)
+        self._replay_thread.start()
+
+    def _replay(self) -> None:
+        """Gespeicherte Nachrichten mit höchstens PluginManager/offline_queue/replay_rate pro Sekunde nachsenden.
+        Direkt an paho, weil die Pipeline mehrere Werte für das selbe Topic zusammenfassen würde."""
+        queue = self._offline_queue
+        rate = max(1.0, float(self.config.get("PluginManager/offline_queue/replay_rate", 20)))
+        self.logger.info(f"Sende {len(queue)} gespeicherte Nachrichten nach...")
+        start = time.monotonic()
+        sent = 0
+        try:
+            while self.is_connected and len(queue) > 0:
+                batch = queue.peek(int(rate))
+                if len(batch) == 0:
+                    break
+                last_id = None
+                for msg in batch:
+                    client = self._client
+                    if client is None or not self.is_connected:
+                        break
+                    info = client.publish(msg.topic, payload=msg.payload, qos=msg.qos, retain=msg.retain)
+                    if info.rc != mclient.MQTT_ERR_SUCCESS:
+                        self.logger.warning(f"Nachsenden unterbrochen, rc={info.rc}")
+                        break
+                    last_id = msg.id
+                    sent += 1
+                    # Gleichmäßig über die Sekunde verteilen statt in Schüben
+                    delay = start + sent / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                if last_id is None:
+                    break
+                queue.ack(last_id)
+                if last_id != batch[-1].id:
+                    break
+        except Exception:
+            self.logger.exception("Nachsenden fehlgeschlagen!")
+        finally:
+            with self._replay_lock:
+                live, self._replay_live = self._replay_live or {}, None
+            for topic, (payload, qos, retain, priority) in live.items():
+                self._publisher.publish(topic, payload=payload, qos=qos, retain=retain, priority=priority)
+            self.logger.info(f"{sent} Nachrichten nachgesendet, {len(queue)} verbleiben.")
+
+    def offline_queue_stats(self) -> dict[str, int] | None:
+        return self._offline_queue.stats() if self._offline_queue is not None else None
+
+    def publish_discovery(self, topic: str, payload: str | bytes, force: bool = False) -> PublishHandle | None:
+        """Retained Discovery Config senden, außer sie ist identisch mit der zuletzt gesendeten.
+        @return None wenn nichts gesendet wurde."""
+        import hashlib
+        data = payload.encode("utf-8") if isinstance(payload, str) else payload
+        digest = hashlib.sha1(data).hexdigest()
+        skip = self.config.get("PluginManager/discovery/skip_unchanged", True)
+        with self._discovery_lock:
+            if skip and not force and self._discovery_hashes.get(topic, None) == digest:
+                return None
+        # Mitzählen wie publish(), der ResendPacer sieht sonst keine Discovery Schübe
+        self._resend.throttle()
+        _PUBLISHED_BY_CLASS[Priority.DISCOVERY].inc()
+        handle = self._publisher.publish(topic, payload=payload, qos=0, retain=True, priority=Priority.DISCOVERY)
+        with self._discovery_lock:
+            self._discovery_hashes[topic] = digest
+            self._discovery_topics.markFileAsDirty()
+        # Auch wenn die Pipeline sie erst später verwirft (DropPolicy.NEWEST)
+        handle.on_drop(lambda: self._forget_discovery(topic, digest))
+        return handle
+
+    def _forget_discovery(self, topic: str, digest: str) -> None:
+        with self._discovery_lock:
+            if self._discovery_hashes.get(topic, None) == digest:
+                self._discovery_hashes.pop(topic)
+                self._discovery_topics.markFileAsDirty()
+
+    def _forget_all_discovery(self) -> None:
+        with self._discovery_lock:
+            self._discovery_hashes.clear()
+            self._discovery_topics.markFileAsDirty()
+
+    def republish_discovery(self, client: MqttClient | None = None, userdata: Any | None = None, message: Any | None = None) -> None:
+        """Alle Discovery Hashes vergessen und Plugins neu registrieren, sendet alle Configs erneut."""
+        self.logger.info("Discovery wird komplett neu gesendet...")
+        self._forget_all_discovery()
+        self.register_mods()
+
+    def _register_diagnostics(self) -> None:
+        names = self.config.get("PluginManager/metrics/ha_sensors", [])
+        if len(names) == 0:
+            return
+        if self._diagnostics is None:
+            from Tools.DiagnosticSensors import DiagnosticSensors
+            self._diagnostics = DiagnosticSensors(self, self.logger, names, self.config.get("PluginManager/metrics/ha_interval", 60))
+        try:
+            self._diagnostics.register()
+        except Exception:
+            self.logger.exception("Diagnose Sensoren konnten nicht regestriert werden!")
+
+    def _register_resources(self) -> None:
+        if self._resources is None:
+            return
+        try:
+            self._resources.register()
+        except Exception:
+            self.logger.exception("Ressourcen Sensoren konnten nicht regestriert werden!")
+
+    def mqtt5_stats(self) -> dict[str, int] | None:
+        return self._v5.stats() if self._v5 is not None else None
+
+    def session_stats(self) -> dict[str, int] | None:
+        """Übersprungene subscribe() Aufrufe und wiederaufgenommene TLS Sessions bei fast_reconnect."""
+        if self._subscriptions is None:
+            return None
+        context = getattr(self._client, "_ssl_context", None)
+        return {
+            "subscriptions": len(self._subscriptions),
+            "subscribe_skipped": self._subscriptions.skipped,
+            "tls_resumed": context.resumed if isinstance(context, MqttSession.ResumingSSLContext) else 0,
+        }
+
+    def reactor_stats(self) -> dict[str, Any] | None:
+        """Lese/Schreib Zähler und Sendelatenz des MqttReactor, None wenn paho loop_start() verwendet."""
+        return self._reactor.stats() if self._reactor is not None else None
+
+    def publish_stats(self) -> dict[str, dict]:
+        return self._publisher.stats()
 
     def addOfflineHandler(self, func: Callable[[], MQTTMessageInfo | None]) -> None:
         with self._offline_handlers_lock:
             self.logger.debug(f"Adding {func=} to offlineHandlers...")
-            self._offline_handlers.append(weakref.WeakMethod(func))
+            self._offline_handlers.append((Scheduler.current_owner.get(), weakref.WeakMethod(func)))
 
     def get_pip_list(self) -> None:
         pip_list: list[str] = []
@@ -191,122 +548,286 @@ class PluginManager:
                 self.logger.exception("Installing required Packages failed!")
 
 
+    def _deadline_runner(self, phase: str) -> tuple[DeadlineRunner, dict[str, float]]:
+        workers = self.config.get("PluginManager/workers", 4)
+        deadline = self.config.get("PluginManager/deadline", 30.0)
+        deadlines = self.config.get("PluginManager/deadlines", {})
+        return DeadlineRunner(self.logger, phase, max_workers=workers, deadline=deadline), dict(deadlines)
+
+    def _log_deadline_report(self, phase: str, report: DeadlineReport) -> None:
+        self.deadline_reports[phase] = report
+        for name, duration in report.durations.items():
+            self.timing.record(name, phase, duration)
+        self.timing.overdue(phase, report.overdue)
+        for name, exc in report.errors.items():
+            _PLUGIN_ERRORS.labels(name, phase).inc()
+            self.logger.error(f"{phase}: Plugin {name} ist fehlgeschlagen!", exc_info=exc)
+        if len(report.overdue) > 0:
+            self.logger.warning(f"{phase}: Zeitbudget überschritten von {report.overdue}")
+
+    @contextlib.contextmanager
+    def _owned_by(self, key: str):
+        """Jobs, Routen und Offline Handler die in diesem Block angelegt werden gehören Plugin key."""
+        token = Scheduler.current_owner.set(key)
+        try:
+            yield
+        finally:
+            Scheduler.current_owner.reset(token)
+
+    def _release_plugin(self, key: str) -> None:
+        """Entfernt was Plugin key beim Konfigurieren und Regestrieren angelegt hat."""
+        jobs = Scheduler.cancel_owned(key)
+        routes = self._plugin_routes.pop(key, set())
+        for topic in routes:
+            self.router.remove(topic)
+        with self._offline_handlers_lock:
+            before = len(self._offline_handlers)
+            self._offline_handlers = [(owner, rm) for owner, rm in self._offline_handlers if owner != key]
+            handlers = before - len(self._offline_handlers)
+        self.logger.debug(f"{key}: {jobs} Jobs, {len(routes)} Routen und {handlers} Offline Handler entfernt.")
+
+    def _construct_plugin(self, key: str) -> PluginInterface | None:
+        for x in self.needed_list:
+            if x.getConfigKey() == key:
+                self.logger.info(f"Konfiguriere Plugin {key}...")
+                with self._owned_by(key):
+                    plugin = x.getPlugin(opts=self.config, logger=self.logger)
+                self.logger.info(f"Plugin {key} konfiguriert")
+                return plugin
+        return None
+
+    def _late_plugin(self, key: str, plugin: PluginInterface | None, exc: BaseException | None) -> None:
+        if exc is not None or plugin is None:
+            self.logger.error(f"Verspätetes Plugin {key} konnte nicht konfiguriert werden.", exc_info=exc)
+            return
+        with self._plugins_lock:
+            self.configured_list[key] = plugin
+            # Ist register_mods() schon gelaufen, muss sich das Plugin selbst regestrieren
+            connected = self.is_connected
+        if connected:
+            self._register_plugin(key, plugin)
+
     def enable_mods(self) -> None:
         if self.scheduler_event is None:
             self.scheduler_event, self.shed_thread = self.run_scheduler_continuously()
-        self.configured_list = {}
+        with self._plugins_lock:
+            self.configured_list = {}
         mep = list(self.config.get_all_plugin_names())
-        for i, key in enumerate(mep, 1):
-            self.logger.debug("[{}/{}] Lade Plugin {}.".format(i, len(mep), key))
-            plugin = None
-            for x in self.needed_list:
-                if x.getConfigKey() == key:
-                    try:
-                        self.logger.info("Konfiguriere Plugin...")
-                        plugin = x.getPlugin(opts=self.config, logger=self.logger)
-                        self.logger.info("Plugin konfiguriert")
-                        break
-                    except:
-                        self.logger.exception("Konfigurieren Fehlgeschlagen!")
+        self.logger.debug("Lade {} Plugins: {}".format(len(mep), mep))
+        runner, deadlines = self._deadline_runner(TimingReport.PHASE_GET_PLUGIN)
+        report = runner.run(
+            {key: (lambda key=key: self._construct_plugin(key)) for key in mep},
+            deadlines=deadlines,
+            late_callback=self._late_plugin
+        )
+        self._log_deadline_report(TimingReport.PHASE_GET_PLUGIN, report)
+        self.timing.mark("plugins_constructed")
 
+        for key in mep:
+            plugin = report.results.get(key, None)
             if plugin is None:
-                self.logger.warning("Plugin {} nicht vorhanden.".format(key))
+                if key not in report.overdue:
+                    self.logger.warning("Plugin {} nicht vorhanden.".format(key))
                 continue
-            self.configured_list[key] = plugin
+            with self._plugins_lock:
+                self.configured_list[key] = plugin
+
+    def _load_plugin_file(self, x: str) -> PluginLoader | str | None:
+        """@return NO_PLUGIN wenn das Modul geladen wurde aber keinen PluginLoader hat, None wenn der Import fehlschlug."""
+        import importlib.util
+        from Tools.PluginIndex import NO_PLUGIN
+        mod = None
+        try:
+            spec = importlib.util.spec_from_file_location("module.name", x)
+            if spec is None:
+                self.logger.error(f"Loading {x}: spec is None")
+                return None
+            mod = importlib.util.module_from_spec(spec)
+            if mod is None:
+                self.logger.error(f"Loading {x}: Module is None")
+                return None
+            if spec.loader is None:
+                self.logger.error(f"Loading {x}: spec.loader is None")
+                return None
+            spec.loader.exec_module(mod)
+            loader = getattr(mod, "PluginLoader", None)
+            if loader is None:
+                return NO_PLUGIN
+            return loader()
+        except ImportError as x:
+            self.logger.exception("Kann Modul {} nicht laden!".format(x))
+        except RuntimeError as x:
+            self.logger.exception("Modul %s hat RuntimeError verursacht. Die Nachricht war: %s ", mod, x.args)
+        except err.InSystemModeError:
+            self.logger.exception("Kann Modul nicht installieren. In Systemd Modus!")
+        except Exception as ex:
+            self.logger.exception("Modul %s hat eine Exception verursacht. NICHT laden.", x)
+        return None
 
     def needed_plugins(self, get_config=False) -> list[PluginLoader]:
         import Mods
-        import importlib.util
+        from Tools.PluginIndex import PluginIndex, NO_PLUGIN
         self.needed_list = []
 
         p = Path(Mods.__path__[0])
         paths = list(p.glob('*/*.py')) + list(p.glob('*.py')) 
         lp = [str(x) for x in paths if str(x.name).startswith("p", 0) or x.name == "__init__.py"]
         plugin_names = self.config.get_all_plugin_names()
+        index = PluginIndex(self.config, self.logger, p.parent)
 
         for i, x in enumerate(lp, 1):
-            self.logger.info("[{}/{}] Überprüfe Plugindatei: {}".format(i, len(lp), x))
+            key = index.lookup(Path(x))
+            if not get_config and key is not None and (key == NO_PLUGIN or key not in plugin_names):
+                self.logger.debug("[{}/{}] Überspringe Plugindatei: {} ({})".format(i, len(lp), x, key if key else "kein Plugin"))
+                continue
+            self.logger.info("[{}/{}] Lade Plugindatei: {}".format(i, len(lp), x))
+            import_start = time.monotonic()
+            pInfo = self._load_plugin_file(x)
+            import_duration = time.monotonic() - import_start
+            if pInfo == NO_PLUGIN:
+                if key is None:
+                    index.remember(Path(x), None)
+                continue
+            if pInfo is None:
+                # Fehlendes pip Paket, Systemd Modus usw. kann beim nächsten Start behoben sein, nicht merken
+                continue
             try:
-                spec = importlib.util.spec_from_file_location("module.name", x)
-                if spec is None:
-                    self.logger.error(f"Loading {x}: spec is None")
-                    continue
-                mod = importlib.util.module_from_spec(spec)
-                if mod is None:
-                    self.logger.error(f"Loading {x}: Module is None")
-                    continue
-                if spec.loader is None:
-                    self.logger.error(f"Loading {x}: spec.loader is None")
-                    continue
-                spec.loader.exec_module(mod)
-                pInfo: PluginLoader = mod.PluginLoader()
-
-                if pInfo.getConfigKey() in plugin_names or get_config:
-                    self.needed_list.append(pInfo)
-                    self.logger.debug("Plugin wird gebraucht.")
-                else:
-                    self.logger.info("Modul {} wird von der Konfig nicht spezifiziert, werde es wieder entladen...".format(str(mod)))
-            except ImportError as x:
-                self.logger.exception("Kann Modul {} nicht laden!".format(x))
-            except AttributeError:
-                pass
-                # self.logger.warning("Modul hat nur attribute: {}. PluginLoader ist nicht dabei!".format(mod.__dict__))
-            except RuntimeError as x:
-                self.logger.exception("Modul %s hat RuntimeError verursacht. Die Nachricht war: %s ", mod, x.args)
-            except err.InSystemModeError:
-                self.logger.exception("Kann Modul nicht installieren. In Systemd Modus!")
-            except Exception as ex:
-                self.logger.exception("Modul %s hat eine Exception verursacht. NICHT laden.", x)
-        return self.needed_list
-
-    def register_mods(self) -> None:
-        self.logger.info("Regestriere Plugins in MQTT")
+                real_key = pInfo.getConfigKey()
+            except Exception:
+                self.logger.exception("getConfigKey() von {} fehlgeschlagen!".format(x))
+                continue
+            index.remember(Path(x), real_key)
+            self.timing.record(real_key, TimingReport.PHASE_IMPORT, import_duration)
 
-        clen = len(self.configured_list)
-        i: int = 1
+            if real_key in plugin_names or get_config:
+                self.needed_list.append(pInfo)
+                self.logger.debug("Plugin wird gebraucht.")
+            else:
+                self.logger.info("Modul {} wird von der Konfig nicht spezifiziert, werde es wieder entladen...".format(x))
+        index.save()
+        self.timing.mark("plugins_imported")
+        return self.needed_list
 
-        for pname, pobject in self.configured_list.items():
-            self.logger.info(f"[{i}/{clen}] Tell Plugin about MQTT {pname}.")
-            i += 1
+    def _register_plugin(self, pname: str, pobject: PluginInterface) -> None:
+        self.logger.info(f"Tell Plugin about MQTT {pname}.")
+        with self._owned_by(pname):
             try:
                 pobject.set_pluginManager(self)
             except AttributeError:
                 self.logger.debug(f"Plugin {pname} hat keine set_pluginManager Methode")
-            
+
             try:
-                pobject.register(wasConnected=self._wasConnected)
+                self._call_plugin(pobject.register, wasConnected=self._wasConnected)
             except TypeError:
-                try:
-                    pobject.register()
-                except Exception as e:
-                    self.logger.exception(f"Fehler beim Registrieren des Plugins {pname}: {e=} ")
+                self._call_plugin(pobject.register)
+
+    def _call_plugin(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Methode eines Plugins aufrufen. Gibt sie eine Coroutine zurück (AsyncPluginInterface),
+        läuft diese auf der gemeinsamen asyncio Schleife und es wird auf sie gewartet.
+        Im Schleifen Thread selbst (external_loop) wird sie nur eingeplant."""
+        ret = func(*args, **kwargs)
+        if inspect.isawaitable(ret):
+            if self.aio.in_loop():
+                self.aio.submit(ret).add_done_callback(self._log_plugin_future)
+                return None
+            return self.aio.run(ret)
+        return ret
+
+    def _log_plugin_future(self, future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error("Plugin Coroutine fehlgeschlagen!", exc_info=future.exception())
+
+    def _plugins(self) -> list[tuple[str, PluginInterface]]:
+        with self._plugins_lock:
+            return list(self.configured_list.items())
+
+    def register_mods(self, plugins: list[tuple[str, PluginInterface]] | None = None) -> None:
+        self.logger.info("Regestriere Plugins in MQTT")
+        if plugins is None:
+            plugins = self._plugins()
+        runner, deadlines = self._deadline_runner(TimingReport.PHASE_REGISTER)
+        report = runner.run(
+            {pname: (lambda pname=pname, pobject=pobject: self._register_plugin(pname, pobject))
+                for pname, pobject in plugins},
+            deadlines=deadlines
+        )
+        self._log_deadline_report(TimingReport.PHASE_REGISTER, report)
 
     def send_disconnected_to_mods(self) -> None:
         self.logger.info("Verbindung getrennt!")
-        clen = len(self.configured_list)
+        plugins = self._plugins()
+        clen = len(plugins)
         i: int = 1
 
-        for pname, pobject in self.configured_list.items():
+        for pname, pobject in plugins:
             self.logger.info(f"[{i}/{clen}] Informiere Plugin {pname}.")
             i += 1
             try:
-                pobject.disconnected()
+                self._call_plugin(pobject.disconnected)
             except (AttributeError, Exception) as e:
                 self.logger.debug(f"Fehler beim Informieren des Plugins {pname}: {e}")
 
+    def reload_plugins(self, changes: dict[str, str]) -> bool:
+        """Nur die Plugins neu starten deren PLUGINS/<key> Abschnitt sich geändert hat.
+        Die MQTT Verbindung und alle anderen Plugins laufen weiter."""
+        for key in changes:
+            with self._plugins_lock:
+                plugin = self.configured_list.pop(key, None)
+            if plugin is not None:
+                self.logger.info(f"Schalte {key} für Neustart aus")
+                try:
+                    self._call_plugin(plugin.stop)
+                except AttributeError:
+                    pass
+                except Exception:
+                    _PLUGIN_ERRORS.labels(key, "stop").inc()
+                    self.logger.exception(f"Fehler beim Ausschalten von {key}")
+            # Nicht jedes Plugin räumt in stop() seine Jobs und Routen auf
+            self._release_plugin(key)
+
+        start = [key for key, change in changes.items() if change != "removed"]
+        known = {x.getConfigKey() for x in self.needed_list}
+        if any(key not in known for key in start):
+            # Neues Plugin, Plugindateien neu einlesen
+            self.needed_plugins()
+
+        for key in start:
+            try:
+                plugin = self._construct_plugin(key)
+            except Exception:
+                _PLUGIN_ERRORS.labels(key, TimingReport.PHASE_GET_PLUGIN).inc()
+                self.logger.exception(f"Plugin {key} konnte nicht neu konfiguriert werden!")
+                continue
+            if plugin is None:
+                self.logger.warning("Plugin {} nicht vorhanden.".format(key))
+                continue
+            with self._plugins_lock:
+                self.configured_list[key] = plugin
+            if not self.is_connected:
+                continue
+            try:
+                self._register_plugin(key, plugin)
+                self._call_plugin(plugin.sendStates)
+            except AttributeError:
+                pass
+            except Exception:
+                _PLUGIN_ERRORS.labels(key, TimingReport.PHASE_REGISTER).inc()
+                self.logger.exception(f"Plugin {key} konnte nicht neu regestriert werden!")
+        return True
+
     def get_plguins_by_config_id(self, id: str) -> PluginInterface:
         return self.configured_list[id]
 
     def disable_mods(self) -> None:
-        for x in self.configured_list.keys():
+        for x, p in self._plugins():
             try:
                 self.logger.info("Schalte {} aus".format(x))
-                p = self.configured_list[x]
-                p.stop()
+                self._call_plugin(p.stop)
             except AttributeError:
                 pass
-            except Exception as x:
-                self.logger.exception(x)
+            except Exception as e:
+                _PLUGIN_ERRORS.labels(x, "stop").inc()
+                self.logger.exception(e)
 
     def get_configs(self) -> list[PluginLoader]:
         self.needed_plugins(True)
@@ -329,18 +850,24 @@ class PluginManager:
         self.logger.debug("Erstelle MQTT Client...")
         cc = self.config.get_client_config()
         
+        # Bei MQTT v5 gibt es kein clean_session mehr, stattdessen clean_start beim Verbinden
+        client_args: dict[str, Any] = {"protocol": mclient.MQTTv5} if cc.is_v5() else {"clean_session": self._clean_session(cc)}
+        client_cls = MqttSession.SessionClient if self._fast_reconnect else MqttClient
         try:
-            client = MqttClient(client_id=cc.client_id, clean_session=cc.clean_session)
+            client = client_cls(client_id=cc.client_id, **client_args)
         except TypeError:
             # Fallback für ältere paho-mqtt Versionen
-            client = MqttClient(client_id=cc.client_id, clean_session=cc.clean_session, callback_api_version=mqttEnums.CallbackAPIVersion.VERSION1)
+            client = client_cls(client_id=cc.client_id, callback_api_version=mqttEnums.CallbackAPIVersion.VERSION1, **client_args)
         self.logger.debug("Client erstellt.")
 
         if cc.is_secure():
             self.logger.info("SSL Optionen werden gesetzt...")
             import ssl
-        
-            client.tls_set(ca_certs=cc.ca, certfile=cc.cert, keyfile=cc.key, tls_version=ssl.PROTOCOL_TLS)
+
+            if self._fast_reconnect:
+                client.tls_set_context(MqttSession.tls_context(cc.ca, cc.cert, cc.key))
+            else:
+                client.tls_set(ca_certs=cc.ca, certfile=cc.cert, keyfile=cc.key, tls_version=ssl.PROTOCOL_TLS)
             self.logger.debug("SSL Kontext gesetzt")
         elif cc.broken_security():
             self.logger.warning("Nicht alle Optionen für SSL wurden gesetzt.")
@@ -359,23 +886,79 @@ class PluginManager:
         client_log.setLevel(logging.INFO)
         client.enable_logger(logger=client_log)
         client.on_connect = self.connect_callback
-        client.connect_async(cc.host, port=cc.port)
+        client.on_message = self.router.on_message
+        if cc.is_v5():
+            self.logger.info("Verwende MQTT v5")
+            self._v5 = Mqtt5.V5Publisher(
+                self.logger,
+                expiry={p: self.config.get(f"PluginManager/mqtt5/expiry/{p.name.lower()}", 60 if p == Priority.TELEMETRY else 0) for p in Priority},
+                alias_after=self.config.get("PluginManager/mqtt5/alias_after", 2)
+            )
+            self._publisher.set_sender(self._v5.publish)
+        else:
+            self._v5 = None
+            self._publisher.set_sender(None)
+        self._connect_async(client, cc)
         client.on_disconnect = self.disconnect_callback
+        if self._fast_reconnect:
+            client.subscriptions = self._subscriptions
+            client.on_connect_fail = self._connect_failed
         self._client = client
         self._client_name = my_name
         client.will_set(cc.isOnlineTopic, "offline", 0, True)
         return client, my_name
 
+    def _clean_session(self, cc: tc.ClientConfig) -> bool:
+        if not self._fast_reconnect:
+            return cc.clean_session
+        if not cc.client_id:
+            self.logger.warning("Ohne client_id kann der Broker keine Session behalten.")
+            return True
+        return False
+
+    def _connect_async(self, client: MqttClient, cc: tc.ClientConfig) -> None:
+        if cc.is_v5():
+            expiry = cc.session_expiry
+            if self._fast_reconnect and expiry <= 0:
+                expiry = self.config.get("PluginManager/mqtt/session_expiry", 3600)
+            client.connect_async(cc.host, port=cc.port, clean_start=self._clean_session(cc), properties=Mqtt5.connect_properties(expiry))
+        else:
+            client.connect_async(cc.host, port=cc.port)
+
+    def _next_reconnect_delay(self, client: MqttClient) -> None:
+        if self._backoff is None:
+            return
+        delay = self._backoff.next()
+        # paho wartet vor dem nächsten Versuch min_delay, wenn der Zähler zurückgesetzt ist
+        client.reconnect_delay_set(min_delay=delay, max_delay=delay)
+        self.logger.debug(f"Nächster Verbindungsversuch in {delay:.1f}s")
+
+    def _connect_failed(self, client: MqttClient, userdata: Any) -> None:
+        self._next_reconnect_delay(client)
+
     def reSendStates(self, client: MqttClient | None = None, userdata: Any | None = None, message: MQTTMessageInfo | None = None) -> None:
         self.logger.info("Resend Topic empfangen. alles neu senden...")
-        for x in self.configured_list.keys():
-            try:
-                p = self.configured_list[x]
-                p.sendStates()
-            except AttributeError:
-                self.logger.debug(f"Plugin {x} hat keine sendStates() Methode")
-            except Exception as e:
-                self.logger.exception(f"Fehler beim Senden von States für Plugin {x}: {e}")
+        self._resend.request("broadcast", force=True)
+
+    def _send_all_states(self, record_timing: bool = False) -> None:
+        for x, _ in self._plugins():
+            self._send_plugin_states(x, record_timing)
+
+    def _send_plugin_states(self, x: str, record_timing: bool = False) -> None:
+        try:
+            p = self.configured_list[x]
+            start = time.monotonic()
+            self._call_plugin(p.sendStates)
+            if record_timing:
+                self.timing.record(x, TimingReport.PHASE_SEND_STATES, time.monotonic() - start)
+        except KeyError:
+            # Plugin wurde inzwischen entfernt
+            pass
+        except AttributeError:
+            self.logger.debug(f"Plugin {x} hat keine sendStates() Methode")
+        except Exception as e:
+            _PLUGIN_ERRORS.labels(x, TimingReport.PHASE_SEND_STATES).inc()
+            self.logger.exception(f"Fehler beim Senden von States für Plugin {x}: {e}")
 
     def disconnect(self, skip_callbacks: bool = False, reconnect: float = 0) -> mqttEnums.MQTTErrorCode:
         if reconnect < 0.5:
@@ -383,6 +966,8 @@ class PluginManager:
         err: mqttEnums.MQTTErrorCode = mqttEnums.MQTTErrorCode.MQTT_ERR_UNKNOWN
         if self._client is not None:
             self._client.reconnect_delay_set(min_delay=5, max_delay=300)
+            if self._reactor is not None:
+                self._reactor.stop()
             err = self._client.disconnect()
             if skip_callbacks:
                 self.disconnect_callback(self._client, self, err)
@@ -397,16 +982,16 @@ class PluginManager:
     def reconnect(self) -> None:
         self._mqttEvent.set()
 
-    def disconnect_callback(self, client: MqttClient, userdata: Any, rc: mqttEnums.MQTTErrorCode) -> None:
+    def disconnect_callback(self, client: MqttClient, userdata: Any, rc: mqttEnums.MQTTErrorCode, properties: Any = None) -> None:
         self.is_connected = False
         self.logger.info(f"Verbindung getrennt {rc=}")
         self._wasConnected = self.is_connected or self._wasConnected
         self.is_connected = False
         with self._offline_handlers_lock:
             # self.logger.debug(f"self._offline_handlers.len = {len(self._offline_handlers)}")
-            self._offline_handlers = [rm for rm in self._offline_handlers if rm() is not None]
+            self._offline_handlers = [(key, rm) for key, rm in self._offline_handlers if rm() is not None]
             self.logger.debug(f"self._offline_handlers.len = {len(self._offline_handlers)}")
-            for f in self._offline_handlers:
+            for _, f in self._offline_handlers:
                 try:
                     # self.logger.debug(f"Call disconnect_callback {f=}")
                     real_func = f()
@@ -417,9 +1002,16 @@ class PluginManager:
                 except Exception as e:
                     self.logger.exception(f"Fehler beim Aufrufen des Offline-Handlers: {e}")
         self.logger.info(f"Verbindung getrennt, alles aufgeräumt! {client=}")
+        if self._subscriptions is not None:
+            self._subscriptions.disconnected()
+        if self._fast_reconnect and not self._mqttShutdown.is_set():
+            # paho verbindet den selben Client selbst neu
+            self._next_reconnect_delay(client)
         try:
-            if rc == mqttEnums.MQTTErrorCode.MQTT_ERR_KEEPALIVE:
+            if rc == mqttEnums.MQTTErrorCode.MQTT_ERR_KEEPALIVE and not self._fast_reconnect:
                 self.logger.info("KeepAlive Error. Disconnect!")
+                if self._reactor is not None:
+                    self._reactor.stop()
                 client.disconnect()
                 client.loop_stop()
         except Exception as e:
@@ -430,8 +1022,28 @@ class PluginManager:
         except Exception as e:
             self.logger.exception(f"Fehler beim Benachrichtigen der Module: {e}")
 
-    def connect_callback(self, client: MqttClient, userdata: Any, flags: int, rc: int) -> None:
+    def connect_callback(self, client: MqttClient, userdata: Any, flags: int, rc: int, properties: Any = None) -> None:
         self.logger.info(f"Verbunden ({client}), regestriere Plugins...")
+        if rc == 0 and not MqttSession.session_present(flags):
+            # Neue Sitzung, der Broker hat eventuell neu gestartet und retained Configs verloren
+            self.logger.debug("Keine Sitzung am Broker, Discovery wird neu gesendet.")
+            self._forget_all_discovery()
+        if rc == 0:
+            # "offline" der Offline Handler ist überholt, paho hat sie früher beim Trennen verworfen.
+            # "online" von Plugins die während der Trennung wieder verfügbar wurden bleibt.
+            discarded = self._publisher.discard(Priority.AVAILABILITY, self.MQTT_OFFLINE_MESSAGE)
+            if discarded > 0:
+                self.logger.debug(f"{discarded} veraltete Verfügbarkeitsmeldungen verworfen.")
+        if self._v5 is not None:
+            # Aliase gelten nur für diese Verbindung, muss vor dem nächsten Flush passieren
+            self._v5.connected(client, properties)
+        if self._fast_reconnect and rc == 0:
+            self._backoff.reset()
+            context = getattr(client, "_ssl_context", None)
+            if isinstance(context, MqttSession.ResumingSSLContext):
+                context.remember(client.socket())
+            # Vor dem Regestrieren der Plugins, deren subscribe() Aufrufe werden sonst doppelt gesendet
+            self._subscriptions.connected(client, MqttSession.session_present(flags))
         if self._connected_callback_thread is None or not self._connected_callback_thread.is_alive():
             self._connected_callback_thread = PropagetingThread.PropagatingThread(name="mqttConnected", target=lambda: self._connect_callback(client,userdata,flags,rc))
             self._connected_callback_thread.start()
@@ -448,7 +1060,7 @@ class PluginManager:
         msg = message.payload.decode('utf-8')
         if msg == "online":
             self.logger.info("HomeAssistant ist online. Alle sensoren neu senden!")
-            self.reSendStates()
+            self._resend.request("birth")
 
 
     def _connect_callback(self, client: MqttClient, userdata: Any, flags: int, rc: int) -> None:
@@ -457,20 +1069,38 @@ class PluginManager:
             self.disconnect(reconnect=15)
             return
         self._client = client
-        
+        self._publisher.wakeup()
+
         self._client.subscribe(self.MQTT_HASS_STATUS_TOPIC)
-        self._client.message_callback_add(self.MQTT_HASS_STATUS_TOPIC, self.hass_online_call)
+        self.message_callback_add(self.MQTT_HASS_STATUS_TOPIC, self.hass_online_call)
         try:
             if rc == 0:
-                self.is_connected = True
+                self._capture_live()
+                with self._plugins_lock:
+                    # Verspätete Plugins sind entweder hier dabei oder regestrieren sich selbst
+                    self.is_connected = True
+                    plugins = list(self.configured_list.items())
+                self.timing.connect_count += 1
+                self.timing.mark("connected")
                 self.logger.info(f"Verbunden ({client}), regestriere Plugins...")
-                self.register_mods()
+                self.register_mods(plugins)
+                self.timing.mark("plugins_registered")
+                if self._subscriptions is not None:
+                    self._subscriptions.save()
 
                 self.logger.info("Setze onlinestatus {} auf online".format(self.config.get_client_config().isOnlineTopic))
-                self._client.publish(self.config.get_client_config().isOnlineTopic, self.MQTT_ONLINE_MESSAGE, 0, True).wait_for_publish(30)
+                self.publish(self.config.get_client_config().isOnlineTopic, self.MQTT_ONLINE_MESSAGE, 0, True).wait_for_publish(30)
                 self._client.subscribe(self.MQTT_BROADCAST_TOPIC)
-                self._client.message_callback_add(self.MQTT_BROADCAST_TOPIC, self.reSendStates)
-                self.reSendStates()
+                self.message_callback_add(self.MQTT_BROADCAST_TOPIC, self.reSendStates)
+                self._client.subscribe(self.MQTT_REDISCOVER_TOPIC)
+                self.message_callback_add(self.MQTT_REDISCOVER_TOPIC, self.republish_discovery)
+                self._send_all_states(record_timing=True)
+                self._start_replay()
+                self._register_diagnostics()
+                self._register_resources()
+                if self._profiler is not None:
+                    self._client.subscribe(self._profile_topic())
+                    self.message_callback_add(self._profile_topic(), self.profile_command)
                 self._wasConnected = True
 
             else:
@@ -484,6 +1114,18 @@ class PluginManager:
             self.shutdown()
             return
         self.logger.info("Verbunden. Alles OK!")
+        self.timing.mark("online")
+        self.publish_timing_report()
+
+    def publish_timing_report(self) -> None:
+        self.timing.write(self.config.getIndependendPath("startup_report").with_suffix(".json"))
+        if not self.config.get("PluginManager/report/publish", False) or self._client is None:
+            return
+        try:
+            topic = "diagnostics/{}/startup".format(self.config.get_client_config().id)
+            self.publish(topic, self.timing.to_json(), 0, True, priority=Priority.TELEMETRY)
+        except Exception:
+            self.logger.exception("Startbericht konnte nicht gesendet werden!")
 
     def _shutdown(self) -> None:
         pass
@@ -496,10 +1138,30 @@ class PluginManager:
         self._mqttShutdown.set()
         if self._client is not None:
             try:
-                self._client.publish(self.config.get_client_config().isOnlineTopic, self.MQTT_OFFLINE_MESSAGE, 0, True).wait_for_publish(30)
+                if self._client.is_connected():
+                    self.publish(self.config.get_client_config().isOnlineTopic, self.MQTT_OFFLINE_MESSAGE, 0, True).wait_for_publish(30)
             except Exception as e:
                 self.logger.debug(f"Fehler beim Offline Publish: {e}")
+            if self._reactor is not None:
+                self._reactor.stop()
             self._client.disconnect()
+        self._publisher.stop(flush=False)
+        self.dispatcher.shutdown()
+        if self._diagnostics is not None:
+            self._diagnostics.stop()
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+        if self._profiler is not None:
+            self._profiler.stop()
+        self._resend.stop()
+        if self._resources is not None:
+            self._resources.stop()
+        self.aio.stop()
+        if self._offline_queue is not None:
+            queue, self._offline_queue = self._offline_queue, None
+            if self._replay_thread is not None:
+                self._replay_thread.join(5)
+            queue.close()
         self.logger.info("Beende Scheduler")
         schedule.clear()
         if self.scheduler_event is not None:
@@ -519,12 +1181,21 @@ class PluginManager:
         try:
             while not self._mqttShutdown.is_set():
                 self._mqttEvent.clear()
-                mqtt_client, deviceID = self.start_mqtt_client()
+                if self._fast_reconnect and self._client is not None:
+                    self.logger.info("Verwende bestehenden MQTT Client weiter")
+                    mqtt_client = self._client
+                    self._connect_async(mqtt_client, self.config.get_client_config())
+                else:
+                    mqtt_client, deviceID = self.start_mqtt_client()
                 self.logger.info("Running MQTT Main Loop")
-                mqtt_client.loop_start()
-                thread: PropagatingThread = mqtt_client._thread
-                ret, exc = thread.joinNoRaise()
-                self.logger.warning(f"MQTT PropagatingThread has {ret=} with {exc=}", exc_info=exc)
+                if self._reactor is not None:
+                    exc = self._reactor.run(mqtt_client)
+                    self.logger.warning(f"MQTT Reactor beendet mit {exc=}", exc_info=exc)
+                else:
+                    mqtt_client.loop_start()
+                    thread: PropagatingThread = mqtt_client._thread
+                    ret, exc = thread.joinNoRaise()
+                    self.logger.warning(f"MQTT PropagatingThread has {ret=} with {exc=}", exc_info=exc)
                 if isinstance(exc, (ConnectionRefusedError, KeyboardInterrupt, NoClientConfigured)):
                     raise exc
                 if not self._mqttEvent.wait(120):
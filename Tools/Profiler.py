@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from types import CodeType, FrameType
+
+# Blätter an denen ein Thread nur wartet. Ohne Filter würde jeder schlafende Thread
+# genauso viele Samples bekommen wie einer der wirklich rechnet.
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socketserver.py", "serve_forever"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("base_events.py", "_run_once"),
+    ("thread.py", "_worker"),
+    ("Scheduler.py", "run_continuously"),
+}
+
+
+def _leaf_is_idle(code: CodeType) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+def _frame_name(code: CodeType) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Schaut alle interval Sekunden über sys._current_frames() in jeden Thread und zählt
+    die Stacks pro Thread Namen (die Namen die Launcher per prctl setzt).
+    dump() liefert "folded stacks", direkt verwendbar mit flamegraph.pl oder speedscope.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 0.05, max_depth: int = 64,
+                 max_stacks: int = 20000, skip_idle: bool = True):
+        self._log = logger.getChild("Profiler")
+        self._interval = max(0.001, float(interval))
+        self._max_depth = max(1, int(max_depth))
+        self._max_stacks = max(100, int(max_stacks))
+        self._skip_idle = skip_idle
+        self._lock = threading.Lock()
+        self._stacks: collections.Counter[tuple[str, tuple[CodeType, ...]]] = collections.Counter()
+        self._truncated: collections.Counter[str] = collections.Counter()
+        self._samples = 0
+        self._since = time.time()
+        self._overhead = 0.0
+        self._stop = threading.Event()
+        self._dump_requests: list[str] = []
+        self._dump_event = threading.Event()
+        self._dump_dir: Path | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self, dump_dir: Path | None = None) -> None:
+        self._dump_dir = dump_dir
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        self._log.info(f"Sampling Profiler läuft mit {1 / self._interval:.0f} Hz.")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._dump_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            elapsed = max(1e-9, time.time() - self._since)
+            return {
+                "samples": self._samples,
+                "stacks": len(self._stacks),
+                # Anteil der Zeit die der Profiler selbst braucht
+                "overhead": self._overhead / elapsed,
+            }
+
+    def _sample(self, names: dict[int, str]) -> None:
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        if any(ident not in names for ident in frames):
+            # Neuer Thread seit dem letzten Einlesen der Namen
+            names.clear()
+            names.update((t.ident, t.name) for t in threading.enumerate() if t.ident is not None)
+        with self._lock:
+            self._samples += 1
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                if self._skip_idle and _leaf_is_idle(frame.f_code):
+                    continue
+                stack = []
+                f: FrameType | None = frame
+                while f is not None and len(stack) < self._max_depth:
+                    stack.append(f.f_code)
+                    f = f.f_back
+                stack.reverse()
+                name = names.get(ident, None) or f"thread-{ident}"
+                key = (name, tuple(stack))
+                if key not in self._stacks and len(self._stacks) >= self._max_stacks:
+                    self._truncated[name] += 1
+                    continue
+                self._stacks[key] += 1
+
+    def _run(self) -> None:
+        # Thread Namen nur bei unbekannten Threads neu einlesen, threading.enumerate() ist teurer als ein Sample
+        names: dict[int, str] = {}
+        refresh = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            # Umbenannte Threads (prctl/setName) gelegentlich trotzdem nachziehen
+            if refresh <= 0:
+                names.clear()
+                refresh = 200
+            refresh -= 1
+            try:
+                self._sample(names)
+            except Exception:
+                self._log.exception("Sample fehlgeschlagen")
+            self._overhead += time.perf_counter() - start
+            if self._dump_event.wait(self._interval):
+                self._dump_event.clear()
+                self._handle_dump_requests()
+
+    def dump(self, reset: bool = False) -> str:
+        """Folded Stacks: "thread;modul:funktion;... anzahl" pro Zeile."""
+        with self._lock:
+            stacks = list(self._stacks.items())
+            truncated = list(self._truncated.items())
+            if reset:
+                self._stacks.clear()
+                self._truncated.clear()
+                self._samples = 0
+                self._overhead = 0.0
+                self._since = time.time()
+        lines = []
+        for (name, stack), count in stacks:
+            frames = ";".join(_frame_name(code) for code in stack)
+            lines.append(f"{name.replace(';', '_')};{frames} {count}")
+        for name, count in truncated:
+            lines.append(f"{name.replace(';', '_')};[zu viele Stacks] {count}")
+        lines.sort()
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, reset: bool = False) -> Path:
+        path.write_text(self.dump(reset=reset), encoding="utf-8")
+        self._log.info(f"Profil nach {path} geschrieben.")
+        return path
+
+    def request_dump(self, reason: str = "signal") -> None:
+        """Aus Signal Handlern aufrufbar, geschrieben wird im Profiler Thread."""
+        self._dump_requests.append(reason)
+        self._dump_event.set()
+
+    def _handle_dump_requests(self) -> None:
+        while len(self._dump_requests) > 0:
+            reason = self._dump_requests.pop(0)
+            if self._dump_dir is None:
+                self._log.warning(f"Profil angefordert ({reason}), aber kein Verzeichnis gesetzt.")
+                continue
+            name = time.strftime("profile-%Y%m%d-%H%M%S.folded")
+            try:
+                self.write(self._dump_dir / name)
+            except OSError:
+                self._log.exception("Profil konnte nicht geschrieben werden!")
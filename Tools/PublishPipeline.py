@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+import enum
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import paho.mqtt.client as mclient
+
+
+class Priority(enum.IntEnum):
+    # Kleinere Werte werden zuerst gesendet
+    AVAILABILITY = 0
+    STATE = 1
+    DISCOVERY = 2
+    TELEMETRY = 3
+
+
+class DropPolicy(enum.Enum):
+    # Älteste Nachricht der Klasse verwerfen
+    OLDEST = "oldest"
+    # Neue Nachricht verwerfen
+    NEWEST = "newest"
+    # Nie verwerfen, Limit wird ignoriert
+    NEVER = "never"
+
+
+@dataclasses.dataclass(slots=True)
+class ClassLimit:
+    max_bytes: int
+    policy: DropPolicy
+
+
+DEFAULT_LIMITS: dict[Priority, ClassLimit] = {
+    Priority.AVAILABILITY: ClassLimit(0, DropPolicy.NEVER),
+    Priority.STATE: ClassLimit(256 * 1024, DropPolicy.OLDEST),
+    Priority.DISCOVERY: ClassLimit(1024 * 1024, DropPolicy.NEWEST),
+    Priority.TELEMETRY: ClassLimit(512 * 1024, DropPolicy.OLDEST),
+}
+
+
+@dataclasses.dataclass(slots=True)
+class ClassStats:
+    depth: int = 0
+    bytes: int = 0
+    published: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+
+
+def classify(topic: str, payload: Any, retain: bool) -> Priority:
+    """Priorität raten, wenn der Aufrufer keine angegeben hat."""
+    if retain and topic.endswith("/config"):
+        return Priority.DISCOVERY
+    if retain and payload in ("online", "offline", b"online", b"offline"):
+        return Priority.AVAILABILITY
+    if retain:
+        return Priority.STATE
+    return Priority.TELEMETRY
+
+
+def _as_bytes(payload: Any) -> bytes | None:
+    if payload is None or isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, bytearray):
+        return bytes(payload)
+    return str(payload).encode("utf-8")
+
+
+def payload_size(topic: str, payload: Any) -> int:
+    if payload is None:
+        return len(topic)
+    if isinstance(payload, (bytes, bytearray, str)):
+        return len(topic) + len(payload)
+    return len(topic) + len(str(payload))
+
+
+class PublishHandle:
+    """
+    Platzhalter für MQTTMessageInfo solange die Nachricht noch in der Pipeline liegt.
+    Wird eine Nachricht vor dem Flush durch eine neuere für das gleiche Topic ersetzt,
+    bekommen alle Aufrufer den selben Handle.
+    """
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.coalesced = 0
+        self.dropped = False
+        # Liegt in der OfflineQueue und wird nach dem Verbinden nachgesendet
+        self.stored = False
+        self._handed_over = threading.Event()
+        self._info: mclient.MQTTMessageInfo | None = None
+        self._exc: BaseException | None = None
+        self._drop_callbacks: list[Callable[[], None]] = []
+
+    def _bind(self, info: mclient.MQTTMessageInfo | None, exc: BaseException | None = None) -> None:
+        self._info = info
+        self._exc = exc
+        self._handed_over.set()
+
+    def _drop(self) -> None:
+        self.dropped = True
+        self._handed_over.set()
+        for callback in self._drop_callbacks:
+            callback()
+
+    def on_drop(self, callback: Callable[[], None]) -> None:
+        """callback aufrufen wenn die Nachricht verworfen wird, auch später in der Pipeline.
+        Ist sie schon verworfen, sofort."""
+        self._drop_callbacks.append(callback)
+        if self.dropped:
+            callback()
+
+    def _store(self) -> None:
+        self.stored = True
+        self._handed_over.set()
+
+    @property
+    def rc(self) -> int:
+        if self.dropped:
+            return mclient.MQTT_ERR_QUEUE_SIZE
+        if self._info is None:
+            return mclient.MQTT_ERR_SUCCESS if self.stored or not self._handed_over.is_set() else mclient.MQTT_ERR_UNKNOWN
+        return self._info.rc
+
+    @property
+    def mid(self) -> int | None:
+        return self._info.mid if self._info is not None else None
+
+    def is_published(self) -> bool:
+        return self._info is not None and self._info.is_published()
+
+    def wait_for_publish(self, timeout: float | None = None) -> None:
+        start = time.monotonic()
+        if not self._handed_over.wait(timeout):
+            raise TimeoutError(f"{self.topic} wurde noch nicht an MQTT übergeben.")
+        if self.dropped:
+            raise ValueError(f"{self.topic} wurde verworfen, Sendepuffer voll.")
+        if self._exc is not None:
+            raise self._exc
+        if self._info is None:
+            return
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+        self._info.wait_for_publish(remaining)
+
+
+@dataclasses.dataclass(slots=True)
+class _Entry:
+    payload: Any
+    qos: int
+    retain: bool
+    size: int
+    handle: PublishHandle
+
+
+Sender = Callable[[mclient.Client, str, Any, int, bool, Priority], mclient.MQTTMessageInfo]
+
+
+def plain_sender(client: mclient.Client, topic: str, payload: Any, qos: int, retain: bool, priority: Priority) -> mclient.MQTTMessageInfo:
+    return client.publish(topic, payload=payload, qos=qos, retain=retain)
+
+
+class PublishPipeline:
+    """
+    Sammelt ausgehende Nachrichten und hält pro Topic nur den neuesten Wert.
+    Alle interval Sekunden wird alles Gesammelte gemeinsam an paho übergeben,
+    nach Priority sortiert. Eine Nachricht geht nie vor einer früher veröffentlichten
+    mit gleicher oder höherer Priority raus, "online" also immer vor dem Status.
+    Solange keine Verbindung besteht bleiben die Nachrichten
+    hier liegen statt in pahos unbegrenzter Queue. Jede Klasse hat ein Byte Limit
+    und eine DropPolicy.
+    """
+
+    def __init__(self, logger: logging.Logger, client_getter: Callable[[], mclient.Client | None], interval: float = 0.05,
+                 limits: dict[Priority, ClassLimit] | None = None):
+        self._log = logger.getChild("Publish")
+        self._get_client = client_getter
+        self._interval = max(0.0, float(interval))
+        self._cond = threading.Condition()
+        self._pending: dict[Priority, dict[str, _Entry]] = {p: {} for p in Priority}
+        self._where: dict[str, Priority] = {}
+        self._limits = dict(DEFAULT_LIMITS)
+        if limits is not None:
+            self._limits.update(limits)
+        self._stats: dict[Priority, ClassStats] = {p: ClassStats() for p in Priority}
+        self._thread: threading.Thread | None = None
+        self._stop = False
+        self._sender: Sender = plain_sender
+
+    @property
+    def published(self) -> int:
+        return sum(s.published for s in self._stats.values())
+
+    @property
+    def coalesced(self) -> int:
+        return sum(s.coalesced for s in self._stats.values())
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="MQTT Publisher", daemon=True)
+            self._thread.start()
+
+    def stop(self, flush: bool = True) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5)
+        if flush:
+            self.flush()
+
+    def set_sender(self, sender: Sender | None) -> None:
+        """Ersetzt client.publish beim Flush, z.B. für MQTT v5 Properties."""
+        self._sender = sender if sender is not None else plain_sender
+
+    def wakeup(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._where)
+
+    def stats(self) -> dict[str, dict]:
+        """Queue Tiefe, Bytes, gesendete, zusammengefasste und verworfene Nachrichten pro Klasse."""
+        with self._cond:
+            return {p.name.lower(): dataclasses.asdict(s) for p, s in self._stats.items()}
+
+    def _remove(self, topic: str) -> _Entry | None:
+        prio = self._where.pop(topic, None)
+        if prio is None:
+            return None
+        entry = self._pending[prio].pop(topic)
+        st = self._stats[prio]
+        st.depth -= 1
+        st.bytes -= entry.size
+        return entry
+
+    def _make_room(self, prio: Priority, size: int) -> bool:
+        limit = self._limits[prio]
+        if limit.policy == DropPolicy.NEVER or limit.max_bytes <= 0:
+            return True
+        st = self._stats[prio]
+        if st.bytes + size <= limit.max_bytes:
+            return True
+        if limit.policy == DropPolicy.NEWEST:
+            return False
+        queue = self._pending[prio]
+        while len(queue) > 0 and st.bytes + size > limit.max_bytes:
+            oldest = next(iter(queue))
+            entry = self._remove(oldest)
+            st.dropped += 1
+            if entry is not None:
+                entry.handle._drop()
+        return st.bytes + size <= limit.max_bytes
+
+    def publish(self, topic: str, payload: Any = None, qos: int = 0, retain: bool = False, priority: Priority | None = None) -> PublishHandle:
+        prio = priority if priority is not None else classify(topic, payload, retain)
+        size = payload_size(topic, payload)
+        with self._cond:
+            old = self._remove(topic)
+            if old is not None:
+                handle = old.handle
+                handle.coalesced += 1
+                self._stats[prio].coalesced += 1
+                # Höchste QoS und retain bleiben erhalten, auch wenn ein neuerer Wert ersetzt
+                qos = max(qos, old.qos)
+                retain = retain or old.retain
+            else:
+                handle = PublishHandle(topic)
+            if not self._make_room(prio, size):
+                self._stats[prio].dropped += 1
+                handle._drop()
+                return handle
+            self._pending[prio][topic] = _Entry(payload, qos, retain, size, handle)
+            self._where[topic] = prio
+            st = self._stats[prio]
+            st.depth += 1
+            st.bytes += size
+            self._cond.notify_all()
+        return handle
+
+    def discard(self, prio: Priority, payload: Any = None) -> int:
+        """Noch nicht gesendete Nachrichten einer Klasse verwerfen, mit payload nur die mit genau diesem Inhalt.
+        @return Anzahl der verworfenen Nachrichten"""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        with self._cond:
+            topics = [topic for topic, entry in self._pending[prio].items() if payload is None or _as_bytes(entry.payload) == payload]
+            for topic in topics:
+                entry = self._remove(topic)
+                if entry is not None:
+                    entry.handle._drop()
+            self._stats[prio].dropped += len(topics)
+        return len(topics)
+
+    def _can_send(self, client: mclient.Client | None) -> bool:
+        if client is None:
+            return False
+        try:
+            return client.is_connected()
+        except AttributeError:
+            return True
+
+    def flush(self) -> int:
+        client = self._get_client()
+        if not self._can_send(client):
+            return 0
+        with self._cond:
+            batches = []
+            for prio in Priority:
+                batch = self._pending[prio]
+                if len(batch) == 0:
+                    continue
+                self._pending[prio] = {}
+                for topic in batch.keys():
+                    del self._where[topic]
+                st = self._stats[prio]
+                st.depth = 0
+                st.bytes = 0
+                batches.append((prio, batch))
+        count = 0
+        for prio, batch in batches:
+            for topic, entry in batch.items():
+                try:
+                    entry.handle._bind(self._sender(client, topic, entry.payload, entry.qos, entry.retain, prio))
+                except Exception as e:
+                    self._log.exception(f"Konnte {topic} nicht veröffentlichen!")
+                    entry.handle._bind(None, e)
+            self._stats[prio].published += len(batch)
+            count += len(batch)
+        return count
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stop and (len(self._where) == 0 or not self._can_send(self._get_client())):
+                    # Mit Timeout, falls ein Verbindungsaufbau ohne wakeup() passiert
+                    self._cond.wait(None if len(self._where) == 0 else 1.0)
+                if self._stop:
+                    return
+                if self._interval > 0:
+                    # Zeitfenster in dem weitere Werte für die selben Topics zusammengefasst werden
+                    self._cond.wait_for(lambda: self._stop, self._interval)
+            try:
+                self.flush()
+            except Exception:
+                self._log.exception("Flush fehlgeschlagen!")
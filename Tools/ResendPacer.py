@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+from Tools import Metrics
+
+_RESENDS = Metrics.counter("resend_requests_total", "Anforderungen alles neu zu senden", ("reason", "result"))
+
+
+class ResendPacer:
+    """
+    Verteilt das Neusenden aller States (HA Birth, broadcast/updateAll) über die Zeit.
+    Jeder Node wartet zufällig bis zu jitter Sekunden, damit nach einem HA Neustart nicht
+    alle Nodes gleichzeitig senden. Danach kommen die Plugins nacheinander dran. Jedes Plugin
+    darf höchstens budget Nachrichten pro Sekunde senden, der PluginManager ruft dazu bei jedem
+    publish() throttle() auf und hält das Plugin im Resend Thread an. Was aus anderen Threads
+    (asyncio, eigene Threads der Plugins) gesendet wird, holt die Pause nach dem Plugin nach.
+    Anforderungen während des Wartens oder innerhalb von window Sekunden nach
+    einem Durchlauf werden zusammengefasst, außer sie sind ausdrücklich (force).
+    """
+
+    def __init__(self, logger: logging.Logger, plugins: Callable[[], list[str]], send: Callable[[str], None],
+                 published: Callable[[], float], jitter: float = 10.0, budget: float = 20.0, window: float = 30.0):
+        self._log = logger.getChild("Resend")
+        self._plugins = plugins
+        self._send = send
+        self._published = published
+        self._jitter = max(0.0, float(jitter))
+        self._budget = float(budget)
+        self._window = max(0.0, float(window))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pending = False
+        self._again = False
+        self._last_done = 0.0
+        # Token Bucket des gerade sendenden Plugins, nur im Resend Thread benutzt
+        self._tokens = 0.0
+        self._refilled = 0.0
+
+    def request(self, reason: str = "broadcast", force: bool = False) -> bool:
+        """@param force Auch kurz nach einem Durchlauf neu senden, z.B. für broadcast/updateAll
+        @return False wenn die Anforderung mit einer anderen zusammengefasst wurde."""
+        with self._lock:
+            if self._pending:
+                _RESENDS.labels(reason, "coalesced").inc()
+                self._log.info(f"{reason}: Neusenden steht schon an, zusammengefasst.")
+                return False
+            if self._thread is not None and self._thread.is_alive():
+                # Plugins die schon dran waren, haben eventuell vor dem Birth gesendet
+                self._again = True
+                _RESENDS.labels(reason, "queued").inc()
+                return False
+            if not force and self._last_done > 0 and time.monotonic() - self._last_done < self._window:
+                _RESENDS.labels(reason, "coalesced").inc()
+                self._log.info(f"{reason}: Letzter Durchlauf vor weniger als {self._window}s, ignoriert.")
+                return False
+            self._pending = True
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(reason,), name="resend", daemon=True)
+            self._thread.start()
+        _RESENDS.labels(reason, "run").inc()
+        return True
+
+    def throttle(self) -> None:
+        """Vor jeder Nachricht aufrufen. Wartet im Resend Thread, bis das aktuelle Plugin wieder senden darf."""
+        if self._budget <= 0 or threading.current_thread() is not self._thread:
+            return
+        now = time.monotonic()
+        self._tokens = min(self._budget, self._tokens + (now - self._refilled) * self._budget)
+        self._refilled = now
+        if self._tokens < 1:
+            self._stop.wait((1 - self._tokens) / self._budget)
+            self._tokens = 1.0
+            self._refilled = time.monotonic()
+        self._tokens -= 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(5)
+
+    def _run(self, reason: str) -> None:
+        while True:
+            delay = random.uniform(0, self._jitter)
+            self._log.info(f"{reason}: Sende alle States in {delay:.1f}s neu.")
+            if self._stop.wait(delay):
+                return
+            with self._lock:
+                self._pending = False
+                self._again = False
+            self._send_paced()
+            with self._lock:
+                if not self._again or self._stop.is_set():
+                    self._last_done = time.monotonic()
+                    return
+                self._pending = True
+            reason = "queued"
+
+    def _send_paced(self) -> None:
+        start = time.monotonic()
+        total = 0.0
+        for key in self._plugins():
+            if self._stop.is_set():
+                return
+            before = self._published()
+            begin = time.monotonic()
+            # Jedes Plugin beginnt mit einer Sekunde Budget
+            self._tokens = self._budget
+            self._refilled = begin
+            self._send(key)
+            sent = self._published() - before
+            total += sent
+            if self._budget > 0:
+                wait = sent / self._budget - (time.monotonic() - begin)
+                if wait > 0 and self._stop.wait(wait):
+                    return
+        self._log.info(f"{total:.0f} Nachrichten in {time.monotonic() - start:.1f}s neu gesendet.")
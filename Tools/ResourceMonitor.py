@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import schedule
+
+import Tools.Autodiscovery as autodisc
+from Tools import Metrics
+from Tools.PublishPipeline import Priority
+
+if TYPE_CHECKING:
+    from Tools.PluginManager import PluginManager
+
+try:
+    _CLK_TCK = os.sysconf("SC_CLK_TCK")
+    _PAGESIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _CLK_TCK = 100
+    _PAGESIZE = 4096
+
+_THREAD_CPU = Metrics.gauge("thread_cpu_ratio", "CPU Anteil pro Thread im letzten Intervall", ("thread",))
+_PROCESS_CPU = Metrics.gauge("process_cpu_ratio", "CPU Anteil des Prozesses im letzten Intervall")
+_RSS = Metrics.gauge("process_rss_bytes", "Resident Set Size des Prozesses")
+_PLUGIN_MEMORY = Metrics.gauge("plugin_memory_bytes", "Von tracemalloc einem Plugin zugeordneter Speicher", ("plugin",))
+
+
+def read_task_times(task_dir: str = "/proc/self/task") -> dict[int, float]:
+    """CPU Sekunden (utime + stime) pro Thread ID."""
+    times: dict[int, float] = {}
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return times
+    for tid in tids:
+        try:
+            with open(f"{task_dir}/{tid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            # Thread ist inzwischen beendet
+            continue
+        # comm kann Leerzeichen und Klammern enthalten, die Felder danach sind eindeutig
+        fields = stat[stat.rfind(b")") + 2:].split()
+        times[int(tid)] = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return times
+
+
+def read_rss() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGESIZE
+    except (OSError, IndexError, ValueError):
+        import resource
+        # ru_maxrss ist in KiB und nur der Höchstwert, besser als nichts
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _thread_names() -> dict[int, str]:
+    names = {t.native_id: t.name for t in threading.enumerate() if t.native_id is not None}
+    names.setdefault(os.getpid(), "MainThread")
+    return names
+
+
+def _comm(tid: int, task_dir: str = "/proc/self/task") -> str:
+    try:
+        with open(f"{task_dir}/{tid}/comm", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return f"tid-{tid}"
+
+
+def plugin_of(filename: str) -> str:
+    parts = Path(filename).parts
+    for i, part in enumerate(parts[:-1]):
+        if part == "Mods":
+            return parts[i + 1].removesuffix(".py")
+    if "Tools" in parts:
+        return "core"
+    return "other"
+
+
+class ResourceMonitor:
+    """
+    Misst alle interval Sekunden die CPU Zeit pro Thread aus /proc/self/task/*/stat
+    und die RSS des Prozesses. Mit tracemalloc_frames > 0 wird zusätzlich per tracemalloc
+    der Speicher den Plugins unter Mods/ zugeordnet (kostet spürbar CPU und Speicher).
+    Threads mit dem selben Namen werden zusammengezählt.
+    """
+
+    def __init__(self, pm: "PluginManager", logger: logging.Logger, interval: int = 120, tracemalloc_frames: int = 0):
+        self._pm = pm
+        self._log = logger.getChild("Resources")
+        self._interval = max(5, int(interval))
+        self._frames = max(0, int(tracemalloc_frames))
+        self._lock = threading.Lock()
+        self._last_times: dict[int, float] = {}
+        self._last_wall = 0.0
+        self._memory_baseline: dict[str, int] | None = None
+        self._last: dict[str, Any] = {}
+        self._job: schedule.Job | None = None
+        self._topics: dict[str, autodisc.Topics] = {}
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self._frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+            self._started_tracemalloc = True
+        self.sample()
+        if self._job is None:
+            self._job = schedule.every(self._interval).seconds.do(self._tick)
+        self._log.info(f"Ressourcen werden alle {self._interval}s gemessen.")
+
+    def stop(self) -> None:
+        if self._job is not None:
+            schedule.cancel_job(self._job)
+            self._job = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def last(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._last)
+
+    def _plugin_memory(self) -> dict[str, int]:
+        snapshot = tracemalloc.take_snapshot()
+        memory: dict[str, int] = {}
+        for stat in snapshot.statistics("traceback"):
+            # Dem innersten Frame aus einem Plugin zuordnen, json, paho usw. allokieren im Auftrag von Plugins
+            owner = None
+            for frame in reversed(stat.traceback):
+                owner = plugin_of(frame.filename)
+                if owner not in ("core", "other"):
+                    break
+            memory[owner or "other"] = memory.get(owner or "other", 0) + stat.size
+        return memory
+
+    def sample(self) -> dict[str, Any]:
+        now = time.monotonic()
+        times = read_task_times()
+        names = _thread_names()
+        elapsed = now - self._last_wall if self._last_wall > 0 else 0.0
+        cpu_seconds: dict[str, float] = {}
+        cpu: dict[str, float] = {}
+        for tid, secs in times.items():
+            name = names.get(tid, None) or _comm(tid)
+            cpu_seconds[name] = cpu_seconds.get(name, 0.0) + secs
+            if elapsed > 0:
+                # Neue Threads zählen ab ihrem Start
+                delta = secs - self._last_times.get(tid, 0.0)
+                cpu[name] = cpu.get(name, 0.0) + max(0.0, delta) / elapsed
+        self._last_times = times
+        self._last_wall = now
+
+        result: dict[str, Any] = {
+            "time": time.time(),
+            "rss": read_rss(),
+            "cpu": {n: round(v, 4) for n, v in sorted(cpu.items(), key=lambda i: -i[1])},
+            "cpu_seconds": {n: round(v, 2) for n, v in cpu_seconds.items()},
+        }
+        _RSS.set(result["rss"])
+        if elapsed > 0:
+            _PROCESS_CPU.set(sum(cpu.values()))
+            # Beendete Threads auf 0, sonst bleibt ihr letzter Wert stehen
+            for name in self._last.get("cpu", {}):
+                if name not in cpu:
+                    _THREAD_CPU.labels(name).set(0)
+            for name, ratio in cpu.items():
+                _THREAD_CPU.labels(name).set(ratio)
+
+        if tracemalloc.is_tracing():
+            memory = self._plugin_memory()
+            if self._memory_baseline is None:
+                self._memory_baseline = dict(memory)
+            result["memory"] = memory
+            # Wachstum seit der ersten Messung, zeigt Lecks über Wochen
+            result["memory_growth"] = {p: s - self._memory_baseline.get(p, 0) for p, s in memory.items()}
+            for plugin, size in memory.items():
+                _PLUGIN_MEMORY.labels(plugin).set(size)
+
+        with self._lock:
+            self._last = result
+        return result
+
+    def write(self, path: Path) -> None:
+        path.write_text(json.dumps(self.last(), indent=2), encoding="utf-8")
+
+    def register(self) -> None:
+        """Diagnose Sensoren für Home Assistant, die Details stehen als Attribute drin."""
+        sensors = [
+            ("cpu", "CPU", "%", "mdi:cpu-64-bit"),
+            ("rss", "RSS", "MiB", "mdi:memory"),
+        ]
+        if tracemalloc.is_tracing():
+            sensors.append(("memory", "Plugin Speicher", "MiB", "mdi:memory"))
+        for key, name, unit, icon in sensors:
+            topics = self._pm.config.get_autodiscovery_topic(autodisc.Component.SENSOR, f"diag_res_{key}", autodisc.SensorDeviceClasses.GENERIC_SENSOR)
+            payload = topics.get_config_payload(
+                name, unit, value_template="{{ value_json.value }}", json_attributes=True,
+                unique_id=f"sensor.MqttScripts{self._pm._client_name}.diag.res_{key}", icon=icon,
+                append_data={"entity_category": "diagnostic", "state_class": "measurement"}
+            )
+            self._pm.publish_discovery(topics.config, payload)
+            self._topics[key] = topics
+        self.send()
+
+    def _tick(self) -> None:
+        self.sample()
+        try:
+            self.write(self._pm.config.getIndependendPath("resources").with_suffix(".json"))
+        except OSError:
+            self._log.exception("Ressourcen Bericht konnte nicht geschrieben werden!")
+        self.send()
+
+    def send(self) -> None:
+        last = self.last()
+        if len(last) == 0:
+            return
+        states = {
+            "cpu": {"value": round(sum(last["cpu"].values()) * 100, 1), "threads": {n: round(v * 100, 1) for n, v in last["cpu"].items()}},
+            "rss": {"value": round(last["rss"] / 1048576, 1)},
+            "memory": {
+                "value": round(sum(last.get("memory", {}).values()) / 1048576, 1),
+                "plugins": {p: round(s / 1048576, 2) for p, s in last.get("memory", {}).items()},
+                "growth": {p: round(s / 1048576, 2) for p, s in last.get("memory_growth", {}).items()},
+            },
+        }
+        for key, topics in self._topics.items():
+            self._pm.publish(topics.state, payload=json.dumps(states[key]), priority=Priority.TELEMETRY)
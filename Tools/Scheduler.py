@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import contextvars
+import dataclasses
+import datetime
+import enum
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import schedule
+
+from Tools import Metrics
+
+_LATENESS = Metrics.histogram("scheduler_lateness_seconds", "Verspätung fälliger Jobs")
+_DURATION = Metrics.histogram("scheduler_job_seconds", "Laufzeit der Jobs")
+_OVERRUNS = Metrics.counter("scheduler_overruns_total", "Jobs die fällig wurden während sie noch liefen")
+_FAILURES = Metrics.counter("scheduler_failures_total", "Jobs die mit einer Exception endeten")
+
+# Jobs die an die Uhrzeit gebunden sind (.at(), Tage, Wochen) werden spätestens
+# nach so vielen Sekunden neu bewertet, damit NTP Sprünge nach dem Booten greifen.
+WALLCLOCK_RECHECK = 60.0
+
+# Wem neu angelegte Jobs gehören, der PluginManager setzt hier den Plugin Key
+current_owner: contextvars.ContextVar[str | None] = contextvars.ContextVar("scheduler_owner", default=None)
+
+
+class OverrunPolicy(enum.Enum):
+    # Fälligen Lauf verwerfen solange der vorherige noch läuft
+    SKIP = "skip"
+    # Jeden fälligen Lauf nachholen
+    QUEUE = "queue"
+    # Höchstens einen Lauf nachholen
+    COALESCE = "coalesce"
+
+
+@dataclasses.dataclass(slots=True)
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    overruns: int = 0
+    skipped: int = 0
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_lateness: float = 0.0
+    max_lateness: float = 0.0
+    running: bool = False
+    pending: int = 0
+
+
+def cancel_owned(job_owner: str) -> int:
+    """Alle Jobs entfernen die angelegt wurden während current_owner auf job_owner gesetzt war."""
+    scheduler = schedule.default_scheduler
+    jobs = [job for job in list(scheduler.jobs) if getattr(job, "owner", None) == job_owner]
+    for job in jobs:
+        scheduler.cancel_job(job)
+    return len(jobs)
+
+
+def set_policy(job: schedule.Job, policy: OverrunPolicy) -> schedule.Job:
+    """Legt fest was passiert wenn job fällig wird während er noch läuft."""
+    job.overrun_policy = policy
+    return job
+
+
+class _JobList(list):
+    """schedule.Scheduler.jobs, die den HeapScheduler über jede Änderung informiert."""
+
+    def __init__(self, owner: "HeapScheduler", jobs=()):
+        super().__init__(jobs)
+        self._owner = owner
+
+    def append(self, job: schedule.Job) -> None:
+        if getattr(job, "owner", None) is None:
+            job.owner = current_owner.get()
+        with self._owner._cond:
+            super().append(job)
+            self._owner._push(job)
+
+    def remove(self, job: schedule.Job) -> None:
+        with self._owner._cond:
+            super().remove(job)
+            self._owner._forget()
+
+    def clear(self) -> None:
+        with self._owner._cond:
+            super().clear()
+            self._owner._forget()
+
+    def __setitem__(self, key, value) -> None:
+        with self._owner._cond:
+            super().__setitem__(key, value)
+            self._owner._forget()
+
+    def __delitem__(self, key) -> None:
+        with self._owner._cond:
+            super().__delitem__(key)
+            self._owner._forget()
+
+
+class HeapScheduler(schedule.Scheduler):
+    """
+    Ersatz für schedule.default_scheduler.
+    Statt jede Sekunde run_pending() aufzurufen liegen die Jobs in einem Heap nach
+    monotonic() Fälligkeit. Der Thread schläft bis zum nächsten Job und wird geweckt,
+    sobald Jobs hinzugefügt oder entfernt werden.
+    Fällige Jobs werden auf einem Worker Pool ausgeführt, der nächste Lauf wird schon
+    beim Start geplant. Läuft ein Job noch wenn er wieder fällig wird, entscheidet
+    seine OverrunPolicy.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None, workers: int = 4,
+                 default_policy: OverrunPolicy = OverrunPolicy.COALESCE) -> None:
+        self._cond = threading.Condition(threading.RLock())
+        self._heap: list[tuple[float, int, schedule.Job]] = []
+        self._entries: dict[schedule.Job, int] = {}
+        self._stats: dict[schedule.Job, JobStats] = {}
+        self._workers = max(1, int(workers))
+        self._pool: concurrent.futures.ThreadPoolExecutor | None = None
+        self.default_policy = default_policy
+        self._seq = itertools.count()
+        self._log = logger if logger is not None else logging.getLogger("Launch.Scheduler")
+        super().__init__()
+        self.jobs = _JobList(self)
+
+    def set_logger(self, logger: logging.Logger) -> None:
+        self._log = logger.getChild("Scheduler")
+
+    @staticmethod
+    def _is_wallclock(job: schedule.Job) -> bool:
+        return job.at_time is not None or job.unit in ("days", "weeks")
+
+    def set_workers(self, workers: int) -> None:
+        with self._cond:
+            self._workers = max(1, int(workers))
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="scheduler-worker")
+        return self._pool
+
+    def _push(self, job: schedule.Job, deadline: float | None = None) -> None:
+        if job.next_run is None:
+            return
+        if deadline is None:
+            delta = (job.next_run - datetime.datetime.now()).total_seconds()
+            deadline = time.monotonic() + max(0.0, delta)
+        seq = next(self._seq)
+        self._entries[job] = seq
+        self._stats.setdefault(job, JobStats())
+        heapq.heappush(self._heap, (deadline, seq, job))
+        self._cond.notify_all()
+
+    def _forget(self) -> None:
+        present = set(self.jobs)
+        self._entries = {job: seq for job, seq in self._entries.items() if job in present}
+        self._stats = {job: st for job, st in self._stats.items() if job in present}
+        self._cond.notify_all()
+
+    def metrics(self) -> dict[str, dict]:
+        """Laufzeit und Verspätung aller Jobs in Sekunden."""
+        with self._cond:
+            return {self.job_name(job): dataclasses.asdict(st) for job, st in self._stats.items()}
+
+    @staticmethod
+    def job_name(job: schedule.Job) -> str:
+        func = getattr(job.job_func, "__qualname__", None) or repr(job)
+        return f"{func}@{id(job):x}"
+
+    def wakeup(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _next_due(self) -> tuple[schedule.Job | None, float | None]:
+        while len(self._heap) > 0:
+            deadline, seq, job = self._heap[0]
+            if self._entries.get(job, None) != seq:
+                heapq.heappop(self._heap)
+                continue
+            now = time.monotonic()
+            wait = deadline - now
+            if wait > 0:
+                if self._is_wallclock(job):
+                    # Uhr wurde vorgestellt (NTP nach dem Booten), neu einordnen
+                    wall = (job.next_run - datetime.datetime.now()).total_seconds()
+                    if wall < wait - 1.0:
+                        heapq.heappop(self._heap)
+                        self._push(job, deadline=now + max(0.0, wall))
+                        continue
+                    wait = min(wait, WALLCLOCK_RECHECK)
+                return None, wait
+            heapq.heappop(self._heap)
+            if self._is_wallclock(job) and not job.should_run:
+                self._push(job)
+                continue
+            self._stats.setdefault(job, JobStats()).last_lateness = now - deadline
+            return job, None
+        return None, None
+
+    def _dispatch(self, job: schedule.Job, inline: bool = False) -> None:
+        """Nächsten Lauf planen und job_func ausführen, unter Beachtung der OverrunPolicy."""
+        with self._cond:
+            st = self._stats.setdefault(job, JobStats())
+            st.max_lateness = max(st.max_lateness, st.last_lateness)
+            _LATENESS.observe(st.last_lateness)
+            if job._is_overdue(datetime.datetime.now()):
+                self.cancel_job(job)
+                return
+            cancel_after = False
+            try:
+                job._schedule_next_run()
+                cancel_after = job._is_overdue(job.next_run)
+            except Exception:
+                self._log.exception(f"Job {job} kann nicht neu geplant werden!")
+                cancel_after = True
+            if job in self._entries and not cancel_after:
+                self._push(job)
+            if st.running:
+                st.overruns += 1
+                _OVERRUNS.inc()
+                policy = getattr(job, "overrun_policy", self.default_policy)
+                if policy == OverrunPolicy.SKIP:
+                    st.skipped += 1
+                    self._log.debug(f"Job {job} läuft noch. Überspringe.")
+                elif policy == OverrunPolicy.QUEUE:
+                    st.pending += 1
+                else:
+                    st.pending = 1
+                if cancel_after:
+                    self.cancel_job(job)
+                return
+            st.running = True
+        if inline:
+            self._work(job, cancel_after)
+        else:
+            self._get_pool().submit(self._work, job, cancel_after)
+
+    def _work(self, job: schedule.Job, cancel_after: bool) -> None:
+        while True:
+            start = time.monotonic()
+            ret = None
+            failed = False
+            try:
+                ret = job.job_func()
+            except Exception:
+                failed = True
+                self._log.exception(f"Job {job} ist fehlgeschlagen!")
+            duration = time.monotonic() - start
+            _DURATION.observe(duration)
+            if failed:
+                _FAILURES.inc()
+            job.last_run = datetime.datetime.now()
+            with self._cond:
+                st = self._stats.get(job, None) or JobStats()
+                st.runs += 1
+                st.failures += 1 if failed else 0
+                st.last_duration = duration
+                st.max_duration = max(st.max_duration, duration)
+                st.total_duration += duration
+                if cancel_after or isinstance(ret, schedule.CancelJob) or ret is schedule.CancelJob:
+                    st.running = False
+                    st.pending = 0
+                    self.cancel_job(job)
+                    return
+                if st.pending > 0 and job in self._entries:
+                    st.pending -= 1
+                    continue
+                st.running = False
+                st.pending = 0
+                return
+
+    def run_pending(self) -> None:
+        while True:
+            with self._cond:
+                job, _ = self._next_due()
+            if job is None:
+                return
+            self._dispatch(job, inline=True)
+
+    def run_continuously(self, cease: threading.Event) -> None:
+        self._log.debug("HeapScheduler run()")
+        while not cease.is_set():
+            with self._cond:
+                job, wait = self._next_due()
+                if job is None:
+                    if not cease.is_set():
+                        self._cond.wait(wait)
+                    continue
+            self._dispatch(job)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._log.debug("HeapScheduler exit()")
+
+
+class _WakingEvent(threading.Event):
+    def __init__(self, scheduler: HeapScheduler):
+        super().__init__()
+        self._scheduler = scheduler
+
+    def set(self) -> None:
+        super().set()
+        self._scheduler.wakeup()
+
+
+def install(logger: logging.Logger | None = None) -> HeapScheduler:
+    """HeapScheduler als schedule.default_scheduler setzen. Bereits vorhandene Jobs werden übernommen."""
+    current = schedule.default_scheduler
+    if isinstance(current, HeapScheduler):
+        if logger is not None:
+            current.set_logger(logger)
+        return current
+    heap = HeapScheduler(logger.getChild("Scheduler") if logger is not None else None)
+    for job in list(current.jobs):
+        job.scheduler = heap
+        heap.jobs.append(job)
+    current.jobs.clear()
+    schedule.default_scheduler = heap
+    return heap
+
+
+def start(logger: logging.Logger, name: str = "scheduler", workers: int = 4) -> tuple[threading.Event, threading.Thread]:
+    heap = install(logger)
+    heap.set_workers(workers)
+    cease = _WakingEvent(heap)
+    thread = threading.Thread(target=heap.run_continuously, args=(cease,), name=name)
+    thread.start()
+    return cease, thread
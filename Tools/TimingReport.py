@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+
+class TimingReport:
+    """
+    Sammelt pro Plugin die Dauer der einzelnen Startphasen
+    (import, getPlugin, register, sendStates) und Zeitpunkte relativ zum Launch.
+    """
+    PHASE_IMPORT = "import"
+    PHASE_GET_PLUGIN = "getPlugin"
+    PHASE_REGISTER = "register"
+    PHASE_SEND_STATES = "sendStates"
+
+    def __init__(self, logger: logging.Logger, launch_time: float | None = None):
+        self._log = logger.getChild("Timing")
+        self._lock = threading.Lock()
+        self._launch = launch_time if launch_time is not None else time.monotonic()
+        self._plugins: dict[str, dict[str, float]] = {}
+        self._events: dict[str, float] = {}
+        self._overdue: dict[str, list[str]] = {}
+        self.connect_count = 0
+
+    def record(self, plugin: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._plugins.setdefault(plugin, {})[phase] = round(seconds, 4)
+
+    def mark(self, event: str) -> float:
+        """Zeitpunkt seit Launch für event merken."""
+        since = time.monotonic() - self._launch
+        with self._lock:
+            self._events[event] = round(since, 4)
+        return since
+
+    def overdue(self, phase: str, plugins: list[str]) -> None:
+        with self._lock:
+            self._overdue[phase] = list(plugins)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "connect_count": self.connect_count,
+                "events": dict(self._events),
+                "plugins": {k: dict(v) for k, v in self._plugins.items()},
+                "overdue": {k: list(v) for k, v in self._overdue.items()}
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def write(self, path: Path) -> None:
+        try:
+            path.write_text(self.to_json(), encoding="utf-8")
+            self._log.debug(f"Startbericht nach {path} geschrieben.")
+        except OSError:
+            self._log.exception(f"Startbericht {path} konnte nicht geschrieben werden!")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from typing import Any, Callable
+
+import paho.mqtt.client as mclient
+
+from Tools import Metrics
+
+MessageCallback = Callable[[mclient.Client, Any, mclient.MQTTMessage], None]
+
+_RECEIVED = Metrics.counter("mqtt_received_total", "Empfangene MQTT Nachrichten")
+_UNROUTED = Metrics.counter("mqtt_unrouted_total", "Empfangene MQTT Nachrichten ohne Handler")
+
+
+class _Node:
+    __slots__ = ("children", "handler")
+
+    def __init__(self) -> None:
+        self.children: dict[str, "_Node"] = {}
+        self.handler: MessageCallback | None = None
+
+
+def validate_filter(topic_filter: str) -> list[str]:
+    levels = topic_filter.split("/")
+    for i, level in enumerate(levels):
+        if "#" in level and (level != "#" or i != len(levels) - 1):
+            raise ValueError(f"# muss alleine auf der letzten Ebene stehen: {topic_filter}")
+        if "+" in level and level != "+":
+            raise ValueError(f"+ muss eine ganze Ebene sein: {topic_filter}")
+    return levels
+
+
+class TopicRouter:
+    """
+    Ordnet eingehende Nachrichten über einen Baum aus Topic Ebenen ihren Handlern zu.
+    Die Suche kostet nur so viele Schritte wie das Topic Ebenen hat, egal wie viele
+    Handler registriert sind. + und # werden wie beim Broker behandelt.
+    Pro Filter gibt es, wie bei Client.message_callback_add, genau einen Handler.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._log = logger.getChild("Router")
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, topic_filter: str, handler: MessageCallback) -> None:
+        levels = validate_filter(topic_filter)
+        with self._lock:
+            node = self._root
+            for level in levels:
+                node = node.children.setdefault(level, _Node())
+            if node.handler is None:
+                self._count += 1
+            node.handler = handler
+
+    def remove(self, topic_filter: str) -> bool:
+        levels = validate_filter(topic_filter)
+        with self._lock:
+            path = [self._root]
+            for level in levels:
+                node = path[-1].children.get(level, None)
+                if node is None:
+                    return False
+                path.append(node)
+            if path[-1].handler is None:
+                return False
+            path[-1].handler = None
+            self._count -= 1
+            # Leere Äste wieder abbauen
+            for i in range(len(levels), 0, -1):
+                node = path[i]
+                if node.handler is not None or len(node.children) > 0:
+                    break
+                del path[i - 1].children[levels[i - 1]]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root = _Node()
+            self._count = 0
+
+    def match(self, topic: str) -> list[MessageCallback]:
+        levels = topic.split("/")
+        found: list[MessageCallback] = []
+        with self._lock:
+            nodes = [self._root]
+            for i, level in enumerate(levels):
+                # Topics mit $ am Anfang werden von Wildcards auf oberster Ebene nicht erfasst
+                wildcards = i > 0 or not level.startswith("$")
+                step = []
+                for node in nodes:
+                    if wildcards:
+                        multi = node.children.get("#", None)
+                        if multi is not None and multi.handler is not None:
+                            found.append(multi.handler)
+                        single = node.children.get("+", None)
+                        if single is not None:
+                            step.append(single)
+                    exact = node.children.get(level, None)
+                    if exact is not None:
+                        step.append(exact)
+                nodes = step
+                if len(nodes) == 0:
+                    return found
+            for node in nodes:
+                if node.handler is not None:
+                    found.append(node.handler)
+                # "a/#" passt auch auf "a"
+                multi = node.children.get("#", None)
+                if multi is not None and multi.handler is not None:
+                    found.append(multi.handler)
+        return found
+
+    def on_message(self, client: mclient.Client, userdata: Any, message: mclient.MQTTMessage) -> None:
+        """Als Client.on_message setzen."""
+        _RECEIVED.inc()
+        handlers = self.match(message.topic)
+        if len(handlers) == 0:
+            _UNROUTED.inc()
+            self._log.debug(f"Keine Route für {message.topic}")
+            return
+        for handler in handlers:
+            try:
+                handler(client, userdata, message)
+            except Exception:
+                self._log.exception(f"Handler für {message.topic} ist fehlgeschlagen!")
@@ -0,0 +1,51 @@
+# Vergleicht die Kosten eines Konfig Zugriffs über den alten Weg (Pfad bei jedem Zugriff
+# zerlegen und durchlaufen) mit ConfigPath. Aufruf aus dem Repo Verzeichnis:
+#   python resources/bench_config.py
+import logging
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Tools.Config as tc
+
+N = 200000
+
+tmp = Path(tempfile.mkdtemp()) / "bench.config"
+tmp.write_text("{}")
+config = tc.BasicConfig(tmp, logging.getLogger("bench"), do_load=True, filesystem_listen=False)
+config["PiMotion/MotionDedector/area"] = 25
+config["w1t/w1t/stat/28-000001/min"] = 21.5
+browser = config._dict_browser
+pconf = tc.PluginConfig(config, "w1t")
+area = config.path("PLUGINS/PiMotion/MotionDedector/area")
+stat = pconf.path("w1t/stat/28-000001/min")
+
+
+def old_get(key: str, default):
+    # DictBrowser.get vor ConfigPath: zwei mal zerlegen und durchlaufen
+    t = browser._walk_getitem(key)
+    if t is None and default is not None:
+        browser._walk_set(key, default)
+    return browser._walk_getitem(key)
+
+
+def old_plugin_get(key: str, default):
+    # PluginConfig.get -> PluginConfig[] -> BasicConfig[] -> DictBrowser[]
+    return old_get("PLUGINS/{}".format("w1t/{}".format(key)), default)
+
+
+cases = [
+    ("BasicConfig.get (alt)", lambda: old_get("PLUGINS/PiMotion/MotionDedector/area", 25)),
+    ("BasicConfig.get (neu)", lambda: config.get("PLUGINS/PiMotion/MotionDedector/area", 25)),
+    ("ConfigPath.get", lambda: area.get(25)),
+    ("PluginConfig.get (alt)", lambda: old_plugin_get("w1t/stat/28-000001/min", "RESET")),
+    ("PluginConfig.get (neu)", lambda: pconf.get("w1t/stat/28-000001/min", "RESET")),
+    ("PluginConfig ConfigPath.get", lambda: stat.get("RESET")),
+]
+
+for name, func in cases:
+    secs = min(timeit.repeat(func, number=N, repeat=5))
+    print(f"{name:32s} {secs / N * 1e9:8.0f} ns")
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Tools.Config as tc
+
+CLIENT = {
+    "host": "localhost", "port": 1883, "client_id": "test", "clean_session": True,
+    "CA": None, "CERT": None, "KEY": None, "USER": None, "PW": None, "autodiscovery": "homeassistant",
+}
+
+
+class FakeInfo:
+    def __init__(self, mid: int):
+        self.rc = 0
+        self.mid = mid
+
+    def is_published(self) -> bool:
+        return True
+
+    def wait_for_publish(self, timeout=None) -> None:
+        pass
+
+
+class FakeClient:
+    """Nimmt publish() und subscribe() entgegen wie ein verbundener paho Client."""
+
+    def __init__(self):
+        self.published: list[tuple[str, object, bool]] = []
+        self.subscribed: list[str] = []
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        self.published.append((topic, payload, retain))
+        return FakeInfo(len(self.published))
+
+    def subscribe(self, topic, qos=0, options=None, properties=None):
+        self.subscribed.append(topic)
+        return 0, len(self.subscribed)
+
+    def payloads(self, topic: str) -> list:
+        return [p for t, p, _ in self.published if t == topic]
+
+
+@pytest.fixture
+def logger() -> logging.Logger:
+    return logging.getLogger("test")
+
+
+@pytest.fixture
+def make_config(tmp_path, logger):
+    def make(content: dict | None = None, name: str = "test.config", **kwargs) -> tc.BasicConfig:
+        path = tmp_path / name
+        data = {"CLIENT": dict(CLIENT)}
+        data.update(content or {})
+        path.write_text(json.dumps(data))
+        kwargs.setdefault("filesystem_listen", False)
+        return tc.config_factory(pfad=path, logger=logger, do_load=True, **kwargs)
+    return make
+
+
+@pytest.fixture
+def make_pm(make_config, logger):
+    import Tools.PluginManager as pman
+    managers = []
+
+    def make(content: dict | None = None):
+        pm = pman.PluginManager(logger, make_config(content))
+        managers.append(pm)
+        return pm
+    yield make
+    for pm in managers:
+        pm._publisher.stop(flush=False)
+        pm.dispatcher.shutdown()
+        pm.aio.stop()
+        if pm._offline_queue is not None:
+            pm._offline_queue.close()
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import threading
+
+
+class _AsyncPlugin:
+    def __init__(self):
+        self.done = threading.Event()
+
+    async def disconnected(self):
+        self.done.set()
+
+
+def test_disconnected_from_loop_thread(make_pm):
+    pm = make_pm()
+    plugin = _AsyncPlugin()
+    pm.configured_list["fake"] = plugin
+    # Mit external_loop läuft disconnect_callback im asyncio Thread
+    pm.aio.loop.call_soon_threadsafe(pm.send_disconnected_to_mods)
+    assert plugin.done.wait(5)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import json
+
+import Tools.Config as tc
+
+from conftest import CLIENT
+
+
+class _Config(tc.FileWatchingConfig):
+    def __init__(self, *args, **kwargs):
+        self.changes = []
+        super().__init__(*args, **kwargs)
+
+    def plugins_changed(self, changes):
+        self.changes.append(changes)
+        return True
+
+    def post_reload(self):
+        self.changes.append(None)
+
+
+def _write(path, plugins):
+    path.write_text(json.dumps({"CLIENT": dict(CLIENT), "PLUGINS": plugins}))
+
+
+def test_plugin_changes():
+    old = {"CLIENT": {"host": "a"}, "PLUGINS": {"a": {"x": 1}, "b": {}, "c": {}}}
+    new = {"CLIENT": {"host": "a"}, "PLUGINS": {"a": {"x": 2}, "b": {}, "d": {}}}
+    assert tc.plugin_changes(old, new) == {"a": "changed", "c": "removed", "d": "added"}
+    assert tc.plugin_changes(old, old) == {}
+    assert tc.plugin_changes(old, dict(new, CLIENT={"host": "b"})) is None
+
+
+def test_reload_diffs_against_file_not_memory(tmp_path, logger):
+    path = tmp_path / "test.config"
+    _write(path, {"a": {"x": 1}, "b": {"y": 1}})
+    config = _Config(path, logger, do_load=True, filesystem_listen=False)
+    # Defaults aus get() und ungespeicherte Änderungen eines Plugins
+    assert config.get("PluginManager/profiler/hz", 5) == 5
+    config["a/x"] = 2
+
+    _write(path, {"a": {"x": 1}, "b": {"y": 2}})
+    config.load(reload=True)
+    assert config.changes == [{"b": "changed"}]
+    assert config["a/x"] == 2
+    assert config["b/y"] == 2
+
+
+def test_reload_after_own_save(tmp_path, logger):
+    path = tmp_path / "test.config"
+    _write(path, {"a": {"x": 1}, "b": {"y": 1}})
+    config = _Config(path, logger, do_load=True, filesystem_listen=False)
+    config["a/x"] = 2
+    config.save(wait=True)
+
+    data = json.loads(path.read_text())
+    data["PLUGINS"]["b"]["y"] = 2
+    path.write_text(json.dumps(data))
+    config.load(reload=True)
+    assert config.changes == [{"b": "changed"}]
+
+
+def test_config_path_sees_dicts_replaced_directly():
+    browser = tc.DictBrowser({"a": {"b": {"c": 1}}})
+    path = browser.path("a/b/c")
+    assert path.get() == 1
+    # Plugins ersetzen Abschnitte ohne den DictBrowser
+    browser["a"]["b"] = {"c": 2}
+    assert browser["a/b/c"] == 2
+    browser["a/b/c"] = 3
+    assert browser._dict == {"a": {"b": {"c": 3}}}
+    assert path.get() == 3
+    browser._dict["a"] = {"b": {"c": 4}}
+    assert path.get() == 4
+
+
+def test_config_path_read_does_not_create_levels():
+    browser = tc.DictBrowser({})
+    assert browser["x/y/z"] is None
+    assert browser._dict == {}
+    assert browser.get("x/y/z", 5) == 5
+    assert browser._dict == {"x": {"y": {"z": 5}}}
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from conftest import FakeClient
+
+
+class _Plugin:
+    def __init__(self):
+        self.registered = 0
+
+    def set_pluginManager(self, pm):
+        pass
+
+    def register(self, wasConnected=False):
+        self.registered += 1
+
+    def sendStates(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def disconnected(self):
+        pass
+
+
+def test_late_plugins_register_once(make_pm):
+    pm = make_pm()
+    before = _Plugin()
+    pm._late_plugin("before", before, None)
+    assert before.registered == 0
+
+    pm._connect_callback(FakeClient(), None, {}, 0)
+    assert before.registered == 1
+
+    after = _Plugin()
+    pm._late_plugin("after", after, None)
+    assert after.registered == 1
+    assert before.registered == 1
+    assert [key for key, _ in pm._plugins()] == ["before", "after"]
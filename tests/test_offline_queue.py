@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from Tools.OfflineQueue import OfflineQueue
+
+from conftest import FakeClient
+
+
+def test_peek_ack_in_order(tmp_path, logger):
+    queue = OfflineQueue(tmp_path / "q.sqlite", logger)
+    for i in range(5):
+        queue.append("t/{}".format(i), str(i), qos=1, retain=i == 4)
+    batch = queue.peek(3)
+    assert [m.topic for m in batch] == ["t/0", "t/1", "t/2"]
+    assert batch[0].payload == b"0" and batch[0].qos == 1
+    queue.ack(batch[-1].id)
+    assert len(queue) == 2
+    rest = queue.peek(10)
+    assert [m.topic for m in rest] == ["t/3", "t/4"]
+    assert rest[-1].retain
+    assert queue.stats()["replayed"] == 3
+    queue.close()
+
+
+def test_survives_restart(tmp_path, logger):
+    queue = OfflineQueue(tmp_path / "q.sqlite", logger)
+    queue.append("a", b"1")
+    queue.append("b", None)
+    size = queue.bytes
+    queue.close()
+    queue = OfflineQueue(tmp_path / "q.sqlite", logger)
+    assert len(queue) == 2
+    assert queue.bytes == size
+    assert [m.payload for m in queue.peek()] == [b"1", None]
+    queue.close()
+
+
+def test_evicts_oldest_to_ninety_percent(tmp_path, logger):
+    # Jede Nachricht ist 10 Bytes groß (Topic "t" + 9 Bytes)
+    queue = OfflineQueue(tmp_path / "q.sqlite", logger, max_bytes=100)
+    for i in range(10):
+        queue.append("t", "{:09d}".format(i))
+    assert len(queue) == 10
+    queue.append("t", "{:09d}".format(10))
+    assert queue.bytes <= 90
+    assert len(queue) == 9
+    assert queue.peek(1)[0].payload == b"000000002"
+    assert queue.stats()["evicted"] == 2
+    queue.close()
+
+
+def _connect(pm, client):
+    pm._connect_callback(client, None, {}, 0)
+    if pm._replay_thread is not None:
+        pm._replay_thread.join(10)
+    pm._publisher.flush()
+
+
+class _Plugin:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+        self.pm = None
+
+    def set_pluginManager(self, pm):
+        self.pm = pm
+
+    def register(self, wasConnected=False):
+        self.pm.publish(self.topic, self.payload, retain=True)
+
+    def sendStates(self):
+        # Sendet nur bei Änderungen, nicht erneut beim Verbinden
+        pass
+
+    def stop(self):
+        pass
+
+    def disconnected(self):
+        pass
+
+
+def test_live_values_sent_after_replay(make_pm):
+    pm = make_pm({"PluginManager": {"offline_queue": {"enabled": True, "replay_rate": 1000}}})
+    pm.publish("sensor/a/state", "stored", retain=True)
+    assert len(pm._offline_queue) == 1
+    # register() beim Verbinden schickt einen neueren Wert für das selbe Topic,
+    # er geht mit dem online Status raus bevor das Nachsenden beginnt
+    pm.configured_list["fake"] = _Plugin("sensor/a/state", "live")
+    client = FakeClient()
+    _connect(pm, client)
+    assert len(pm._offline_queue) == 0
+    assert client.payloads("sensor/a/state")[-1] == "live"
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import sys
+
+import Mods
+import Tools.Config as tc
+from Tools.PluginIndex import PluginIndex, NO_PLUGIN
+
+BROKEN = '''
+import {module}
+
+
+class PluginLoader:
+    @staticmethod
+    def getConfigKey():
+        return str("broken")
+
+    @staticmethod
+    def getPlugin(opts, logger):
+        return None
+'''
+
+
+def test_failed_import_is_not_cached(make_pm, tmp_path, monkeypatch):
+    mods = tmp_path / "Mods"
+    mods.mkdir()
+    broken = mods / "pBroken.py"
+    broken.write_text(BROKEN.format(module="not_installed_package_xyz"))
+    (mods / "pNothing.py").write_text("X = 1\n")
+    monkeypatch.setattr(Mods, "__path__", [str(mods)])
+    pm = make_pm({"PLUGINS": {"broken": {}}})
+
+    assert pm.needed_plugins() == []
+    # Manifest wird im ConfigWriter Thread geschrieben
+    assert tc._WRITER.flush()
+    index = PluginIndex(pm.config, pm.logger, tmp_path)
+    assert index.lookup(mods / "pNothing.py") == NO_PLUGIN
+    assert index.lookup(broken) is None
+
+    # Paket inzwischen installiert, Datei unverändert
+    monkeypatch.setitem(sys.modules, "not_installed_package_xyz", tc)
+    assert [loader.getConfigKey() for loader in pm.needed_plugins()] == ["broken"]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import schedule
+import pytest
+
+from conftest import FakeClient
+
+
+class _Plugin:
+    """Wie Mods/CoE: Job im Konstruktor, stop() räumt nichts auf."""
+
+    def __init__(self):
+        schedule.every(5).minutes.do(self.tick)
+        self.pm = None
+
+    def tick(self):
+        pass
+
+    def offline(self):
+        pass
+
+    def on_command(self, client, userdata, message):
+        pass
+
+    def set_pluginManager(self, pm):
+        self.pm = pm
+
+    def register(self, wasConnected=False):
+        self.pm.message_callback_add("fake/set", self.on_command)
+        self.pm.addOfflineHandler(self.offline)
+
+    def sendStates(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def disconnected(self):
+        pass
+
+
+class _Loader:
+    @staticmethod
+    def getConfigKey():
+        return "fake"
+
+    @staticmethod
+    def getPlugin(opts, logger):
+        return _Plugin()
+
+
+@pytest.fixture(autouse=True)
+def clear_jobs():
+    schedule.clear()
+    yield
+    schedule.clear()
+
+
+def test_reload_removes_jobs_routes_and_handlers(make_pm):
+    pm = make_pm({"PLUGINS": {"fake": {}}})
+    pm.needed_list = [_Loader()]
+    pm._client = FakeClient()
+    pm.is_connected = True
+    # Ein Job der niemandem gehört muss bleiben
+    schedule.every(1).hours.do(lambda: None)
+
+    for _ in range(3):
+        pm.reload_plugins({"fake": "changed"})
+
+    owned = [job for job in schedule.get_jobs() if getattr(job, "owner", None) == "fake"]
+    assert len(owned) == 1
+    assert owned[0].job_func.func.__self__ is pm.configured_list["fake"]
+    assert len(schedule.get_jobs()) == 2
+    assert len(pm.router.match("fake/set")) == 1
+    assert [key for key, _ in pm._offline_handlers] == ["fake"]
+
+    pm.reload_plugins({"fake": "removed"})
+    assert "fake" not in pm.configured_list
+    assert len(schedule.get_jobs()) == 1
+    assert pm.router.match("fake/set") == []
+    assert pm._offline_handlers == []
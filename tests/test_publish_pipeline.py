@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from Tools.PublishPipeline import PublishPipeline, Priority, ClassLimit, DropPolicy
+
+from conftest import FakeClient
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+def _pipeline(logger, client, **limits):
+    return PublishPipeline(logger, lambda: client, interval=0, limits={Priority[k.upper()]: v for k, v in limits.items()})
+
+
+def test_coalesces_per_topic(logger, client):
+    pipe = _pipeline(logger, client)
+    first = pipe.publish("a", "1", qos=1, priority=Priority.TELEMETRY)
+    second = pipe.publish("a", "2", retain=True, priority=Priority.TELEMETRY)
+    assert first is second and first.coalesced == 1
+    assert pipe.flush() == 1
+    # Neuester Wert, höchste QoS und retain bleiben
+    assert client.published == [("a", "2", True)]
+    assert first.mid == 1
+    assert pipe.stats()["telemetry"]["coalesced"] == 1
+
+
+def test_flush_in_priority_order_only_when_connected(logger, client):
+    pipe = _pipeline(logger, client)
+    client.connected = False
+    pipe.publish("t", "1", priority=Priority.TELEMETRY)
+    pipe.publish("d/config", "{}", retain=True)
+    pipe.publish("s", "1", retain=True)
+    pipe.publish("ava", "online", retain=True)
+    assert pipe.flush() == 0
+    assert pipe.pending() == 4
+    client.connected = True
+    assert pipe.flush() == 4
+    assert [t for t, _, _ in client.published] == ["ava", "s", "d/config", "t"]
+
+
+def test_drop_oldest(logger, client):
+    pipe = _pipeline(logger, client, telemetry=ClassLimit(4, DropPolicy.OLDEST))
+    old = pipe.publish("a", "1", priority=Priority.TELEMETRY)
+    pipe.publish("b", "1", priority=Priority.TELEMETRY)
+    new = pipe.publish("c", "1", priority=Priority.TELEMETRY)
+    assert old.dropped and not new.dropped
+    with pytest.raises(ValueError):
+        old.wait_for_publish(0)
+    pipe.flush()
+    assert [t for t, _, _ in client.published] == ["b", "c"]
+    assert pipe.stats()["telemetry"]["dropped"] == 1
+
+
+def test_drop_newest(logger, client):
+    pipe = _pipeline(logger, client, discovery=ClassLimit(4, DropPolicy.NEWEST))
+    old = pipe.publish("a", "1", priority=Priority.DISCOVERY)
+    pipe.publish("b", "1", priority=Priority.DISCOVERY)
+    new = pipe.publish("c", "1", priority=Priority.DISCOVERY)
+    assert new.dropped and not old.dropped
+    pipe.flush()
+    assert [t for t, _, _ in client.published] == ["a", "b"]
+
+
+def test_never_drops_availability(logger, client):
+    pipe = _pipeline(logger, client, availability=ClassLimit(1, DropPolicy.NEVER))
+    handles = [pipe.publish(f"ava/{i}", "offline", retain=True) for i in range(5)]
+    assert not any(h.dropped for h in handles)
+
+
+def test_discard_class(logger, client):
+    pipe = _pipeline(logger, client)
+    ava = pipe.publish("ava", "offline", retain=True)
+    raw = pipe.publish("raw", b"offline", retain=True, priority=Priority.AVAILABILITY)
+    online = pipe.publish("ava2", "online", retain=True)
+    pipe.publish("s", "1", retain=True)
+    assert pipe.discard(Priority.AVAILABILITY, "offline") == 2
+    assert ava.dropped and raw.dropped and not online.dropped
+    pipe.flush()
+    assert client.published == [("ava2", "online", True), ("s", "1", True)]
+    assert pipe.discard(Priority.STATE) == 0
+    pipe.publish("s", "2", retain=True)
+    assert pipe.discard(Priority.STATE) == 1
+    assert pipe.stats()["state"]["depth"] == 0
+
+
+def test_online_always_before_state(logger, client):
+    pipe = _pipeline(logger, client)
+    client.connected = False
+    pipe.publish("t", "old")
+    pipe.publish("ava", "online", retain=True)
+    pipe.publish("t", "new")
+    client.connected = True
+    pipe.flush()
+    # Auch über mehrere Flushes hinweg
+    pipe.publish("ava", "online", retain=True)
+    pipe.flush()
+    pipe.publish("t", "next")
+    pipe.flush()
+    assert client.published == [("ava", "online", True), ("t", "new", False), ("ava", "online", True), ("t", "next", False)]
+
+
+def test_reconnect_drops_stale_offline(make_pm):
+    pm = make_pm()
+    pm.publish("sensor/a/available", "offline", retain=True)
+    # Während der Trennung wieder verfügbar geworden
+    pm.publish("sensor/b/available", "offline", retain=True)
+    pm.publish("sensor/b/available", "online", retain=True)
+    client = FakeClient()
+    pm.connect_callback(client, None, {}, 0)
+    pm._connected_callback_thread.join(10)
+    pm._publisher.flush()
+    assert client.payloads("sensor/a/available") == []
+    assert client.payloads("sensor/b/available") == ["online"]
+
+
+def test_discovery_counted_in_published_total(make_pm):
+    import Tools.PluginManager as pman
+    pm = make_pm()
+    before = pman._PUBLISHED.total()
+    assert pm.publish_discovery("homeassistant/sensor/x/config", "{}") is not None
+    assert pman._PUBLISHED.total() == before + 1
+    # Unverändert, wird nicht gesendet und nicht gezählt
+    assert pm.publish_discovery("homeassistant/sensor/x/config", "{}") is None
+    assert pman._PUBLISHED.total() == before + 1
+
+
+def test_dropped_discovery_forgets_hash(make_pm):
+    pm = make_pm()
+    pm._publisher._limits[Priority.DISCOVERY] = ClassLimit(64, DropPolicy.NEWEST)
+    topic = "homeassistant/sensor/x/config"
+    first = pm.publish_discovery(topic, "{}")
+    assert pm._discovery_hashes.get(topic) is not None
+    # Ersetzt den wartenden Eintrag, ist aber zu groß: beide Configs wurden nie gesendet
+    second = pm.publish_discovery(topic, "{" + "x" * 100 + "}")
+    assert first is second and second.dropped
+    assert topic not in pm._discovery_hashes
+    assert pm.publish_discovery(topic, "{}") is not None
+
+
+def test_new_session_resends_discovery(make_pm):
+    pm = make_pm()
+    topic = "homeassistant/sensor/x/config"
+    pm.publish_discovery(topic, "{}")
+    assert pm.publish_discovery(topic, "{}") is None
+    # Ohne Sitzung am Broker (z.B. mosquitto ohne Persistenz neu gestartet)
+    pm.connect_callback(FakeClient(), None, {"session present": 0}, 0)
+    pm._connected_callback_thread.join(10)
+    assert pm.publish_discovery(topic, "{}") is not None
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import time
+
+from Tools.ResendPacer import ResendPacer
+
+
+class _Plugins:
+    def __init__(self, count: int):
+        self.count = count
+        self.published = 0
+        self.pacer: ResendPacer | None = None
+        self.runs: list[tuple[str, float]] = []
+
+    def send(self, key: str) -> None:
+        start = time.monotonic()
+        for _ in range(self.count):
+            self.pacer.throttle()
+            self.published += 1
+        self.runs.append((key, time.monotonic() - start))
+
+
+def _pacer(logger, plugins: _Plugins, **kwargs) -> ResendPacer:
+    pacer = ResendPacer(logger, lambda: ["a", "b"], plugins.send, lambda: plugins.published, jitter=0, **kwargs)
+    plugins.pacer = pacer
+    return pacer
+
+
+def _wait(pacer: ResendPacer) -> None:
+    pacer._thread.join(10)
+
+
+def test_budget_applies_while_plugin_sends(logger):
+    plugins = _Plugins(count=60)
+    pacer = _pacer(logger, plugins, budget=50)
+    assert pacer.request("birth")
+    _wait(pacer)
+    # 50 sofort, die restlichen 10 mit 50 pro Sekunde
+    assert [key for key, _ in plugins.runs] == ["a", "b"]
+    assert all(duration >= 0.18 for _, duration in plugins.runs)
+
+
+def test_throttle_only_in_resend_thread(logger):
+    plugins = _Plugins(count=0)
+    pacer = _pacer(logger, plugins, budget=1)
+    start = time.monotonic()
+    for _ in range(5):
+        pacer.throttle()
+    assert time.monotonic() - start < 0.1
+
+
+def test_window_coalesces_birth_but_not_forced(logger):
+    plugins = _Plugins(count=1)
+    pacer = _pacer(logger, plugins, budget=0, window=60)
+    assert pacer.request("birth")
+    _wait(pacer)
+    assert not pacer.request("birth")
+    assert pacer.request("broadcast", force=True)
+    _wait(pacer)
+    assert len(plugins.runs) == 4
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import datetime
+import time
+
+import pytest
+
+from Tools.Scheduler import HeapScheduler, OverrunPolicy, set_policy
+
+
+@pytest.fixture
+def heap(logger):
+    heap = HeapScheduler(logger)
+    yield heap
+    heap.clear()
+
+
+def _make_due(heap, job, seconds=1):
+    job.next_run = datetime.datetime.now() - datetime.timedelta(seconds=seconds)
+    with heap._cond:
+        heap._push(job, deadline=time.monotonic() - seconds)
+
+
+def test_runs_only_due_jobs_in_order(heap):
+    ran = []
+    late = heap.every(10).seconds.do(ran.append, "late")
+    early = heap.every(10).seconds.do(ran.append, "early")
+    heap.every(1).hours.do(ran.append, "never")
+    _make_due(heap, late, 1)
+    _make_due(heap, early, 5)
+    heap.run_pending()
+    assert ran == ["early", "late"]
+    # Beim Ausführen neu geplant
+    assert late.next_run > datetime.datetime.now()
+    heap.run_pending()
+    assert ran == ["early", "late"]
+
+
+def test_cancelled_job_does_not_run(heap):
+    ran = []
+    job = heap.every(10).seconds.do(ran.append, 1)
+    _make_due(heap, job)
+    heap.cancel_job(job)
+    heap.run_pending()
+    assert ran == []
+
+
+def test_wallclock_job_runs_after_clock_jump(heap):
+    ran = []
+    job = heap.every().day.at("03:00").do(ran.append, 1)
+    heap.run_pending()
+    assert ran == []
+    # Die Uhr springt vor (NTP), next_run liegt jetzt in der Vergangenheit,
+    # der Eintrag im Heap aber noch Stunden in der Zukunft
+    job.next_run = datetime.datetime.now() - datetime.timedelta(seconds=1)
+    heap.run_pending()
+    assert ran == [1]
+
+
+@pytest.mark.parametrize("policy,pending,skipped,runs", [
+    (OverrunPolicy.SKIP, 0, 2, 1),
+    (OverrunPolicy.QUEUE, 2, 0, 3),
+    (OverrunPolicy.COALESCE, 1, 0, 2),
+])
+def test_overrun_policy(heap, policy, pending, skipped, runs):
+    ran = []
+    job = set_policy(heap.every(10).seconds.do(ran.append, 1), policy)
+    st = heap._stats[job]
+    st.running = True
+    for _ in range(2):
+        _make_due(heap, job)
+        heap._dispatch(job, inline=True)
+    assert st.overruns == 2
+    assert st.pending == pending
+    assert st.skipped == skipped
+    # Der laufende Job holt beim Beenden die ausstehenden Läufe nach
+    heap._work(job, False)
+    assert len(ran) == runs
+    assert not st.running and st.pending == 0
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+
+import Tools.Config as tc
+
+
+def test_log_replay_skips_partial_line(tmp_path, logger):
+    path = tmp_path / "test.state.json"
+    path.write_text(json.dumps({"a": 1, "b": 2}))
+    log = path.with_suffix(".log")
+    log.write_text("\n".join([
+        json.dumps({"k": "a", "v": 3}),
+        json.dumps({"k": "b", "d": 1}),
+        json.dumps({"k": "c", "v": [1, 2]}),
+        '{"k": "d", "v',
+    ]))
+    store = tc.StateStore(path, logger)
+    assert store["a"] == 3
+    assert "b" not in store
+    assert store.get("c") == [1, 2]
+    assert store.get("d", 5) == 5
+    assert "d" not in store
+
+
+def test_flush_appends_then_compacts(tmp_path, logger):
+    path = tmp_path / "test.state.json"
+    store = tc.StateStore(path, logger, flush_interval=3600, compact_after=3)
+    store["a"] = 1
+    store["a"] = 1
+    store["b"] = 2
+    assert store.flush()
+    log = path.with_suffix(".log")
+    assert len(log.read_text().splitlines()) == 2
+    assert not path.exists()
+
+    store["a"] = 4
+    del store["b"]
+    assert store.flush()
+    assert json.loads(path.read_text()) == {"a": 4}
+    assert log.read_text() == ""
+
+    store["c"] = 1
+    assert store.flush()
+    again = tc.StateStore(path, logger)
+    assert again["a"] == 4 and again["c"] == 1 and "b" not in again
+
+
+def test_adopt_moves_section_out_of_config(make_config):
+    config = make_config({"PLUGINS": {"w1t": {"stat": {"28-01": {"min": 1, "max": 5}}, "keep": True}}})
+    store = config.state_store()
+    store.adopt(config, "w1t/stat")
+    assert store["w1t/stat/28-01/min"] == 1
+    assert store["w1t/stat/28-01/max"] == 5
+    assert config["w1t/stat"] is None
+    assert config["w1t/keep"] is True
+    assert config.file_is_dirty
+    store.flush()
+
+
+def test_state_store_created_once(make_config, monkeypatch):
+    class _Slow(tc.StateStore):
+        def _load(self):
+            time.sleep(0.05)
+            super()._load()
+
+    monkeypatch.setattr(tc, "StateStore", _Slow)
+    config = make_config()
+    stores = []
+    threads = [threading.Thread(target=lambda: stores.append(config.state_store())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(stores) == 8
+    assert all(s is stores[0] for s in stores)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import paho.mqtt.client as mclient
+import pytest
+
+from Tools.TopicRouter import TopicRouter, validate_filter
+
+FILTERS = ["a/b/c", "a/+/c", "a/#", "+/b/#", "#", "+", "a/+", "$SYS/#", "$SYS/+/x", "a/b/c/#"]
+TOPICS = ["a", "a/b", "a/b/c", "a/x/c", "a/b/c/d", "b", "x/b", "x/b/y", "$SYS/broker/x", "$SYS", "a//c", "/b"]
+
+
+def _handler(name):
+    def handler(client, userdata, message):
+        pass
+    handler.filter = name
+    return handler
+
+
+@pytest.fixture
+def router(logger):
+    router = TopicRouter(logger)
+    for f in FILTERS:
+        router.add(f, _handler(f))
+    return router
+
+
+@pytest.mark.parametrize("topic", TOPICS)
+def test_matches_like_broker(router, topic):
+    expected = sorted(f for f in FILTERS if mclient.topic_matches_sub(f, topic))
+    assert sorted(h.filter for h in router.match(topic)) == expected
+
+
+def test_hash_matches_parent_level(router):
+    assert "a/#" in [h.filter for h in router.match("a")]
+    assert "a/b/c/#" in [h.filter for h in router.match("a/b/c")]
+
+
+def test_dollar_topics_skip_top_level_wildcards(router):
+    assert sorted(h.filter for h in router.match("$SYS/broker/x")) == ["$SYS/#", "$SYS/+/x"]
+
+
+def test_replace_and_remove(router):
+    count = len(router)
+    router.add("a/b/c", _handler("new"))
+    assert len(router) == count
+    assert "new" in [h.filter for h in router.match("a/b/c")]
+    assert router.remove("a/b/c/#")
+    assert not router.remove("a/b/c/#")
+    assert not router.remove("never/added")
+    assert len(router) == count - 1
+    assert "a/b/c/#" not in [h.filter for h in router.match("a/b/c/d")]
+    # Der Ast bleibt für a/b/c erhalten
+    assert "new" in [h.filter for h in router.match("a/b/c")]
+
+
+@pytest.mark.parametrize("bad", ["a/#/b", "a/b#", "a+/b", "#/a"])
+def test_invalid_filter(bad):
+    with pytest.raises(ValueError):
+        validate_filter(bad)
+
+
+def test_on_message_calls_all_and_survives_errors(logger):
+    router = TopicRouter(logger)
+    calls = []
+
+    def broken(client, userdata, message):
+        raise RuntimeError("kaputt")
+
+    router.add("a/+", broken)
+    router.add("a/#", lambda c, u, m: calls.append(m.topic))
+    message = mclient.MQTTMessage(topic=b"a/b")
+    router.on_message(None, None, message)
+    assert calls == ["a/b"]